@@ -0,0 +1,95 @@
+# 파일: bench_read_path.py
+# 목록 응답 경로의 행당 CPU 비용을 비교하는 마이크로벤치마크입니다.
+# - 기존 경로: ORM 객체 조회 -> schemas로 검증(from_attributes) -> Pydantic JSON 직렬화 (FastAPI response_model과 같은 작업)
+# - 빠른 경로: Core 행 조회 -> dict -> orjson 직렬화 (crud.get_book_rows / get_user_loan_rows + responses.dumps)
+#
+# 사용 예시 (task4 폴더에서, 임시 DB 파일을 만들어 사용하므로 library.db는 변경되지 않음)
+#   python bench_read_path.py --rows 10000 --repeat 7
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="library_bench_")
+os.environ.setdefault("LIBRARY_DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ.setdefault("LIBRARY_CATALOG_CACHE_ENABLED", "false")
+
+from typing import List  # noqa: E402
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from library_api import crud, database, migrate, models, responses, schemas  # noqa: E402
+
+
+def seed(rows: int):
+    migrate.ensure_schema(database.engine)
+    with database.SessionLocal() as db:
+        user = models.User(username="bench", email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        books = [
+            {"title": f"Book {i}", "author": f"Author {i % 100}", "isbn": f"bench-{i}",
+             "category": "Bench", "total_copies": 2, "available_copies": 1}
+            for i in range(rows)
+        ]
+        db.execute(models.Book.__table__.insert(), books)
+        book_ids = [book_id for (book_id,) in db.query(models.Book.id).order_by(models.Book.id)]
+        db.execute(models.Loan.__table__.insert(), [{"book_id": book_id, "user_id": user.id} for book_id in book_ids])
+        db.commit()
+        return user.id
+
+
+def measure(fn, repeat: int) -> float:
+    # 가장 안정적인 값을 쓰기 위해 여러 번 실행한 뒤 중앙값(초)을 반환
+    fn()  # 워밍업
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목록 응답 경로 마이크로벤치마크")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    user_id = seed(args.rows)
+    books_adapter = TypeAdapter(List[schemas.Book])
+    loans_adapter = TypeAdapter(List[schemas.Loan])
+
+    def books_orm():
+        with database.SessionLocal() as db:
+            cached = [schemas.Book.model_validate(b).model_dump() for b in crud.get_books(db, limit=args.rows)]
+            return books_adapter.dump_json(books_adapter.validate_python(cached))
+
+    def books_fast():
+        with database.SessionLocal() as db:
+            return responses.dumps(crud.get_book_rows(db, limit=args.rows))
+
+    def loans_orm():
+        with database.SessionLocal() as db:
+            loans = crud.get_user_loans(db, user_id, limit=args.rows)
+            return loans_adapter.dump_json(loans_adapter.validate_python(loans, from_attributes=True))
+
+    def loans_fast():
+        with database.SessionLocal() as db:
+            return responses.dumps(crud.get_user_loan_rows(db, user_id, limit=args.rows))
+
+    assert books_orm() == books_fast() and loans_orm() == loans_fast(), "두 경로의 응답이 다릅니다"
+
+    print(f"rows={args.rows} repeat={args.repeat} json={'orjson' if responses.orjson else 'json'}")
+    print(f"{'endpoint':<20} {'orm us/row':>11} {'fast us/row':>12} {'speedup':>8}")
+    for name, old, new in (("GET /books", books_orm, books_fast), ("GET /users/me/loans", loans_orm, loans_fast)):
+        old_t = measure(old, args.repeat) / args.rows * 1e6
+        new_t = measure(new, args.repeat) / args.rows * 1e6
+        print(f"{name:<20} {old_t:>11.2f} {new_t:>12.2f} {old_t / new_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# 파일: bench_writes.py
+# 동시 쓰기 처리량(writes/sec)을 비교하는 벤치마크입니다.
+# - direct: 스레드마다 자기 세션으로 crud 쓰기 함수를 호출 (요청마다 commit, SQLite 잠금 경합)
+# - queue:  같은 호출을 쓰기 큐(library_api/writer.py)로 보내 한 스레드가 모아서 commit
+# 각 스레드는 대출 -> 반납을 반복하며, 대출/반납 한 번을 쓰기 1건으로 셉니다.
+#
+# 사용 예시 (task4 폴더에서, 임시 DB 파일을 만들어 사용하므로 library.db는 변경되지 않음)
+#   python bench_writes.py --threads 16 --duration 5
+#   LIBRARY_DB_PROFILE=production python bench_writes.py
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="library_bench_")
+os.environ.setdefault("LIBRARY_DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ.setdefault("LIBRARY_CATALOG_CACHE_ENABLED", "false")
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from library_api import crud, database, migrate, models, writer  # noqa: E402
+
+
+def seed(threads: int):
+    migrate.ensure_schema(database.engine)
+    with database.SessionLocal() as db:
+        user = models.User(username="bench", email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        # 스레드마다 다른 책을 빌려, 재고 부족이 아닌 잠금/commit 비용만 비교되도록 함
+        db.execute(models.Book.__table__.insert(), [
+            {"title": f"Book {i}", "author": "Bench", "isbn": f"bench-{i}", "category": "Bench",
+             "total_copies": 1, "available_copies": 1}
+            for i in range(threads)
+        ])
+        db.commit()
+        book_ids = [book_id for (book_id,) in db.query(models.Book.id).order_by(models.Book.id)]
+        return user.id, book_ids
+
+
+def run(mode: str, threads: int, duration: float, user_id: int, book_ids):
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        db = database.SessionLocal()
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    loan = writer.run(db, crud.create_loan, book_ids[index], user_id)
+                    writer.run(db, crud.return_loan, loan.id, user_id)
+                    counts[index] += 2
+                except OperationalError:  # database is locked
+                    db.rollback()
+                    errors[index] += 1
+        finally:
+            db.close()
+
+    if mode == "queue":
+        writer.start(database.engine)
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if mode == "queue":
+        writer.stop()
+    return sum(counts) / elapsed, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 쓰기 처리량 벤치마크 (직접 commit vs 쓰기 큐)")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="모드별 측정 시간(초)")
+    args = parser.parse_args()
+
+    user_id, book_ids = seed(args.threads)
+    print(f"profile={os.getenv('LIBRARY_DB_PROFILE', 'default')} threads={args.threads} duration={args.duration}s")
+    print(f"{'mode':<8} {'writes/s':>10} {'lock errors':>12}")
+    results = {}
+    for mode in ("direct", "queue"):
+        results[mode], errors = run(mode, args.threads, args.duration, user_id, book_ids)
+        print(f"{mode:<8} {results[mode]:>10.0f} {errors:>12}")
+    print(f"speedup: {results['queue'] / results['direct']:.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# 파일: benchmarks/conftest.py
+# 성능 회귀 벤치마크 공용 설정입니다. (tests/와 따로 실행: python -m pytest benchmarks)
+# - 임시 폴더의 SQLite 파일에 LIBRARY_BENCH_SCALES(기본 1000, 쉼표로 구분)권의 책을 넣고 같은 측정을 규모별로 반복합니다.
+#   규모는 작은 것부터 차례로 책을 추가하며 만들어지므로, 예를 들어 "1000,100000,1000000"은 한 DB를 키워 가며 측정합니다.
+# - 측정마다 실행 시간(중앙값)과 SQL 문 개수를 기록하고 baselines.json의 같은 규모/이름 값과 비교합니다.
+#   SQL 문 개수가 기준보다 많아지거나, 시간이 기준 x LIBRARY_BENCH_TOLERANCE(기본 3)보다 느려지면 실패합니다.
+#   (시간 기준은 측정한 컴퓨터에 따라 다르므로, 다른 환경에서는 LIBRARY_BENCH_TIMINGS=false로 SQL 문 개수만 비교할 수 있음)
+# - LIBRARY_BENCH_UPDATE=true로 실행하면 비교하지 않고 이번 결과로 baselines.json을 갱신합니다.
+
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pytest
+
+_tmp_dir = tempfile.mkdtemp(prefix="library_bench_")
+os.environ.setdefault("LIBRARY_DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+# 캐시가 응답하면 DB 경로의 회귀가 가려지므로 도서 목록 캐시는 끔 (사용자 캐시는 측정에서 직접 비움)
+os.environ.setdefault("LIBRARY_CATALOG_CACHE_ENABLED", "false")
+os.environ.setdefault("LIBRARY_BCRYPT_ROUNDS", "4")
+os.environ.setdefault("LIBRARY_HASH_EXECUTOR", "inline")
+os.environ.setdefault("LIBRARY_LOAN_ARCHIVE_INTERVAL", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from library_api import config, database, migrate, models  # noqa: E402
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SCALES = sorted(int(value) for value in os.getenv("LIBRARY_BENCH_SCALES", "1000").split(",") if value.strip())
+REPEAT = int(os.getenv("LIBRARY_BENCH_REPEAT", "20"))
+TOLERANCE = float(os.getenv("LIBRARY_BENCH_TOLERANCE", "3"))
+CHECK_TIMINGS = config.env_bool("LIBRARY_BENCH_TIMINGS", True)
+UPDATE_BASELINES = config.env_bool("LIBRARY_BENCH_UPDATE")
+# 아주 짧은 측정은 타이머/스케줄링 잡음이 상대적으로 크므로, 기준 시간에 이만큼(ms)의 여유를 더해 비교
+MIN_SLACK_MS = 0.2
+
+CATEGORIES = 20
+SEED_CHUNK = 50_000
+BENCH_USER = "bench"
+BENCH_LOANS = 200  # 벤치마크 사용자의 대출 기록 수 (반납된 기록 포함, 규모와 무관하게 고정)
+
+migrate.ensure_schema(database.engine)
+
+
+def _seed_books(target: int):
+    # 현재 권수에서 target권이 될 때까지 책을 추가합니다. (카테고리는 CATEGORIES개에 고르게 나눔)
+    with database.engine.begin() as conn:
+        current = conn.execute(select(func.count()).select_from(models.Book)).scalar_one()
+        for start in range(current, target, SEED_CHUNK):
+            conn.execute(models.Book.__table__.insert(), [
+                {"title": f"Bench Book {i}", "author": f"Author {i % 1000}", "isbn": f"bench-{i}",
+                 "category": f"Category {i % CATEGORIES}", "total_copies": 3, "available_copies": 3}
+                for i in range(start, min(start + SEED_CHUNK, target))
+            ])
+
+
+def _seed_user():
+    # 벤치마크 사용자와 대출 기록을 한 번만 만듭니다. (절반은 반납된 기록)
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.username == BENCH_USER).first()
+        if user is not None:
+            return user
+        from library_api import auth
+        user = models.User(username=BENCH_USER, email="bench@example.com", hashed_password=auth.get_password_hash("pw"))
+        db.add(user)
+        db.flush()
+        now = datetime.datetime.utcnow()
+        db.execute(models.Loan.__table__.insert(), [
+            {"book_id": i + 1, "user_id": user.id, "return_date": None if i % 2 else now}
+            for i in range(BENCH_LOANS)
+        ])
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+
+
+class Seeded:
+    def __init__(self, scale: int, user):
+        self.scale = scale
+        self.user = user
+        self.user_id = user.id
+        self.username = user.username
+
+
+@pytest.fixture(scope="session", params=SCALES, ids=lambda scale: f"{scale}books")
+def seeded(request):
+    """규모(책 권수)별로 데이터를 준비합니다. 세션 fixture이므로 같은 규모의 측정은 DB를 다시 만들지 않습니다."""
+    _seed_books(max(request.param, BENCH_LOANS))
+    return Seeded(request.param, _seed_user())
+
+
+def _engines():
+    if database.async_engine is not None:
+        return [database.async_engine.sync_engine]
+    return list({database.engine, database.read_engine})
+
+
+class _Results:
+    def __init__(self):
+        self.measured = {}
+        with open(BASELINES_PATH, encoding="utf-8") as f:
+            self.baselines = json.load(f) if os.path.getsize(BASELINES_PATH) else {}
+
+    def save(self):
+        merged = {scale: dict(values) for scale, values in self.baselines.items()}
+        for scale, values in self.measured.items():
+            merged.setdefault(scale, {}).update(values)
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump({scale: dict(sorted(merged[scale].items())) for scale in sorted(merged, key=int)},
+                      f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+
+_results = _Results()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if UPDATE_BASELINES and _results.measured:
+        _results.save()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results.measured:
+        return
+    terminalreporter.section("benchmark results (median ms / SQL statements)")
+    for scale, values in _results.measured.items():
+        baseline = _results.baselines.get(scale, {})
+        for name, value in values.items():
+            old = baseline.get(name)
+            previous = f"  (baseline {old['ms']:.3f} ms / {old['queries']})" if old else "  (no baseline)"
+            terminalreporter.write_line(f"{scale:>8} {name:<40} {value['ms']:>10.3f} ms {value['queries']:>4}{previous}")
+
+
+@pytest.fixture
+def bench(seeded):
+    """
+    fn을 REPEAT번 실행해 실행 시간 중앙값(ms)과 1회당 SQL 문 개수를 측정하고 기준값과 비교합니다.
+    사용법: bench("crud.get_book", lambda: crud.get_book(db, 1), setup=...)
+    setup을 주면 매 실행 전에 (시간 측정 없이) 호출합니다.
+    """
+    def _bench(name: str, fn, setup=None, repeat: int = REPEAT):
+        if setup is not None:
+            setup()
+        fn()  # 워밍업 (임포트, 문장 컴파일 캐시 등)
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        timings = []
+        for engine in _engines():
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            for _ in range(repeat):
+                if setup is not None:
+                    setup()
+                del statements[:]
+                start = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - start)
+        finally:
+            for engine in _engines():
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        result = {"ms": round(statistics.median(timings) * 1000, 4), "queries": len(statements)}
+        scale = str(seeded.scale)
+        _results.measured.setdefault(scale, {})[name] = result
+        baseline = _results.baselines.get(scale, {}).get(name)
+        if UPDATE_BASELINES or baseline is None:
+            return result
+        assert result["queries"] <= baseline["queries"], (
+            f"{name} @ {scale} books: {result['queries']} SQL statements (baseline {baseline['queries']})\n"
+            + "\n".join(statements))
+        if CHECK_TIMINGS:
+            limit = baseline["ms"] * TOLERANCE + MIN_SLACK_MS
+            assert result["ms"] <= limit, (
+                f"{name} @ {scale} books: {result['ms']:.3f} ms (baseline {baseline['ms']:.3f} ms, limit {limit:.3f} ms)")
+        return result
+    return _bench
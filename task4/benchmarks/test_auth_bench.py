@@ -0,0 +1,30 @@
+# 파일: benchmarks/test_auth_bench.py
+# 토큰 발급/인증 벤치마크
+
+import pytest
+
+from library_api import auth, database
+
+
+@pytest.fixture
+def token(seeded):
+    return auth.create_access_token(data={"sub": seeded.username})
+
+
+def test_create_access_token(bench, seeded):
+    bench("auth.create_access_token", lambda: auth.create_access_token(data={"sub": seeded.username}))
+
+
+def test_get_current_user(bench, seeded, token):
+    def current_user():
+        db = database.ReadSessionLocal()
+        try:
+            return auth.get_current_user(token, db)
+        finally:
+            db.close()
+
+    # 캐시를 비운 경우: 토큰 검증 + 사용자 조회 1회
+    bench("auth.get_current_user[uncached]", current_user, setup=lambda: auth.invalidate_user(seeded.user_id))
+    current_user()
+    if auth.principal_cache is not None:
+        bench("auth.get_current_user[cached]", current_user)
@@ -0,0 +1,72 @@
+# 파일: benchmarks/test_crud_bench.py
+# crud 함수별 실행 시간/SQL 문 개수 벤치마크
+
+import pytest
+
+from library_api import crud, database, schemas, search
+
+from .conftest import CATEGORIES
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+
+def test_user_lookups(bench, seeded, db):
+    bench("crud.get_user", lambda: crud.get_user(db, seeded.user_id), setup=db.expunge_all)
+    bench("crud.get_user_by_username", lambda: crud.get_user_by_username(db, seeded.username), setup=db.expunge_all)
+
+
+def test_book_reads(bench, seeded, db):
+    last_page = seeded.scale - 100
+    bench("crud.get_book", lambda: crud.get_book(db, seeded.scale // 2), setup=db.expunge_all)
+    bench("crud.get_books[limit=100]", lambda: crud.get_books(db, limit=100), setup=db.expunge_all)
+    bench("crud.get_book_rows[limit=100]", lambda: crud.get_book_rows(db, limit=100))
+    # 키셋 페이지네이션: 마지막 페이지도 첫 페이지와 같은 비용이어야 함
+    bench("crud.get_book_rows[last page]", lambda: crud.get_book_rows(db, after=last_page, limit=100))
+    bench("crud.get_book_rows[category,available]",
+          lambda: crud.get_book_rows(db, category=f"Category {CATEGORIES - 1}", available=True, limit=100))
+    bench("crud.get_book_rows[fields=id,title]",
+          lambda: crud.get_book_rows(db, limit=100, fields=("title", "id")))
+    ids = list(range(1, seeded.scale + 1, max(1, seeded.scale // 100)))[:100]
+    bench("crud.get_book_rows_by_ids[100]", lambda: crud.get_book_rows_by_ids(db, ids))
+    bench("crud.get_catalog_version", lambda: crud.get_catalog_version(db))
+    bench("search.search_books", lambda: search.search_books(db, "Author 7", limit=20))
+
+
+def test_user_loan_reads(bench, seeded, db):
+    bench("crud.get_user_loans[limit=50]", lambda: crud.get_user_loans(db, seeded.user_id, limit=50),
+          setup=db.expunge_all)
+    bench("crud.get_user_loan_rows[limit=50]", lambda: crud.get_user_loan_rows(db, seeded.user_id, limit=50))
+    bench("crud.get_user_loan_rows[active]",
+          lambda: crud.get_user_loan_rows(db, seeded.user_id, status="active", limit=50))
+
+
+def test_book_writes(bench, db):
+    def create_and_delete():
+        book = crud.create_book(db, schemas.BookCreate(
+            title="Bench Write", author="Bench", isbn="bench-write", category="Bench Write", total_copies=1))
+        crud.delete_book(db, book.id)
+
+    bench("crud.create_book+delete_book", create_and_delete)
+
+
+def test_loan_writes(bench, seeded, db):
+    book_id = seeded.scale  # 벤치마크 사용자의 대출 기록과 겹치지 않는 책
+
+    def borrow_and_return():
+        loan = crud.create_loan(db, book_id, seeded.user_id)
+        crud.return_loan(db, loan.id, seeded.user_id)
+
+    def borrow_and_return_batch():
+        loans, failed = crud.create_loans(db, batch_ids, seeded.user_id)
+        assert not failed
+        for loan in loans:
+            crud.return_loan(db, loan.id, seeded.user_id)
+
+    batch_ids = list(range(seeded.scale - 9, seeded.scale + 1))
+    bench("crud.create_loan+return_loan", borrow_and_return)
+    bench("crud.create_loans[10]+return_loan", borrow_and_return_batch)
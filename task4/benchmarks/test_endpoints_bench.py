@@ -0,0 +1,62 @@
+# 파일: benchmarks/test_endpoints_bench.py
+# TestClient로 호출하는 엔드포인트 전체(라우팅, 인증, 직렬화 포함) 벤치마크
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from library_api import auth
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def headers(seeded):
+    return {"Authorization": f"Bearer {auth.create_access_token(data={'sub': seeded.username})}"}
+
+
+def _get(client, url, **kwargs):
+    def call():
+        response = client.get(url, **kwargs)
+        assert response.status_code == 200, response.text
+        return response
+    return call
+
+
+def test_book_endpoints(bench, seeded, client):
+    bench("GET /books", _get(client, "/books"))
+    bench("GET /books?after=last page", _get(client, "/books", params={"after": seeded.scale - 100}))
+    bench("GET /books?fields=id,title", _get(client, "/books", params={"fields": "id,title"}))
+    bench("GET /books/search", _get(client, "/books/search", params={"q": "Author 7"}))
+    bench("GET /books/facets", _get(client, "/books/facets"))
+    ids = list(range(1, seeded.scale + 1, max(1, seeded.scale // 50)))[:50]
+    bench("GET /books/batch[50]", _get(client, "/books/batch", params={"ids": ids}))
+
+    etag = client.get("/books").headers["ETag"]
+
+    def not_modified():
+        assert client.get("/books", headers={"If-None-Match": etag}).status_code == 304
+
+    bench("GET /books[304]", not_modified)
+
+
+def test_user_endpoints(bench, seeded, client, headers):
+    bench("GET /users/me/loans", _get(client, "/users/me/loans", headers=headers))
+
+    def login():
+        response = client.post("/auth/login", data={"username": seeded.username, "password": "pw"})
+        assert response.status_code == 200, response.text
+
+    bench("POST /auth/login", login)
+
+
+def test_loan_endpoints(bench, seeded, client, headers):
+    def borrow_and_return():
+        response = client.post("/loans", json={"book_id": seeded.scale}, headers=headers)
+        assert response.status_code == 201, response.text
+        assert client.post(f"/loans/{response.json()['id']}/return", headers=headers).status_code == 200
+
+    bench("POST /loans+return", borrow_and_return)
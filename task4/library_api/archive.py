@@ -0,0 +1,115 @@
+# 파일: archive.py
+# 반납된 대출 기록을 loans -> loans_archive 로 옮기는 기능입니다.
+# loans 테이블에 대출 중인 행만 남겨, 대출 기록이 수천만 건 쌓여도 대출/반납/내 대출 조회가 작은 테이블에서 처리되도록 합니다.
+# - archive_returned_loans: batch_size개씩 나누어 옮기며, 배치마다 하나의 트랜잭션으로 commit 합니다.
+#   쓰기 큐가 실행 중이면 배치마다 쓰기 큐에 넣어, 다른 쓰기와 순서대로 처리되도록 합니다. (library_api/writer.py 참고)
+# - start_background_archiver: 서버 프로세스 안에서 주기적으로 위 함수를 실행하는 데몬 스레드
+#
+# 명령줄에서 한 번 실행할 수도 있습니다. (task4 폴더에서, cron 등으로 예약 실행 가능)
+#   python -m library_api.archive --batch-size 5000
+
+import datetime
+import logging
+import threading
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import config, models, writer
+
+logger = logging.getLogger("library_api.archive")
+
+_ARCHIVE_COLUMNS = ("id", "book_id", "user_id", "loan_date", "return_date")
+
+
+def archive_batch(db: Session, batch_size: int = 1000, returned_before: datetime.datetime = None) -> int:
+    """
+    반납된 대출을 최대 batch_size개 옮기고 옮긴 개수를 반환합니다.
+    DELETE ... RETURNING 으로 먼저 행을 지우고(쓰기 잠금 획득) 같은 트랜잭션에서 보관 테이블에 넣으므로,
+    여러 워커가 동시에 실행해도 한 행이 두 번 옮겨지지 않습니다.
+    """
+    loans = models.Loan.__table__
+    condition = loans.c.return_date.is_not(None)
+    if returned_before is not None:
+        condition = condition & (loans.c.return_date < returned_before)
+    # 가장 큰 id의 행은 남겨 둡니다. (AUTOINCREMENT가 없는 SQLite는 최대 id가 지워지면 그 id를 재사용하므로
+    # 새 대출이 보관 테이블의 id와 겹치지 않도록)
+    condition = condition & (loans.c.id < select(func.max(loans.c.id)).scalar_subquery())
+    ids = select(loans.c.id).where(condition).order_by(loans.c.id).limit(batch_size)
+
+    rows = db.execute(
+        delete(loans).where(loans.c.id.in_(ids)).returning(*(loans.c[name] for name in _ARCHIVE_COLUMNS))
+    ).all()
+    if rows:
+        db.execute(insert(models.LoanArchive.__table__), [dict(zip(_ARCHIVE_COLUMNS, row)) for row in rows])
+    db.commit()
+    return len(rows)
+
+
+def archive_returned_loans(db: Session, batch_size: int = 1000, returned_before: datetime.datetime = None,
+                           max_batches: int = None) -> int:
+    """
+    옮길 행이 없을 때까지(또는 max_batches번) archive_batch를 반복하고 옮긴 총 개수를 반환합니다.
+    배치 하나가 쓰기 큐의 작업 하나이므로, 옮기는 도중에도 다른 요청의 쓰기가 배치 사이에 처리됩니다.
+    """
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = writer.run(db, archive_batch, batch_size=batch_size, returned_before=returned_before)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    return total
+
+
+def _cutoff():
+    # 반납 후 LOAN_ARCHIVE_DELAY초가 지난 기록만 옮깁니다. (0이면 반납 즉시 대상)
+    if config.LOAN_ARCHIVE_DELAY <= 0:
+        return None
+    return datetime.datetime.utcnow() - datetime.timedelta(seconds=config.LOAN_ARCHIVE_DELAY)
+
+
+def start_background_archiver(session_factory, interval: float = None) -> threading.Thread:
+    """interval초마다 반납된 대출을 옮기는 데몬 스레드를 시작합니다."""
+    interval = config.LOAN_ARCHIVE_INTERVAL if interval is None else interval
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            db = session_factory()
+            try:
+                moved = archive_returned_loans(db, batch_size=config.LOAN_ARCHIVE_BATCH_SIZE,
+                                               returned_before=_cutoff())
+                if moved:
+                    logger.info("archived %d returned loans", moved)
+            except Exception:
+                logger.exception("loan archive pass failed")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=run, name="loan-archiver", daemon=True)
+    thread.stop_event = stop  # set() 하면 다음 주기에 종료
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from . import migrate
+    from .database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="반납된 대출 기록을 보관 테이블로 옮기기")
+    parser.add_argument("--batch-size", type=int, default=config.LOAN_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--delay", type=float, default=config.LOAN_ARCHIVE_DELAY,
+                        help="반납 후 이 시간(초)이 지난 기록만 옮김")
+    args = parser.parse_args()
+
+    migrate.ensure_schema(engine)
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=args.delay) if args.delay > 0 else None
+    session = SessionLocal()
+    try:
+        print(f"archived {archive_returned_loans(session, batch_size=args.batch_size, returned_before=cutoff)} loans")
+    finally:
+        session.close()
@@ -0,0 +1,74 @@
+# 파일: async_crud.py
+# crud.py의 비동기 버전입니다. (LIBRARY_ASYNC_MODE=true 일 때 사용)
+# 쿼리 로직은 crud.py를 그대로 재사용하고, AsyncSession.run_sync로 실행하여
+# DB I/O 동안 이벤트 루프를 막지 않습니다.
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import schemas, auth, crud, search, writer
+
+# --- User CRUD ---
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.run_sync(crud.get_user_by_email, email)
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.run_sync(crud.get_user_by_username, username)
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    # bcrypt 해싱은 CPU를 오래 점유하므로 이벤트 루프가 아닌 해싱 전용 풀에서 수행합니다.
+    hashed_password = await auth.get_password_hash_async(user.password)
+    return await writer.run_async(db, crud.create_user, user, hashed_password=hashed_password)
+
+async def update_password_hash(db: AsyncSession, user_id: int, hashed_password: str):
+    return await writer.run_async(db, crud.update_password_hash, user_id, hashed_password)
+
+# --- Book CRUD ---
+async def get_books_cached(db: AsyncSession, category: str = None, available: bool = None, after: int = None, limit: int = None,
+                           version: int = None, fields=None):
+    return await db.run_sync(crud.get_books_cached, category=category, available=available, after=after, limit=limit,
+                             version=version, fields=fields)
+
+async def get_catalog_version(db: AsyncSession):
+    return await db.run_sync(crud.get_catalog_version)
+
+async def get_book_rows_by_ids(db: AsyncSession, book_ids):
+    return await db.run_sync(crud.get_book_rows_by_ids, book_ids)
+
+async def iter_book_rows(db: AsyncSession, category: str = None, available: bool = None, after: int = None, batch_size: int = 500,
+                         fields=None):
+    # crud.iter_book_rows의 비동기 버전
+    while True:
+        batch = await db.run_sync(crud.get_book_rows, category=category, available=available, after=after, limit=batch_size,
+                                  fields=fields)
+        if not batch:
+            return
+        for book in batch:
+            yield book
+        after = batch[-1]["id"]
+
+async def search_books(db: AsyncSession, q: str, limit: int = 20, offset: int = 0):
+    return await db.run_sync(search.search_books, q, limit=limit, offset=offset)
+
+# 쓰기 함수는 쓰기 큐가 실행 중이면 큐를 거칩니다. (library_api/writer.py)
+async def create_book(db: AsyncSession, book: schemas.BookCreate):
+    return await writer.run_async(db, crud.create_book, book)
+
+async def delete_book(db: AsyncSession, book_id: int):
+    return await writer.run_async(db, crud.delete_book, book_id)
+
+# --- Loan CRUD ---
+async def create_loan(db: AsyncSession, book_id: int, user_id: int):
+    # 응답 직렬화 시점에는 지연 로딩(lazy load)을 할 수 없으므로 책 정보까지 읽어 두는 버전을 사용합니다. (대출, 실패 원인) 반환
+    return await writer.run_async(db, crud.create_loan_with_book, book_id, user_id)
+
+async def create_loans(db: AsyncSession, book_ids, user_id: int, all_or_nothing: bool = True):
+    # crud.create_loans는 책 정보를 joinedload로 함께 읽으므로 지연 로딩이 필요 없습니다.
+    return await writer.run_async(db, crud.create_loans, book_ids, user_id, all_or_nothing=all_or_nothing)
+
+async def return_loan(db: AsyncSession, loan_id: int, user_id: int):
+    # (대출, 실패 원인) 반환
+    return await writer.run_async(db, crud.return_loan_with_book, loan_id, user_id)
+
+async def get_user_loan_rows(db: AsyncSession, user_id: int, status: str = None, after: int = None, limit: int = None,
+                             fields=None):
+    return await db.run_sync(crud.get_user_loan_rows, user_id, status=status, after=after, limit=limit, fields=fields)
@@ -0,0 +1,182 @@
+# 파일: async_routes.py
+# main.py 핵심 엔드포인트의 비동기(async def) 버전입니다.
+# LIBRARY_ASYNC_MODE=true 일 때 main.py의 동기 라우터 대신 등록됩니다.
+# 동기 엔드포인트는 FastAPI 스레드풀에서 실행되어 동시 접속이 많으면 스레드풀이 먼저 포화되지만,
+# 이 라우터는 이벤트 루프 위에서 AsyncSession으로 DB I/O를 기다리므로 스레드를 점유하지 않습니다.
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from . import async_crud, schemas, auth, config, database, fields, responses
+from .database import get_async_db
+
+router = APIRouter()
+
+
+# 비동기 엔드포인트용 get_current_user (토큰 검증 로직은 auth.py와 공유)
+async def get_current_user(token: str = Depends(auth.oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    user = auth.get_cached_user(token)
+    if user is not None:
+        return user
+    token_data = auth.decode_token(token)
+    db_user = await async_crud.get_user_by_username(db, username=token_data.username)
+    if db_user is None:
+        raise auth.credentials_exception()
+    return auth.cache_user(token, token_data, db_user)
+
+
+# --- 인증 엔드포인트 ---
+@router.post("/auth/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user_by_email = await async_crud.get_user_by_email(db, email=user.email)
+    if db_user_by_email:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    db_user_by_username = await async_crud.get_user_by_username(db, username=user.username)
+    if db_user_by_username:
+        raise HTTPException(status_code=400, detail="Username already registered")
+    return await async_crud.create_user(db=db, user=user)
+
+
+@router.post("/auth/login", response_model=schemas.Token)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_username(db, username=form_data.username)
+    # bcrypt 검증은 CPU 작업이므로 이벤트 루프를 막지 않도록 해싱 전용 풀에서 실행합니다.
+    if not user or not await auth.verify_password_async(form_data.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if auth.needs_rehash(user.hashed_password):
+        new_hash = await auth.get_password_hash_async(form_data.password)
+        await async_crud.update_password_hash(db, user.id, new_hash)
+    access_token = auth.create_access_token(
+        data={"sub": user.username}
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+# --- 도서 관리 엔드포인트 ---
+@router.post("/books", response_model=schemas.Book, status_code=status.HTTP_201_CREATED)
+async def create_book(book: schemas.BookCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_user)):
+    return await async_crud.create_book(db=db, book=book)
+
+
+@router.get("/books", response_model=List[schemas.Book])
+async def read_books(
+    category: str = None,
+    available: bool = None,
+    after: Optional[int] = None,
+    limit: int = Query(config.BOOKS_PAGE_SIZE, ge=1, le=config.BOOKS_MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    book_fields: Optional[tuple] = Depends(fields.book_fields),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    version = await async_crud.get_catalog_version(db)
+    etag = responses.make_etag(version, category or None, bool(available), after, limit, format, book_fields)
+    if responses.etag_matches(if_none_match, etag):
+        return responses.not_modified(etag)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_books_ndjson(category, available, after, book_fields),
+            media_type="application/x-ndjson",
+            headers=headers,
+        )
+
+    books = await async_crud.get_books_cached(db, category=category, available=available, after=after, limit=limit,
+                                              version=version, fields=book_fields)
+    if len(books) == limit:
+        headers["X-Next-Cursor"] = str(books[-1]["id"])
+    return responses.FastJSONResponse(books, headers=headers)
+
+
+async def _stream_books_ndjson(category: Optional[str], available: Optional[bool], after: Optional[int], book_fields=None):
+    async with database.AsyncSessionLocal() as db:
+        chunk = []
+        async for book in async_crud.iter_book_rows(db, category=category, available=available, after=after,
+                                                    batch_size=config.BOOKS_STREAM_BATCH_SIZE, fields=book_fields):
+            chunk.append(responses.dumps(book))
+            if len(chunk) == config.BOOKS_STREAM_BATCH_SIZE:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+
+@router.get("/books/batch", response_model=List[schemas.Book])
+async def read_books_by_ids(
+    ids: List[int] = Query(..., min_length=1, max_length=config.BOOKS_BATCH_MAX_IDS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return responses.FastJSONResponse(await async_crud.get_book_rows_by_ids(db, ids))
+
+
+@router.get("/books/search", response_model=List[schemas.Book])
+async def search_books(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await async_crud.search_books(db, q=q, limit=limit, offset=offset)
+
+
+@router.delete("/books/{book_id}", response_model=schemas.Book)
+async def delete_book(book_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_user)):
+    db_book = await async_crud.delete_book(db, book_id=book_id)
+    if db_book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return db_book
+
+
+# --- 대출/반납 엔드포인트 ---
+@router.post("/loans", response_model=schemas.Loan, status_code=status.HTTP_201_CREATED)
+async def borrow_book(loan_data: schemas.LoanCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_user)):
+    book_id = loan_data.book_id
+    user_id = current_user.id
+
+    loan, error = await async_crud.create_loan(db=db, book_id=book_id, user_id=user_id)
+    if error == "not_found":
+        raise HTTPException(status_code=404, detail="Book not found")
+    if error is not None:
+        raise HTTPException(status_code=400, detail="Book is not available for loan")
+    return loan
+
+
+@router.post("/loans/batch", response_model=schemas.LoanBatchResult, status_code=status.HTTP_201_CREATED)
+async def borrow_books(batch: schemas.LoanBatchCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_user)):
+    loans, failed = await async_crud.create_loans(db, batch.book_ids, current_user.id, all_or_nothing=batch.all_or_nothing)
+    if not loans:
+        raise HTTPException(status_code=400, detail={"message": "Books are not available for loan", "failed": failed})
+    return {"loans": loans, "failed": failed}
+
+
+@router.post("/loans/{loan_id}/return", response_model=schemas.Loan)
+async def return_book(loan_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_user)):
+    loan, error = await async_crud.return_loan(db=db, loan_id=loan_id, user_id=current_user.id)
+    if error == "not_found":
+        raise HTTPException(status_code=404, detail="Loan not found")
+    if error is not None:
+        raise HTTPException(status_code=400, detail="Book has already been returned")
+    return loan
+
+
+@router.get("/users/me/loans", response_model=List[schemas.Loan])
+async def read_user_loans(
+    loan_status: Optional[str] = Query(None, alias="status", pattern="^(active|returned)$"),
+    after: Optional[int] = None,
+    limit: int = Query(config.LOANS_PAGE_SIZE, ge=1, le=config.LOANS_MAX_PAGE_SIZE),
+    loan_fields: Optional[tuple] = Depends(fields.loan_fields),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    loans = await async_crud.get_user_loan_rows(db=db, user_id=current_user.id, status=loan_status, after=after, limit=limit,
+                                                fields=loan_fields)
+    headers = {"X-Next-Cursor": str(loans[-1]["id"])} if len(loans) == limit else None
+    return responses.FastJSONResponse(loans, headers=headers)
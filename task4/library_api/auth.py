@@ -2,16 +2,15 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from . import schemas, crud
+from . import schemas, crud, models, cache, config, hashing, metrics
 
-from .database import get_db
+from .database import get_read_db
 
 # --- 비밀번호 해싱 설정 ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 해싱 정책(cost factor)과 실행 풀은 hashing.py에서 관리합니다.
 
 # --- JWT 설정 ---
 SECRET_KEY = "YOUR_SECRET_KEY" # 실제 운영에서는 .env 파일 등으로 관리해야 합니다.
@@ -20,34 +19,105 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# --- 인증 사용자 캐시 ---
+# 검증된 토큰 -> 사용자 스냅샷을 저장해, 같은 토큰으로 들어온 요청은 jwt.decode와 사용자 조회 쿼리를 생략합니다.
+principal_cache = cache.PrincipalCache(config.AUTH_CACHE_SIZE, config.AUTH_CACHE_TTL) if config.AUTH_CACHE_ENABLED else None
+metrics.register_cache("principal", principal_cache)
+
+def hashing_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry later",
+        headers={"Retry-After": "1"},
+    )
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return hashing.verify_password(plain_password, hashed_password)
+    except hashing.HashingBusyError:
+        raise hashing_busy_exception()
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    try:
+        return hashing.hash_password(password)
+    except hashing.HashingBusyError:
+        raise hashing_busy_exception()
+
+async def verify_password_async(plain_password, hashed_password):
+    try:
+        return await hashing.verify_password_async(plain_password, hashed_password)
+    except hashing.HashingBusyError:
+        raise hashing_busy_exception()
+
+async def get_password_hash_async(password):
+    try:
+        return await hashing.hash_password_async(password)
+    except hashing.HashingBusyError:
+        raise hashing_busy_exception()
+
+def needs_rehash(hashed_password):
+    return hashing.needs_rehash(hashed_password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt  # python-jose는 임포트 비용이 크므로 처음 사용할 때 불러옴
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_token(token: str) -> schemas.TokenData:
+    # 토큰을 검증하고 사용자 이름과 만료 시각을 꺼냅니다. 유효하지 않으면 401 예외를 발생시킵니다.
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(username=username)
+            raise credentials_exception()
+        return schemas.TokenData(username=username, exp=payload.get("exp"))
     except JWTError:
-        raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise credentials_exception()
+
+def get_cached_user(token: str):
+    # 캐시에 저장된 사용자 스냅샷을 반환합니다. (없거나 만료되었으면 None)
+    if principal_cache is None:
+        return None
+    return principal_cache.get(token)
+
+def cache_user(token: str, token_data: schemas.TokenData, db_user):
+    # DB에서 읽은 사용자를 세션과 무관한 스냅샷(schemas.User)으로 바꿔 토큰 만료 시각까지 캐시합니다.
+    user = schemas.User.model_validate(db_user)
+    if principal_cache is not None and token_data.exp is not None:
+        principal_cache.set(token, user, token_data.exp)
+    return user
+
+def invalidate_user(user_id: int):
+    # 사용자가 변경되거나 삭제되었을 때 호출하는 무효화 훅입니다. 해당 사용자의 캐시된 토큰을 모두 제거합니다.
+    if principal_cache is not None:
+        principal_cache.invalidate_user(user_id)
+
+# User 행이 UPDATE/DELETE 되면 (어느 코드 경로에서든) 자동으로 캐시를 무효화합니다.
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    invalidate_user(target.id)
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    user = get_cached_user(token)
+    if user is not None:
+        return user
+    token_data = decode_token(token)
+    db_user = crud.get_user_by_username(db, username=token_data.username)
+    if db_user is None:
+        raise credentials_exception()
+    user = cache_user(token, token_data, db_user)
+    # 스냅샷으로 바꿨으므로 연결을 바로 풀에 돌려줌 (요청이 끝날 때까지 읽기 연결과 쓰기 연결을 함께 점유하지 않도록)
+    db.close()
+    return user
@@ -0,0 +1,194 @@
+# 파일: bulk_import.py
+# 도서 카탈로그 대량 가져오기(bulk import) 기능입니다.
+# - CSV(헤더 필수: title,author,isbn,category,total_copies) 또는 NDJSON(한 줄에 JSON 객체 하나)을 한 행씩 읽고,
+# - 각 행을 schemas.BookCreate로 검증한 뒤,
+# - batch_size개씩 모아 하나의 트랜잭션에서 INSERT ... ON CONFLICT(isbn) 한 문장으로 저장합니다.
+# 파일 전체를 메모리에 올리지 않으므로 수백만 행도 일정한 메모리로 처리할 수 있습니다.
+#
+# 명령줄에서도 실행할 수 있습니다. (task4 폴더에서)
+#   python -m library_api.bulk_import books.csv --on-conflict upsert --batch-size 5000
+
+import csv
+import json
+import re
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models, schemas, crud, waitlist, writer
+
+MAX_REPORTED_ERRORS = 1000  # 보고서에 담는 행 오류의 최대 개수 (개수 집계는 계속함)
+
+# 파일은 errors="surrogateescape"로 읽으므로, UTF-8이 아닌 바이트는 이 범위의 문자로 남습니다. (해당 행만 오류로 처리)
+_UNDECODABLE = re.compile("[\udc80-\udcff]")
+INVALID_ENCODING = "invalid UTF-8 data"
+
+
+def detect_format(filename: str = None, content_type: str = None) -> str:
+    """파일 이름/Content-Type으로 형식(csv 또는 ndjson)을 추정합니다. 알 수 없으면 csv."""
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(lines, fmt: str):
+    """
+    텍스트 줄 이터러블에서 (행 번호, dict 또는 파싱 오류 메시지)를 하나씩 꺼냅니다.
+    CSV 행 번호는 헤더를 1행으로 셉니다.
+    UTF-8이 아닌 바이트가 들어 있는 행은 파싱 오류로 꺼냅니다. (줄은 errors="surrogateescape"로 읽어야 함)
+    """
+    for line_no, record in _parse_records(lines, fmt):
+        if isinstance(record, dict) and any(
+            isinstance(value, str) and _UNDECODABLE.search(value) for value in record.values()
+        ):
+            record = INVALID_ENCODING
+        yield line_no, record
+
+
+def _parse_records(lines, fmt: str):
+    if fmt == "ndjson":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, "each line must be a JSON object"
+                continue
+            yield line_no, record
+    else:
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def _build_insert(on_conflict: str):
+    stmt = sqlite_insert(models.Book)
+    if on_conflict == "upsert":
+        # 기존 책의 정보를 새 값으로 덮어씁니다.
+        # 대출 중인 부수는 유지하도록 available_copies는 total_copies 변화량만큼만 조정합니다.
+        return stmt.on_conflict_do_update(
+            index_elements=[models.Book.isbn],
+            set_={
+                "title": stmt.excluded.title,
+                "author": stmt.excluded.author,
+                "category": stmt.excluded.category,
+                "total_copies": stmt.excluded.total_copies,
+                "available_copies": func.max(
+                    0, models.Book.available_copies + stmt.excluded.total_copies - models.Book.total_copies
+                ),
+            },
+        )
+    return stmt.on_conflict_do_nothing(index_elements=[models.Book.isbn])
+
+
+def _write_batch(db: Session, rows, on_conflict: str) -> int:
+    # 행 목록을 한 트랜잭션으로 저장하고, 그중 이미 있던 ISBN의 개수를 반환합니다. (쓰기 큐에서 실행될 수 있음)
+    existing = db.query(models.Book.isbn).filter(models.Book.isbn.in_([row["isbn"] for row in rows])).count()
+    db.execute(_build_insert(on_conflict), rows)
+    granted = []
+    if existing and on_conflict == "upsert":
+        # 부수가 늘어 빌릴 수 있게 된 책의 대기자는 같은 트랜잭션에서 확보 상태로 바꿈
+        # (대기자가 있는 책에 남은 부수가 있으면 대기열 등록이 거절되므로, 그대로 두면 대기자가 계속 기다리게 됨)
+        waiting = select(models.Book.id).where(
+            models.Book.isbn.in_([row["isbn"] for row in rows]),
+            models.Book.available_copies > 0,
+            waitlist.has_waiters(models.Book.id),
+        )
+        for book_id in db.scalars(waiting).all():
+            granted.extend(waitlist.promote(db, book_id))
+    crud.bump_catalog_version(db)
+    db.commit()
+    if existing < len(rows) or on_conflict == "upsert":
+        # 여러 카테고리가 한꺼번에 바뀌었으므로 도서 목록 캐시를 모두 비움
+        writer.after_commit(db, crud.clear_catalog_cache)
+    if granted:
+        writer.after_commit(db, waitlist.notify, granted)
+    return existing
+
+
+def _flush_batch(db: Session, batch: dict, on_conflict: str, report: schemas.BookImportReport):
+    # batch: isbn -> 행 데이터 (같은 배치 안의 중복 ISBN은 이미 하나로 합쳐져 있음)
+    # 파일 읽기/검증은 요청 스레드에서 하고, 저장만 다른 쓰기와 같이 쓰기 큐(실행 중이면)로 넘깁니다.
+    if not batch:
+        return
+    existing = writer.run(db, _write_batch, list(batch.values()), on_conflict)
+    report.inserted += len(batch) - existing
+    if on_conflict == "upsert":
+        report.updated += existing
+    else:
+        report.skipped += existing
+
+
+def import_books(db: Session, lines, fmt: str = "csv", on_conflict: str = "skip", batch_size: int = 1000):
+    """
+    lines(텍스트 줄 이터러블)의 도서 데이터를 batch_size개씩 저장하고 결과 보고서를 반환합니다.
+    - on_conflict="skip": 이미 있는 ISBN은 건너뜁니다. (같은 파일 안에서는 처음 나온 행을 사용)
+    - on_conflict="upsert": 이미 있는 ISBN은 새 값으로 갱신합니다. (같은 파일 안에서는 마지막 행을 사용)
+    검증에 실패한 행은 저장하지 않고 보고서의 errors에 행 번호와 함께 기록합니다.
+    """
+    report = schemas.BookImportReport()
+    batch = {}
+    for line_no, record in iter_records(lines, fmt):
+        report.processed += 1
+        if isinstance(record, str):
+            _add_error(report, line_no, None, record)
+            continue
+        try:
+            book = schemas.BookCreate.model_validate(record)
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            _add_error(report, line_no, record.get("isbn"), message)
+            continue
+
+        if book.isbn in batch:
+            if on_conflict == "skip":
+                report.skipped += 1
+                continue
+            report.updated += 1
+        batch[book.isbn] = dict(book.model_dump(), available_copies=book.total_copies)
+
+        if len(batch) >= batch_size:
+            _flush_batch(db, batch, on_conflict, report)
+            batch = {}
+    _flush_batch(db, batch, on_conflict, report)
+    return report
+
+
+def _add_error(report: schemas.BookImportReport, line_no: int, isbn, message: str):
+    report.failed += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(schemas.BookImportError(row=line_no, isbn=isbn, error=message))
+    else:
+        report.errors_truncated = True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from . import migrate
+    from .database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="도서 카탈로그 대량 가져오기")
+    parser.add_argument("path", help="CSV 또는 NDJSON 파일 경로")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="파일 형식 (기본값: 확장자로 추정)")
+    parser.add_argument("--on-conflict", choices=["skip", "upsert"], default="skip")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    migrate.ensure_schema(engine)
+    session = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", errors="surrogateescape", newline="") as f:
+            result = import_books(session, f, fmt=args.format or detect_format(args.path),
+                                  on_conflict=args.on_conflict, batch_size=args.batch_size)
+    finally:
+        session.close()
+    print(result.model_dump_json(indent=2))
@@ -0,0 +1,273 @@
+# 파일: cache.py
+# 애플리케이션에서 사용하는 캐시 모음입니다.
+#
+# 1) 도서 목록(GET /books) 조회 결과를 저장하는 읽기 캐시(read-through cache)
+# - 키: (category, available, after, limit, 카탈로그 버전, 선택한 필드)
+# - 크기 제한(LRU 방식으로 가장 오래 사용되지 않은 항목부터 제거)과 TTL(만료 시간)을 적용합니다.
+# - crud.py의 쓰기 함수(create_book, delete_book, create_loan)가 해당 카테고리 항목을 무효화합니다.
+# - 백엔드는 두 가지입니다.
+#     memory: 프로세스 내부 메모리 (기본값, uvicorn 워커마다 따로 유지)
+#     sqlite: 디스크 파일 하나를 모든 워커가 공유하여, 한 워커의 무효화가 다른 워커에도 즉시 반영됩니다.
+#
+# 2) 인증된 사용자 캐시(PrincipalCache): 토큰 검증 결과를 저장해 요청마다 사용자 조회 쿼리를 생략합니다.
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from . import config, metrics
+
+
+def make_key(category=None, available=None, after=None, limit=None, version=None, fields=None):
+    # crud.get_books는 category가 빈 값이면 필터하지 않고, available은 True일 때만 필터하므로 키도 같은 기준으로 정규화합니다.
+    return (category or None, bool(available), after, limit, version, fields)
+
+
+class MemoryCache:
+    """프로세스 내부 LRU + TTL 캐시입니다. 여러 스레드에서 동시에 사용해도 안전합니다."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        # 무효화할 때마다 증가합니다. 조회 도중 무효화가 일어나면 그 결과는 저장하지 않습니다.
+        self._generation = 0
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate_category(self, category):
+        # 카테고리 필터가 없는 목록(category=None)에도 해당 책이 포함되므로 함께 제거합니다.
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._data if k[0] is None or k[0] == category]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self):
+        return {"backend": "memory", "size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteCache:
+    """
+    여러 워커 프로세스가 공유하는 디스크 기반 캐시입니다.
+    MemoryCache와 같은 인터페이스를 제공하며, 히트/미스 카운터는 프로세스별로 집계됩니다.
+    조회(get)는 읽기만 합니다. 히트한 항목의 사용 시각은 메모리에 모아 두었다가,
+    어차피 쓰기 트랜잭션을 여는 set에서 LRU 제거 전에 한꺼번에 반영합니다. (히트마다 쓰기 잠금과 commit을 하지 않음)
+    """
+
+    def __init__(self, path: str, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # key(JSON) -> 아직 DB에 반영하지 않은 마지막 사용 시각
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # 캐시는 유실되어도 다시 채우면 되므로 fsync를 생략
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                category TEXT,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_entries_category ON cache_entries (category);
+            CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS cache_meta (id INTEGER PRIMARY KEY CHECK (id = 0), generation INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_meta (id, generation) VALUES (0, 0);
+        """)
+
+    def generation(self):
+        with self._lock:
+            return self._conn.execute("SELECT generation FROM cache_meta").fetchone()[0]
+
+    def get(self, key):
+        now = time.time()
+        key_json = json.dumps(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key_json, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key_json] = now
+            self.hits += 1
+        return json.loads(row[0])
+
+    def _flush_touched(self):
+        # 호출하는 쪽에서 self._lock과 쓰기 트랜잭션을 잡고 있어야 합니다.
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ? AND accessed_at < ?",
+                [(accessed_at, key, accessed_at) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def set(self, key, value, generation=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._conn.execute("SELECT generation FROM cache_meta").fetchone()[0]
+                if generation is None or generation == current:
+                    self._flush_touched()
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO cache_entries (key, category, value, expires_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (json.dumps(key), key[0], json.dumps(value), now + self.ttl, now),
+                    )
+                    self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                    self._conn.execute(
+                        "DELETE FROM cache_entries WHERE key IN ("
+                        "  SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.maxsize,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def invalidate_category(self, category):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("UPDATE cache_meta SET generation = generation + 1")
+            self._conn.execute("DELETE FROM cache_entries WHERE category IS NULL OR category = ?", (category,))
+            self._conn.execute("COMMIT")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("UPDATE cache_meta SET generation = generation + 1")
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.execute("COMMIT")
+            self._touched.clear()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return {"backend": "sqlite", "size": size, "hits": self.hits, "misses": self.misses}
+
+
+class PrincipalCache:
+    """
+    검증된 액세스 토큰 -> 사용자 스냅샷(schemas.User) 캐시입니다. (auth.get_current_user에서 사용)
+    - 항목마다 만료 시각이 다릅니다: min(토큰의 exp, 저장 시각 + max_ttl)
+    - 크기가 maxsize를 넘으면 가장 오래 사용되지 않은 토큰부터 제거합니다.
+    - 사용자가 변경/삭제되면 invalidate_user로 그 사용자의 토큰을 모두 제거합니다.
+    """
+
+    def __init__(self, maxsize: int = 10000, max_ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # token -> (expires_at, user)
+        self._tokens_by_user = {}   # user_id -> {token, ...}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > time.time():
+                    self._data.move_to_end(token)
+                    self.hits += 1
+                    return user
+                self._remove(token)
+            self.misses += 1
+            return None
+
+    def set(self, token, user, expires_at):
+        with self._lock:
+            self._remove(token)
+            self._data[token] = (min(expires_at, time.time() + self.max_ttl), user)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self):
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, token):
+        # 호출하는 쪽에서 self._lock을 잡고 있어야 합니다.
+        entry = self._data.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[1].id]
+
+
+def get_or_load(cache, key, loader):
+    """
+    캐시에 key가 있으면 그 값을, 없으면 loader()를 호출해 결과를 저장한 뒤 반환합니다.
+    loader 실행 중 무효화가 일어났다면 (오래된 값일 수 있으므로) 결과를 캐시에 저장하지 않습니다.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    generation = cache.generation()
+    value = loader()
+    cache.set(key, value, generation)
+    return value
+
+
+def _create_catalog_cache():
+    if not config.CATALOG_CACHE_ENABLED:
+        return None
+    if config.CATALOG_CACHE_BACKEND == "sqlite":
+        return SQLiteCache(config.CATALOG_CACHE_PATH, maxsize=config.CATALOG_CACHE_SIZE, ttl=config.CATALOG_CACHE_TTL)
+    return MemoryCache(maxsize=config.CATALOG_CACHE_SIZE, ttl=config.CATALOG_CACHE_TTL)
+
+
+# 애플리케이션 전체에서 공유하는 도서 목록 캐시 (비활성화하면 None)
+catalog_cache = _create_catalog_cache()
+metrics.register_cache("catalog", catalog_cache)
@@ -0,0 +1,151 @@
+# 파일: compression.py
+# 응답 압축 미들웨어입니다. (Accept-Encoding 협상)
+# - 클라이언트가 br을 허용하고 brotli 패키지가 설치되어 있으면 brotli, 아니면 gzip으로 압축합니다.
+# - minimum_size(LIBRARY_COMPRESSION_MIN_SIZE) 바이트보다 작은 응답은 압축하지 않습니다. (작은 응답은 압축 비용이 이득보다 큼)
+# - NDJSON 스트리밍 응답은 전송되는 조각(DB 배치)마다 flush 하며 압축하므로 스트리밍이 유지됩니다.
+# - SSE(text/event-stream)와 이미 인코딩된 응답은 그대로 보냅니다.
+# - 압축 여부가 Accept-Encoding에 따라 달라지므로 응답에 Vary: Accept-Encoding을 붙입니다.
+#   (GET /books의 ETag는 인코딩과 무관한 약한 ETag이므로 압축 여부와 관계없이 304 비교에 그대로 사용됩니다)
+# Starlette의 공개 API(MutableHeaders 등)만 사용합니다.
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli는 선택 의존성
+    brotli = None
+
+# 조각마다 바로 전달되어야 하는 응답 (압축하면 버퍼링되어 이벤트가 늦게 도착함)
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip 헤더 포함
+
+    def flush(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def flush(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def accepted_encodings(accept_encoding: str):
+    """Accept-Encoding 헤더에서 q=0이 아닌 인코딩 이름 집합을 반환합니다."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name)
+    return accepted
+
+
+class _Responder:
+    """
+    요청 하나의 응답을 압축해 보내는 send 래퍼입니다.
+    첫 body 조각을 받을 때까지 응답 시작(http.response.start)을 미뤄, 크기와 헤더를 보고 압축할지 정합니다.
+    encoder가 None이면(클라이언트가 압축을 허용하지 않음) Vary 헤더만 붙입니다.
+    """
+
+    def __init__(self, send, encoder, minimum_size: int):
+        self.send = send
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressing = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if self.start_message is None:
+            # 응답 시작을 이미 보냈거나 body가 아닌 메시지
+            if self.compressing and message["type"] == "http.response.body":
+                message = self._compress(message)
+            await self.send(message)
+            return
+
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(scope=start)
+        content_type = headers.get("content-type", "")
+        if "content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if message["type"] != "http.response.body" or self.encoder is None or (
+            not more_body and len(body) < self.minimum_size
+        ):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.compressing = True
+        headers["Content-Encoding"] = self.encoder.name
+        message = self._compress(message)
+        if more_body:
+            # 스트리밍 응답은 길이를 미리 알 수 없음 (chunked)
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(message["body"]))
+        await self.send(start)
+        await self.send(message)
+
+    def _compress(self, message):
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            return {**message, "body": self.encoder.flush(body)}
+        return {**message, "body": self.encoder.finish(body)}
+
+
+class CompressionMiddleware:
+    """br/gzip 중 클라이언트가 허용하는 방식으로 응답을 압축하는 ASGI 미들웨어입니다."""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder(self, accept_encoding: str):
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return BrotliEncoder(self.brotli_quality)
+        if "gzip" in accepted:
+            return GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoder = self._encoder(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _Responder(send, encoder, self.minimum_size))
@@ -0,0 +1,108 @@
+# 파일: config.py
+# 애플리케이션 설정을 한곳에 모아 둔 모듈입니다.
+# 모든 값은 환경 변수로 덮어쓸 수 있으며, 지정하지 않으면 개발용 기본값을 사용합니다.
+
+import os
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """환경 변수 값을 bool로 해석합니다. ("1", "true", "yes", "on" -> True)"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# --- 데이터베이스 설정 ---
+DATABASE_URL = os.getenv("LIBRARY_DATABASE_URL", "sqlite:///./library.db")
+# 워커 시작(lifespan) 시 스키마 버전을 확인하고 필요하면 생성/갱신할지 여부 (library_api/migrate.py)
+AUTO_MIGRATE = env_bool("LIBRARY_AUTO_MIGRATE", True)
+# "default": 엔진 하나 + SQLite 기본 설정, "production": WAL/PRAGMA 적용 + 쓰기 연결 1개와 읽기 전용 풀 분리
+DB_PROFILE = os.getenv("LIBRARY_DB_PROFILE", "default")
+DB_READ_POOL_SIZE = int(os.getenv("LIBRARY_DB_READ_POOL_SIZE", "8"))
+DB_READ_POOL_OVERFLOW = int(os.getenv("LIBRARY_DB_READ_POOL_OVERFLOW", "8"))
+# production 프로필에서 연결마다 적용하는 SQLite PRAGMA 값
+SQLITE_JOURNAL_MODE = os.getenv("LIBRARY_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("LIBRARY_SQLITE_SYNCHRONOUS", "NORMAL")        # WAL에서는 NORMAL도 손상 없이 안전
+SQLITE_MMAP_SIZE = int(os.getenv("LIBRARY_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 바이트
+SQLITE_CACHE_SIZE = int(os.getenv("LIBRARY_SQLITE_CACHE_SIZE", "-65536"))     # 음수는 KiB 단위 (64MiB)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("LIBRARY_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# --- 비동기 모드 설정 ---
+# True이면 핵심 엔드포인트가 async def로 동작하고, 비동기 엔진(aiosqlite)을 사용합니다.
+ASYNC_MODE = env_bool("LIBRARY_ASYNC_MODE")
+ASYNC_DATABASE_URL = os.getenv(
+    "LIBRARY_ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+)
+
+# --- 도서 목록 페이지네이션 설정 ---
+BOOKS_PAGE_SIZE = int(os.getenv("LIBRARY_BOOKS_PAGE_SIZE", "100"))          # limit 기본값
+BOOKS_MAX_PAGE_SIZE = int(os.getenv("LIBRARY_BOOKS_MAX_PAGE_SIZE", "1000"))  # limit 최댓값
+BOOKS_STREAM_BATCH_SIZE = int(os.getenv("LIBRARY_BOOKS_STREAM_BATCH_SIZE", "500"))  # NDJSON 스트리밍 시 한 번에 읽는 행 수
+BOOKS_BATCH_MAX_IDS = int(os.getenv("LIBRARY_BOOKS_BATCH_MAX_IDS", "500"))  # GET /books/batch 한 번에 조회할 수 있는 id 수
+
+# --- 내 대출 목록 페이지네이션 설정 ---
+LOANS_PAGE_SIZE = int(os.getenv("LIBRARY_LOANS_PAGE_SIZE", "50"))
+LOANS_MAX_PAGE_SIZE = int(os.getenv("LIBRARY_LOANS_MAX_PAGE_SIZE", "500"))
+LOANS_BATCH_MAX_SIZE = int(os.getenv("LIBRARY_LOANS_BATCH_MAX_SIZE", "50"))  # POST /loans/batch 한 번에 대출할 수 있는 책 수
+
+# --- 도서 목록 캐시 설정 (library_api/cache.py) ---
+CATALOG_CACHE_ENABLED = env_bool("LIBRARY_CATALOG_CACHE_ENABLED", True)
+CATALOG_CACHE_BACKEND = os.getenv("LIBRARY_CATALOG_CACHE_BACKEND", "memory")  # "memory" 또는 "sqlite"(워커 간 공유)
+CATALOG_CACHE_PATH = os.getenv("LIBRARY_CATALOG_CACHE_PATH", "./catalog_cache.db")
+CATALOG_CACHE_SIZE = int(os.getenv("LIBRARY_CATALOG_CACHE_SIZE", "1024"))  # 최대 항목 수
+CATALOG_CACHE_TTL = float(os.getenv("LIBRARY_CATALOG_CACHE_TTL", "30"))    # 초
+
+# --- 인증 사용자 캐시 설정 (auth.get_current_user) ---
+AUTH_CACHE_ENABLED = env_bool("LIBRARY_AUTH_CACHE_ENABLED", True)
+AUTH_CACHE_SIZE = int(os.getenv("LIBRARY_AUTH_CACHE_SIZE", "10000"))  # 최대 토큰 수
+# 토큰이 아직 유효하더라도 이 시간(초)이 지나면 DB에서 사용자를 다시 확인합니다.
+# (다른 워커에서 사용자가 변경/삭제된 경우 반영되기까지의 최대 지연 시간)
+AUTH_CACHE_TTL = float(os.getenv("LIBRARY_AUTH_CACHE_TTL", "300"))
+
+# --- 비밀번호 해싱 설정 (library_api/hashing.py) ---
+BCRYPT_ROUNDS = int(os.getenv("LIBRARY_BCRYPT_ROUNDS", "12"))        # bcrypt cost factor
+HASH_EXECUTOR = os.getenv("LIBRARY_HASH_EXECUTOR", "process")         # "process", "thread" 또는 "inline"
+HASH_WORKERS = int(os.getenv("LIBRARY_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_SIZE = int(os.getenv("LIBRARY_HASH_QUEUE_SIZE", "64"))    # 초과하면 503 응답
+
+# --- 쓰기 큐 설정 (library_api/writer.py) ---
+# True이면 서버 시작 시 쓰기 전용 스레드를 띄워, 회원가입/도서 등록·삭제/대출/반납을 모아서 commit 합니다.
+WRITE_QUEUE_ENABLED = env_bool("LIBRARY_WRITE_QUEUE_ENABLED", True)
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("LIBRARY_WRITE_QUEUE_MAX_BATCH", "64"))      # commit 한 번에 처리할 최대 작업 수
+WRITE_QUEUE_MAX_WAIT_MS = float(os.getenv("LIBRARY_WRITE_QUEUE_MAX_WAIT_MS", "0"))  # 배치를 모으려고 더 기다리는 시간
+WRITE_QUEUE_SIZE = int(os.getenv("LIBRARY_WRITE_QUEUE_SIZE", "1024"))              # 초과하면 503 응답
+
+# --- 반납된 대출 기록 보관 설정 (library_api/archive.py) ---
+LOAN_ARCHIVE_INTERVAL = float(os.getenv("LIBRARY_LOAN_ARCHIVE_INTERVAL", "300"))  # 백그라운드 실행 주기(초), 0이면 사용 안 함
+LOAN_ARCHIVE_BATCH_SIZE = int(os.getenv("LIBRARY_LOAN_ARCHIVE_BATCH_SIZE", "1000"))  # 트랜잭션당 옮기는 행 수
+LOAN_ARCHIVE_DELAY = float(os.getenv("LIBRARY_LOAN_ARCHIVE_DELAY", "0"))            # 반납 후 이 시간(초)이 지난 기록만 옮김
+
+# --- 대출 기록 내보내기 설정 (library_api/export.py) ---
+LOAN_PERIOD_DAYS = int(os.getenv("LIBRARY_LOAN_PERIOD_DAYS", "14"))        # 대출 기간(일), 지나면 연체
+EXPORT_BATCH_SIZE = int(os.getenv("LIBRARY_EXPORT_BATCH_SIZE", "1000"))    # DB에서 한 번에 가져오는 행 수 (yield_per)
+# GET /loans/export를 호출할 수 있는 사용자 이름 (쉼표로 구분, 비어 있으면 API로는 내보낼 수 없음)
+EXPORT_USERS = {name.strip() for name in os.getenv("LIBRARY_EXPORT_USERS", "").split(",") if name.strip()}
+
+# --- 대기열/알림 설정 (library_api/waitlist.py, library_api/events.py) ---
+WAITLIST_HOLD_SECONDS = float(os.getenv("LIBRARY_WAITLIST_HOLD_SECONDS", "900"))      # 차례가 된 대기자에게 책을 확보해 두는 시간
+WAITLIST_SWEEP_INTERVAL = float(os.getenv("LIBRARY_WAITLIST_SWEEP_INTERVAL", "5"))   # 만료 확보 정리/다른 워커 알림 확인 주기(초), 0이면 사용 안 함
+WAITLIST_HEARTBEAT_SECONDS = float(os.getenv("LIBRARY_WAITLIST_HEARTBEAT_SECONDS", "15"))  # 이벤트가 없을 때 연결 유지용 주석을 보내는 간격
+WAITLIST_EVENT_QUEUE_SIZE = int(os.getenv("LIBRARY_WAITLIST_EVENT_QUEUE_SIZE", "16"))  # 연결마다 보관하는 미전송 이벤트 수
+
+# --- 도서 대량 가져오기 설정 (library_api/bulk_import.py) ---
+IMPORT_BATCH_SIZE = int(os.getenv("LIBRARY_IMPORT_BATCH_SIZE", "1000"))          # 기본 배치 크기 (트랜잭션당 행 수)
+IMPORT_MAX_BATCH_SIZE = int(os.getenv("LIBRARY_IMPORT_MAX_BATCH_SIZE", "5000"))  # 요청에서 지정할 수 있는 최댓값
+
+# --- 응답 압축 설정 (library_api/compression.py) ---
+COMPRESSION_ENABLED = env_bool("LIBRARY_COMPRESSION_ENABLED", True)
+COMPRESSION_MIN_SIZE = int(os.getenv("LIBRARY_COMPRESSION_MIN_SIZE", "1024"))           # 이보다 작은 응답(바이트)은 압축 안 함
+COMPRESSION_GZIP_LEVEL = int(os.getenv("LIBRARY_COMPRESSION_GZIP_LEVEL", "6"))          # 1(빠름) ~ 9(작음)
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("LIBRARY_COMPRESSION_BROTLI_QUALITY", "4"))  # 0(빠름) ~ 11(작음)
+
+# --- 성능 계측 설정 (library_api/metrics.py) ---
+METRICS_ENABLED = env_bool("LIBRARY_METRICS_ENABLED", True)              # 미들웨어와 GET /metrics 등록 여부
+SERVER_TIMING_ENABLED = env_bool("LIBRARY_SERVER_TIMING_ENABLED", True)  # 응답에 Server-Timing 헤더 추가
+SLOW_REQUEST_MS = float(os.getenv("LIBRARY_SLOW_REQUEST_MS", "500"))     # 이 시간(ms) 이상 걸린 요청은 SQL과 함께 로그
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("LIBRARY_SLOW_REQUEST_MAX_STATEMENTS", "50"))  # 로그에 남기는 SQL 최대 개수
@@ -1,7 +1,10 @@
 # 파일: crud.py
 
-from sqlalchemy.orm import Session
-from . import models, schemas, auth
+import datetime
+
+from sqlalchemy import insert, select, union_all, update
+from sqlalchemy.orm import Session, joinedload
+from . import models, schemas, auth, cache, waitlist, writer
 
 # --- User CRUD ---
 def get_user(db: Session, user_id: int):
@@ -13,8 +16,10 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = auth.get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    # 이미 해싱된 비밀번호가 전달되면 그대로 사용합니다. (비동기 경로에서 해싱을 스레드로 넘긴 경우)
+    if hashed_password is None:
+        hashed_password = auth.get_password_hash(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -26,48 +31,323 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+def update_password_hash(db: Session, user_id: int, hashed_password: str):
+    # 로그인 시 해싱 설정(cost factor)이 바뀐 것이 확인되면 새 해시로 교체합니다.
+    # (로그인은 읽기 세션으로 사용자를 조회하므로, 쓰기 세션에서 다시 읽어 변경)
+    db_user = db.get(models.User, user_id)
+    db_user.hashed_password = hashed_password
+    db.commit()
+    return db_user
+
 # --- Book CRUD ---
 def get_book(db: Session, book_id: int):
     return db.query(models.Book).filter(models.Book.id == book_id).first()
 
-def get_books(db: Session, category: str = None, available: bool = None):
-    query = db.query(models.Book)
+def _filter_books(query, category: str = None, available: bool = None, after: int = None):
+    # ORM Query와 Core select 모두에 같은 조건을 적용합니다.
     if category:
         query = query.filter(models.Book.category == category)
     if available is not None and available:
         query = query.filter(models.Book.available_copies > 0)
+    # 키셋(keyset) 페이지네이션: OFFSET 대신 마지막으로 받은 id 이후부터 읽으므로 페이지 위치와 관계없이 비용이 일정합니다.
+    if after is not None:
+        query = query.filter(models.Book.id > after)
+    return query.order_by(models.Book.id)
+
+def get_books(db: Session, category: str = None, available: bool = None, after: int = None, limit: int = None):
+    query = _filter_books(db.query(models.Book), category=category, available=available, after=after)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
+# --- 읽기 전용 빠른 경로 ---
+# 목록 응답은 ORM 객체를 만들거나(identity map 등록) schemas로 다시 검증하지 않고,
+# Core select 결과 행을 응답 형태의 dict로 바로 변환합니다. (컬럼 타입은 DB 스키마가 보장)
+# 컬럼 순서는 schemas.Book/Loan의 필드 순서와 같게 두어, 기존 응답과 JSON이 바이트 단위로 동일합니다.
+BOOK_COLUMNS = (
+    models.Book.title, models.Book.author, models.Book.isbn, models.Book.category,
+    models.Book.total_copies, models.Book.id, models.Book.available_copies,
+)
+BOOK_KEYS = tuple(column.key for column in BOOK_COLUMNS)
+BOOK_COLUMN_BY_KEY = dict(zip(BOOK_KEYS, BOOK_COLUMNS))
+LOAN_COLUMNS = (
+    models.Loan.id, models.Loan.book_id, models.Loan.user_id, models.Loan.loan_date, models.Loan.return_date,
+)
+LOAN_KEYS = tuple(column.key for column in LOAN_COLUMNS)
+
+def get_book_rows(db: Session, category: str = None, available: bool = None, after: int = None, limit: int = None,
+                  fields=None):
+    # get_books와 같은 조건으로 조회하되 schemas.Book 형태의 dict 목록을 반환합니다.
+    # fields(BOOK_KEYS 중 일부, library_api/fields.py 참고)를 주면 그 컬럼만 SELECT 합니다.
+    keys = fields or BOOK_KEYS
+    stmt = _filter_books(select(*(BOOK_COLUMN_BY_KEY[key] for key in keys)),
+                         category=category, available=available, after=after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [dict(zip(keys, row)) for row in db.execute(stmt)]
+
+def get_book_rows_by_ids(db: Session, book_ids):
+    # 여러 책을 IN 쿼리 한 번으로 읽어 요청한 id 순서대로 반환합니다. (없는 id는 건너뜀)
+    rows = db.execute(select(*BOOK_COLUMNS).where(models.Book.id.in_(book_ids)))
+    by_id = {row.id: dict(zip(BOOK_KEYS, row)) for row in rows}
+    return [by_id[book_id] for book_id in book_ids if book_id in by_id]
+
+def iter_book_rows(db: Session, category: str = None, available: bool = None, after: int = None, batch_size: int = 500,
+                   fields=None):
+    # 조건에 맞는 모든 책을 batch_size 단위로 나누어 읽으며 dict로 하나씩 반환합니다. (NDJSON 스트리밍용, 세션에 객체가 쌓이지 않음)
+    while True:
+        batch = get_book_rows(db, category=category, available=available, after=after, limit=batch_size, fields=fields)
+        if not batch:
+            return
+        yield from batch
+        after = batch[-1]["id"]
+
+def get_books_cached(db: Session, category: str = None, available: bool = None, after: int = None, limit: int = None,
+                     version: int = None, fields=None):
+    # get_books의 캐시 버전입니다. 세션과 무관하게 재사용할 수 있도록 ORM 객체 대신 dict 목록을 저장/반환합니다.
+    # version(카탈로그 버전)을 주면 키에 포함되어, 다른 워커에서 일어난 변경 이전의 항목은 사용하지 않습니다.
+    def load():
+        return get_book_rows(db, category=category, available=available, after=after, limit=limit, fields=fields)
+
+    if cache.catalog_cache is None:
+        return load()
+    key = cache.make_key(category, available, after, limit, version, fields)
+    return cache.get_or_load(cache.catalog_cache, key, load)
+
+def invalidate_catalog(category: str):
+    # 해당 카테고리의 도서 목록 캐시를 비웁니다. (쓰기 작업이 commit된 뒤 writer.after_commit으로 호출)
+    if cache.catalog_cache is not None:
+        cache.catalog_cache.invalidate_category(category)
+
+def clear_catalog_cache():
+    # 여러 카테고리가 한꺼번에 바뀐 경우(대량 가져오기 등) 도서 목록 캐시 전체를 비웁니다.
+    if cache.catalog_cache is not None:
+        cache.catalog_cache.clear()
+
+# --- 카탈로그 버전 (GET /books의 ETag) ---
+# 도서 목록 응답에 영향을 주는 쓰기(도서 등록/삭제, 대출/반납, 대량 가져오기)는 commit 전에 버전을 올립니다.
+# 같은 트랜잭션에서 증가하므로, 다른 워커가 보더라도 버전이 같으면 목록도 같습니다.
+def get_catalog_version(db: Session) -> int:
+    return db.execute(select(models.CatalogVersion.version).where(models.CatalogVersion.id == 1)).scalar() or 0
+
+def bump_catalog_version(db: Session):
+    db.execute(
+        update(models.CatalogVersion)
+        .where(models.CatalogVersion.id == 1)
+        .values(version=models.CatalogVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
 def create_book(db: Session, book: schemas.BookCreate):
     db_book = models.Book(
         **book.dict(),
         available_copies=book.total_copies
     )
     db.add(db_book)
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_book)
+    writer.after_commit(db, invalidate_catalog, db_book.category)
     return db_book
 
 def delete_book(db: Session, book_id: int):
     db_book = db.query(models.Book).filter(models.Book.id == book_id).first()
     if db_book:
         db.delete(db_book)
+        bump_catalog_version(db)
         db.commit()
+        writer.after_commit(db, invalidate_catalog, db_book.category)
         return db_book
     return None
 
 # --- Loan CRUD ---
+def get_loan(db: Session, loan_id: int):
+    return db.query(models.Loan).filter(models.Loan.id == loan_id).first()
+
+def get_loan_any(db: Session, loan_id: int):
+    # 보관 테이블(loans_archive)로 옮겨진 반납 기록까지 찾습니다. (반납 실패 원인 확인용)
+    return get_loan(db, loan_id) or db.get(models.LoanArchive, loan_id)
+
 def create_loan(db: Session, book_id: int, user_id: int):
-    book = get_book(db, book_id)
-    if not book or book.available_copies <= 0:
-        return None  # 대출 불가
+    # 재고 확인과 차감을 조건부 UPDATE 한 문장으로 처리합니다.
+    # 읽고-계산하고-쓰는 방식과 달리, 마지막 한 권을 여러 요청이 동시에 빌리려 해도 재고가 음수가 되지 않습니다.
+    # 대기열에서 차례가 된 다른 사용자에게 확보된 부수는 빌려주지 않습니다. (library_api/waitlist.py)
+    reserved = db.execute(
+        update(models.Book)
+        .where(models.Book.id == book_id, models.Book.available_copies > waitlist.held_for_others(user_id))
+        .values(available_copies=models.Book.available_copies - 1)
+        .returning(models.Book.category)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if reserved is None:
+        db.rollback()
+        return None  # 대출 불가 (책이 없거나 재고 없음)
 
-    book.available_copies -= 1
     db_loan = models.Loan(book_id=book_id, user_id=user_id)
     db.add(db_loan)
+    bump_catalog_version(db)
     db.commit()
+    writer.after_commit(db, invalidate_catalog, reserved.category)
     db.refresh(db_loan)
     return db_loan
 
-def get_user_loans(db: Session, user_id: int):
-    return db.query(models.Loan).filter(models.Loan.user_id == user_id).all()
\ No newline at end of file
+def create_loans(db: Session, book_ids, user_id: int, all_or_nothing: bool = True):
+    """
+    여러 책을 한 트랜잭션에서 대출하고 (대출 목록, 실패 목록)을 반환합니다.
+    - 재고 차감은 create_loan과 같은 조건부 UPDATE를 WHERE id IN (...) 한 문장으로, 대출 기록은 INSERT 한 번으로 처리합니다.
+    - all_or_nothing=True이면 한 권이라도 실패할 때 전부 취소하고 빈 대출 목록을 반환합니다.
+    - 실패 목록의 항목: {"book_id": ..., "error": "not_found" 또는 "unavailable"}
+    - book_ids에는 중복이 없어야 합니다. (schemas.LoanBatchCreate에서 검증)
+    """
+    reserved = db.execute(
+        update(models.Book)
+        .where(models.Book.id.in_(book_ids), models.Book.available_copies > waitlist.held_for_others(user_id))
+        .values(available_copies=models.Book.available_copies - 1)
+        .returning(models.Book.id, models.Book.category)
+        .execution_options(synchronize_session=False)
+    ).all()
+    categories = {row.id: row.category for row in reserved}
+
+    failed = []
+    missing = [book_id for book_id in book_ids if book_id not in categories]
+    if missing:
+        # 실패한 책만 원인을 확인: 책이 없으면 not_found, 재고가 없으면 unavailable
+        existing = set(db.execute(select(models.Book.id).where(models.Book.id.in_(missing))).scalars())
+        failed = [{"book_id": book_id, "error": "unavailable" if book_id in existing else "not_found"}
+                  for book_id in missing]
+    if not categories or (failed and all_or_nothing):
+        db.rollback()
+        return [], failed
+
+    loan_ids = db.execute(
+        insert(models.Loan).returning(models.Loan.id),
+        [{"book_id": book_id, "user_id": user_id} for book_id in book_ids if book_id in categories],
+    ).scalars().all()
+    bump_catalog_version(db)
+    db.commit()
+    for category in set(categories.values()):
+        writer.after_commit(db, invalidate_catalog, category)
+    loans = (
+        db.query(models.Loan).options(joinedload(models.Loan.book))
+        .filter(models.Loan.id.in_(loan_ids)).order_by(models.Loan.id).all()
+    )
+    return loans, failed
+
+def create_loan_with_book(db: Session, book_id: int, user_id: int):
+    # 대출 응답에는 책 정보가 포함되므로, 세션이 닫힌 뒤(비동기 경로, 쓰기 큐)에도 직렬화할 수 있도록 미리 읽어 둡니다.
+    # (대출, 실패 원인)을 반환합니다. 실패 원인은 create_loans와 같은 "not_found" 또는 "unavailable"이며,
+    # 같은 작업 안에서 확인하므로 엔드포인트가 실패 원인을 찾으려고 쓰기 연결을 다시 잡지 않습니다.
+    loan = create_loan(db, book_id, user_id)
+    if loan is None:
+        return None, "not_found" if get_book(db, book_id) is None else "unavailable"
+    loan.book
+    return loan, None
+
+def return_loan(db: Session, loan_id: int, user_id: int):
+    # 대출과 같은 방식으로, 아직 반납되지 않은 본인 대출만 조건부 UPDATE로 반납 처리하고 재고를 1 늘립니다.
+    returned = db.execute(
+        update(models.Loan)
+        .where(models.Loan.id == loan_id, models.Loan.user_id == user_id, models.Loan.return_date.is_(None))
+        .values(return_date=datetime.datetime.utcnow())
+        .returning(models.Loan.book_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if returned is None:
+        db.rollback()
+        return None  # 반납 불가 (대출이 없거나 이미 반납됨)
+
+    restocked = db.execute(
+        update(models.Book)
+        .where(models.Book.id == returned.book_id)
+        .values(available_copies=models.Book.available_copies + 1)
+        .returning(models.Book.category, waitlist.has_waiters(returned.book_id).label("has_waiters"))
+        .execution_options(synchronize_session=False)
+    ).first()
+    # 대기자가 있을 때만 다음 대기자에게 한 권을 확보 (대기자가 없으면 추가 쿼리 없음)
+    granted = waitlist.promote(db, returned.book_id) if restocked is not None and restocked.has_waiters else []
+    bump_catalog_version(db)
+    db.commit()
+    if restocked is not None:
+        writer.after_commit(db, invalidate_catalog, restocked.category)
+    writer.after_commit(db, waitlist.notify, granted)
+    return get_loan(db, loan_id)
+
+def return_loan_with_book(db: Session, loan_id: int, user_id: int):
+    # (대출, 실패 원인)을 반환합니다. 실패 원인: 본인의 대출이 없으면 "not_found", 이미 반납되었으면 "returned"
+    loan = return_loan(db, loan_id, user_id)
+    if loan is None:
+        db_loan = get_loan_any(db, loan_id)
+        return None, "not_found" if db_loan is None or db_loan.user_id != user_id else "returned"
+    loan.book
+    return loan, None
+
+def _filter_user_loans(query, user_id: int, status: str = None, after: int = None):
+    query = query.filter(models.Loan.user_id == user_id)
+    # status: "active"(반납 전) 또는 "returned"(반납 완료), None이면 전체
+    if status == "active":
+        query = query.filter(models.Loan.return_date.is_(None))
+    elif status == "returned":
+        query = query.filter(models.Loan.return_date.is_not(None))
+    if after is not None:
+        query = query.filter(models.Loan.id > after)
+    return query.order_by(models.Loan.id)
+
+def get_user_loans(db: Session, user_id: int, status: str = None, after: int = None, limit: int = None):
+    # loans 테이블의 대출만 ORM 객체로 반환합니다. (보관 테이블까지 포함한 목록은 get_user_loan_rows)
+    # 응답에 책 정보가 포함되므로 joinedload로 대출과 책을 한 번의 쿼리로 함께 읽습니다. (대출마다 책을 따로 조회하는 N+1 방지)
+    query = _filter_user_loans(
+        db.query(models.Loan).options(joinedload(models.Loan.book)), user_id, status=status, after=after
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def _user_loan_rows_select(table, user_id: int, status: str = None, after: int = None, limit: int = None,
+                           keys=LOAN_KEYS):
+    # loans 또는 loans_archive 테이블에서 한 사용자의 대출 행을 id 순으로 고르는 select
+    c = table.c
+    stmt = select(*(c[key] for key in keys)).where(c.user_id == user_id)
+    if status == "active":
+        stmt = stmt.where(c.return_date.is_(None))
+    elif status == "returned":
+        stmt = stmt.where(c.return_date.is_not(None))
+    if after is not None:
+        stmt = stmt.where(c.id > after)
+    stmt = stmt.order_by(c.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def get_user_loan_rows(db: Session, user_id: int, status: str = None, after: int = None, limit: int = None,
+                       fields=None):
+    """
+    get_user_loans의 읽기 전용 빠른 경로: 대출과 책을 JOIN 한 번으로 읽어 schemas.Loan 형태의 dict 목록을 반환합니다.
+    - status="active"는 loans 테이블(부분 인덱스)만 조회합니다.
+    - 반납된 기록은 loans_archive로 옮겨졌을 수 있으므로 두 테이블을 각각 limit개까지 읽어 UNION ALL 합니다.
+    - fields=(대출 키, 책 키)를 주면 그 컬럼만 SELECT 하며, 책 키가 비어 있으면 응답에 book을 넣지 않습니다.
+      (JOIN은 유지하여 어떤 fields를 주더라도 같은 대출 행이 반환됨)
+    """
+    loan_keys, book_keys = fields or (LOAN_KEYS, BOOK_KEYS)
+    # 정렬/JOIN에 쓰이는 id, book_id는 서브쿼리에 항상 포함
+    inner_keys = tuple(key for key in LOAN_KEYS if key in loan_keys or key in ("id", "book_id"))
+    loans = _user_loan_rows_select(models.Loan.__table__, user_id, status, after, limit, keys=inner_keys)
+    if status != "active":
+        archived = _user_loan_rows_select(models.LoanArchive.__table__, user_id, status, after, limit, keys=inner_keys)
+        loans = union_all(select(loans.subquery()), select(archived.subquery()))
+    loans = loans.subquery()
+    stmt = (
+        select(*(loans.c[key] for key in loan_keys), *(BOOK_COLUMN_BY_KEY[key] for key in book_keys))
+        .select_from(loans)
+        .join(models.Book, models.Book.id == loans.c.book_id)
+        .order_by(loans.c.id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    split = len(loan_keys)
+    rows = []
+    for row in db.execute(stmt):
+        loan = dict(zip(loan_keys, row[:split]))
+        if book_keys:
+            loan["book"] = dict(zip(book_keys, row[split:]))
+        rows.append(loan)
+    return rows
@@ -1,27 +1,132 @@
 # 파일: database.py
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from . import config
+
 # SQLite 데이터베이스 파일 설정
-SQLALCHEMY_DATABASE_URL = "sqlite:///./library.db"
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+
+# --- 엔진 프로필 ---
+# default:    기존과 같은 엔진 하나 (롤백 저널, SQLite 기본 설정)
+# production: 연결할 때마다 WAL 등 PRAGMA를 적용하고,
+#             쓰기 전용 연결 1개(writer)와 읽기 전용 연결 풀(reader)을 분리합니다.
+#             WAL 모드에서는 읽기가 쓰기를 기다리지 않으므로, 쓰기는 연결 하나로 직렬화하고
+#             (SQLITE_BUSY 경합 대신 풀에서 순서대로 대기) 읽기는 여러 연결에서 동시에 처리합니다.
+def sqlite_pragmas(read_only: bool = False):
+    """production 프로필에서 새 연결마다 실행할 PRAGMA 목록을 반환합니다."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {config.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = {config.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE}",
+    ]
+    if read_only:
+        # 읽기 풀에서 실수로 쓰기가 실행되지 않도록 막음
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # journal_mode는 DB 파일에 저장되므로 writer에서 설정하면 모든 연결에 적용됨
+        pragmas.insert(0, f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def apply_pragmas(engine, pragmas):
+    # 풀이 새 DBAPI 연결을 만들 때마다 PRAGMA를 실행하는 이벤트를 등록합니다.
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _is_file_sqlite(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def read_only_url(url: str) -> str:
+    """sqlite:///path.db -> 같은 파일을 읽기 전용(mode=ro)으로 여는 URI 형식 URL"""
+    return f"sqlite:///file:{make_url(url).database}?mode=ro&uri=true"
+
+
+def create_engines(url: str, profile: str = "default"):
+    """
+    (writer, reader) 엔진 쌍을 만듭니다.
+    default 프로필이거나 파일 기반 SQLite가 아니면 두 값은 같은 엔진입니다.
+    """
+    connect_args = {"check_same_thread": False}
+    if profile != "production" or not _is_file_sqlite(url):
+        writer = create_engine(url, connect_args=connect_args)
+        return writer, writer
+
+    writer = create_engine(url, connect_args=connect_args, pool_size=1, max_overflow=0)
+    apply_pragmas(writer, sqlite_pragmas())
+    reader = create_engine(
+        read_only_url(url), connect_args=connect_args,
+        pool_size=config.DB_READ_POOL_SIZE, max_overflow=config.DB_READ_POOL_OVERFLOW,
+    )
+    apply_pragmas(reader, sqlite_pragmas(read_only=True))
+    return writer, reader
+
 
 # 데이터베이스 엔진 생성
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# engine: 쓰기(및 테이블 생성)용, read_engine: 읽기 전용 엔드포인트용
+engine, read_engine = create_engines(SQLALCHEMY_DATABASE_URL, config.DB_PROFILE)
 
 # 데이터베이스 세션을 위한 SessionLocal 클래스 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 읽기 전용 세션 (default 프로필에서는 SessionLocal과 같은 엔진을 사용)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# 비동기 모드에서만 비동기 엔진과 세션 팩토리를 생성합니다. (aiosqlite 필요)
+async_engine = None
+AsyncSessionLocal = None
+if config.ASYNC_MODE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(config.ASYNC_DATABASE_URL)
+    if config.DB_PROFILE == "production" and _is_file_sqlite(config.ASYNC_DATABASE_URL):
+        apply_pragmas(async_engine.sync_engine, sqlite_pragmas())
+    # commit 이후에도 반환된 객체의 속성을 추가 I/O 없이 읽을 수 있도록 expire_on_commit=False
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
 
 # SQLAlchemy 모델을 위한 기본 클래스
 Base = declarative_base()
 
+# 이미 존재하는 테이블에 나중에 추가된 인덱스를 생성하는 함수
+# (create_all은 없는 테이블만 만들기 때문에, 기존 DB 파일에는 새 인덱스가 생기지 않음)
+def create_missing_indexes(bind):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 # API에서 DB 세션을 얻기 위한 의존성 함수
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# 조회만 하는 엔드포인트에서 읽기 전용 세션을 얻기 위한 의존성 함수
+# (production 프로필에서는 writer 연결을 점유하지 않으므로 쓰기 요청과 동시에 처리됨)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# 비동기 엔드포인트에서 AsyncSession을 얻기 위한 의존성 함수
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
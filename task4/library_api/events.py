@@ -0,0 +1,70 @@
+# 파일: events.py
+# 프로세스 안에서 사용자별 이벤트를 전달하는 fan-out 허브입니다. (대기열 알림 SSE용, library_api/waitlist.py 참고)
+# - 연결(구독)마다 작은 asyncio.Queue 하나만 두고, 이벤트가 없는 동안에는 스레드나 DB 연결을 점유하지 않으므로
+#   이벤트 루프 하나로 수천 개의 유휴 연결을 유지할 수 있습니다.
+# - publish는 어느 스레드에서나 호출할 수 있습니다. (동기 엔드포인트의 스레드풀, 쓰기 큐 스레드 등)
+#   구독자가 없는 사용자에 대한 이벤트는 이벤트 루프로 넘기지 않고 바로 버립니다.
+# - 허브는 프로세스(워커)마다 하나이므로, 다른 워커에서 생긴 이벤트는 waitlist의 주기 작업이 DB에서 찾아 전달합니다.
+
+import asyncio
+
+from . import config
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class EventHub:
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._subscribers = {}  # user_id -> set(asyncio.Queue), 이벤트 루프 스레드에서만 변경
+        self._loop = None
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """현재 이벤트 루프에서 user_id의 이벤트를 받을 큐를 등록합니다. (연결이 끝나면 unsubscribe)"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def has_subscribers(self, user_id: int = None) -> bool:
+        if user_id is None:
+            return bool(self._subscribers)
+        return user_id in self._subscribers
+
+    def publish(self, user_id: int, event: dict):
+        loop = self._loop
+        if loop is None or user_id not in self._subscribers or loop.is_closed():
+            return
+        if _running_loop() is loop:
+            self._deliver(user_id, event)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._deliver, user_id, event)
+            except RuntimeError:  # 이벤트 루프가 그 사이 종료됨
+                pass
+
+    def _deliver(self, user_id: int, event: dict):
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                # 읽지 않는 연결 때문에 메모리가 늘지 않도록 가장 오래된 이벤트를 버림
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def stats(self):
+        return {"users": len(self._subscribers), "connections": sum(len(q) for q in self._subscribers.values())}
+
+
+hub = EventHub(config.WAITLIST_EVENT_QUEUE_SIZE)
@@ -0,0 +1,197 @@
+# 파일: export.py
+# 전체 대출 기록 내보내기(야간 보고서용)입니다.
+# 대출(loans + loans_archive)에 책과 사용자 정보를 JOIN 하여 CSV 또는 NDJSON으로 스트리밍합니다.
+# - 결과를 yield_per 단위로 나누어 읽고 바로 출력하므로, 내보내는 행 수와 관계없이 메모리 사용량이 일정합니다.
+# - 행을 내보내는 같은 루프에서 연체 요약(ExportSummary)을 집계합니다. (테이블을 다시 읽지 않음)
+# - 연체 기준: 대출일 + LOAN_PERIOD_DAYS 일이 반납 예정일이며,
+#   그때까지 반납되지 않았으면 연체(overdue), 예정일 이후에 반납되었으면 연체 반납(returned_late)으로 셉니다.
+#
+# 명령줄에서 실행할 수 있습니다. (task4 폴더에서)
+#   python -m library_api.export --format csv --from 2024-01-01 --to 2024-02-01 -o loans.csv
+
+import csv
+import datetime
+import io
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from . import config, models, responses
+
+EXPORT_COLUMNS = (
+    "loan_id", "loan_date", "due_date", "return_date", "status", "overdue_days",
+    "book_id", "title", "author", "isbn", "category",
+    "user_id", "username", "email",
+)
+
+
+class ExportSummary:
+    """내보내기 도중 함께 집계하는 대출/연체 요약입니다."""
+
+    def __init__(self):
+        self.loans = 0
+        self.active = 0
+        self.returned = 0
+        self.overdue = 0          # 반납 예정일이 지났는데 아직 대출 중
+        self.returned_late = 0    # 반납 예정일 이후에 반납됨
+        self.overdue_days = 0     # 위 두 경우의 연체 일수 합계
+        self.max_overdue_days = 0
+
+    def add(self, status: str, overdue_days: int):
+        self.loans += 1
+        if status in ("active", "overdue"):
+            self.active += 1
+        else:
+            self.returned += 1
+        if status == "overdue":
+            self.overdue += 1
+        elif status == "returned_late":
+            self.returned_late += 1
+        self.overdue_days += overdue_days
+        self.max_overdue_days = max(self.max_overdue_days, overdue_days)
+
+    def as_dict(self):
+        return {
+            "loans": self.loans, "active": self.active, "returned": self.returned,
+            "overdue": self.overdue, "returned_late": self.returned_late,
+            "overdue_days": self.overdue_days, "max_overdue_days": self.max_overdue_days,
+        }
+
+
+def _export_select(loan_from: datetime.datetime = None, loan_to: datetime.datetime = None):
+    # loans와 loans_archive를 한 문장(UNION ALL)으로 읽어, 내보내는 도중 보관 작업이 행을 옮겨도
+    # 같은 대출이 두 번 나오거나 빠지지 않도록 합니다. (정렬하지 않으므로 임시 정렬 공간도 쓰지 않음)
+    parts = []
+    for table in (models.Loan.__table__, models.LoanArchive.__table__):
+        c = table.c
+        part = select(c.id, c.loan_date, c.return_date, c.book_id, c.user_id)
+        if loan_from is not None:
+            part = part.where(c.loan_date >= loan_from)
+        if loan_to is not None:
+            part = part.where(c.loan_date < loan_to)
+        parts.append(part)
+    loans = union_all(*parts).subquery()
+    # 책/사용자가 삭제된 대출도 보고서에서 빠지지 않도록 LEFT OUTER JOIN
+    return (
+        select(loans.c.id, loans.c.loan_date, loans.c.return_date, loans.c.book_id,
+               models.Book.title, models.Book.author, models.Book.isbn, models.Book.category,
+               loans.c.user_id, models.User.username, models.User.email)
+        .select_from(loans)
+        .outerjoin(models.Book, models.Book.id == loans.c.book_id)
+        .outerjoin(models.User, models.User.id == loans.c.user_id)
+    )
+
+
+def iter_loans(db: Session, loan_from: datetime.datetime = None, loan_to: datetime.datetime = None,
+               summary: ExportSummary = None, now: datetime.datetime = None, batch_size: int = None):
+    """
+    loan_from <= loan_date < loan_to 인 대출을 EXPORT_COLUMNS 키의 dict로 하나씩 반환합니다. (순서는 정해지지 않음)
+    summary를 주면 반환하는 행마다 연체 요약을 갱신합니다.
+    """
+    now = now or datetime.datetime.utcnow()
+    period = datetime.timedelta(days=config.LOAN_PERIOD_DAYS)
+    batch_size = batch_size or config.EXPORT_BATCH_SIZE
+    result = db.execute(_export_select(loan_from, loan_to), execution_options={"yield_per": batch_size})
+    for (loan_id, loan_date, return_date, book_id, title, author, isbn, category,
+         user_id, username, email) in result:
+        due_date = loan_date + period if loan_date is not None else None
+        overdue_days = 0
+        if return_date is None:
+            status = "active"
+            if due_date is not None and now > due_date:
+                status = "overdue"
+                overdue_days = (now - due_date).days
+        else:
+            status = "returned"
+            if due_date is not None and return_date > due_date:
+                status = "returned_late"
+                overdue_days = (return_date - due_date).days
+        if summary is not None:
+            summary.add(status, overdue_days)
+        yield {
+            "loan_id": loan_id, "loan_date": loan_date, "due_date": due_date, "return_date": return_date,
+            "status": status, "overdue_days": overdue_days,
+            "book_id": book_id, "title": title, "author": author, "isbn": isbn, "category": category,
+            "user_id": user_id, "username": username, "email": email,
+        }
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def iter_csv(rows, summary: ExportSummary = None, chunk_rows: int = 1000):
+    """
+    dict 행을 CSV 텍스트 조각으로 변환합니다. (헤더 포함, chunk_rows행마다 한 조각)
+    summary를 주면 대출 행 뒤에 빈 줄 하나와 요약 표(헤더 행 + 값 행)를 붙입니다.
+    (대출 행만 읽는 CSV 도구가 깨지지 않도록 API에서는 summary=true로 요청한 경우에만 사용)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(row[key]) for key in EXPORT_COLUMNS])
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if summary is not None:
+        values = summary.as_dict()
+        buffer.write("\n")
+        writer.writerow(values.keys())
+        writer.writerow(values.values())
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows, summary: ExportSummary = None, chunk_rows: int = 1000):
+    """dict 행을 NDJSON 바이트 조각으로 변환합니다. summary를 주면 마지막 줄에 {"summary": {...}}를 붙입니다."""
+    chunk = []
+    for row in rows:
+        chunk.append(responses.dumps(row))
+        if len(chunk) == chunk_rows:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if summary is not None:
+        chunk.append(responses.dumps({"summary": summary.as_dict()}))
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    from . import migrate
+    from .database import ReadSessionLocal, engine
+
+    def parse_date(value):
+        return datetime.datetime.fromisoformat(value)
+
+    parser = argparse.ArgumentParser(description="대출 기록(책/사용자 정보 포함) 내보내기")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--from", dest="loan_from", type=parse_date, help="대출일 시작 (포함, 예: 2024-01-01)")
+    parser.add_argument("--to", dest="loan_to", type=parse_date, help="대출일 끝 (제외)")
+    parser.add_argument("-o", "--output", help="출력 파일 (기본값: 표준 출력)")
+    args = parser.parse_args()
+
+    migrate.ensure_schema(engine)
+    summary = ExportSummary()
+    session = ReadSessionLocal()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        rows = iter_loans(session, args.loan_from, args.loan_to, summary=summary)
+        if args.format == "csv":
+            for text in iter_csv(rows):
+                out.write(text.encode("utf-8"))
+        else:
+            for data in iter_ndjson(rows, summary=summary):
+                out.write(data)
+    finally:
+        session.close()
+        if args.output:
+            out.close()
+    # 요약은 데이터와 섞이지 않도록 표준 에러로 출력
+    print(json.dumps(summary.as_dict(), ensure_ascii=False), file=sys.stderr)
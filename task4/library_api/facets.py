@@ -0,0 +1,97 @@
+# 파일: facets.py
+# 카테고리별 도서 수/보유 부수/대출 가능 부수 집계(facet)입니다.
+# category_stats 테이블(models.CategoryStats)을 books 테이블의 트리거로 갱신하므로,
+# 도서 등록/삭제, 대출/반납, 대량 가져오기 등 어느 경로로 books가 바뀌어도 같은 트랜잭션 안에서 집계가 맞춰집니다.
+# 조회는 카테고리 수만큼의 행만 읽으므로 카탈로그 크기와 무관합니다.
+#
+# 집계가 어긋났다고 의심되면 처음부터 다시 계산할 수 있습니다. (task4 폴더에서)
+#   python -m library_api.facets --rebuild
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+
+STATS_TABLE = "category_stats"
+
+# 카테고리가 없는(NULL) 책은 빈 문자열 카테고리로 집계합니다. (NULL은 기본 키 충돌로 합쳐지지 않으므로)
+_ADD_NEW = f"""
+    INSERT INTO {STATS_TABLE} (category, titles, total_copies, available_copies)
+    VALUES (IFNULL(new.category, ''), 1, IFNULL(new.total_copies, 0), IFNULL(new.available_copies, 0))
+    ON CONFLICT (category) DO UPDATE SET
+        titles = titles + 1,
+        total_copies = total_copies + excluded.total_copies,
+        available_copies = available_copies + excluded.available_copies;
+"""
+_REMOVE_OLD = f"""
+    UPDATE {STATS_TABLE} SET
+        titles = titles - 1,
+        total_copies = total_copies - IFNULL(old.total_copies, 0),
+        available_copies = available_copies - IFNULL(old.available_copies, 0)
+    WHERE category = IFNULL(old.category, '');
+    DELETE FROM {STATS_TABLE} WHERE category = IFNULL(old.category, '') AND titles <= 0;
+"""
+
+_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS books_stats_ai AFTER INSERT ON books BEGIN {_ADD_NEW} END",
+    f"CREATE TRIGGER IF NOT EXISTS books_stats_ad AFTER DELETE ON books BEGIN {_REMOVE_OLD} END",
+    f"""CREATE TRIGGER IF NOT EXISTS books_stats_au
+        AFTER UPDATE OF category, total_copies, available_copies ON books BEGIN {_REMOVE_OLD} {_ADD_NEW} END""",
+]
+
+_REBUILD = [
+    f"DELETE FROM {STATS_TABLE}",
+    f"""
+    INSERT INTO {STATS_TABLE} (category, titles, total_copies, available_copies)
+    SELECT IFNULL(category, ''), COUNT(*), IFNULL(SUM(total_copies), 0), IFNULL(SUM(available_copies), 0)
+    FROM books GROUP BY IFNULL(category, '')
+    """,
+]
+
+
+def init_facets(conn):
+    """
+    집계 트리거를 생성합니다. (이미 있으면 아무 작업도 하지 않음)
+    트리거를 처음 만드는 경우에는 기존 books 데이터로 집계를 채웁니다.
+    conn은 Connection이며, 트랜잭션은 호출하는 쪽(migrate.ensure_schema)에서 관리합니다.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    is_new = conn.exec_driver_sql(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'books_stats_ai'"
+    ).scalar() == 0
+    for ddl in _DDL:
+        conn.exec_driver_sql(ddl)
+    if is_new:
+        rebuild(conn)
+
+
+def rebuild(conn):
+    """books 테이블 전체를 다시 집계해 category_stats를 채웁니다."""
+    for sql in _REBUILD:
+        conn.exec_driver_sql(sql)
+
+
+def get_facets(db: Session):
+    """카테고리 이름순 집계 목록을 반환합니다."""
+    stmt = select(models.CategoryStats).order_by(models.CategoryStats.category)
+    return db.execute(stmt).scalars().all()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from . import migrate
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="카테고리별 도서 집계(category_stats) 관리")
+    parser.add_argument("--rebuild", action="store_true", help="books 테이블에서 처음부터 다시 계산")
+    args = parser.parse_args()
+
+    migrate.ensure_schema(engine)
+    if args.rebuild:
+        with engine.begin() as conn:
+            rebuild(conn)
+    with engine.connect() as conn:
+        for row in conn.exec_driver_sql(f"SELECT * FROM {STATS_TABLE} ORDER BY category"):
+            print(*row, sep="\t")
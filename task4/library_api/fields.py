@@ -0,0 +1,64 @@
+# 파일: fields.py
+# 목록 응답의 필드 선택(?fields=...) 처리입니다. (GET /books, GET /users/me/loans)
+# 요청한 필드만 SQL SELECT에 포함하므로, 큰 목록을 받는 클라이언트(모바일 등)의 전송량과 파싱 비용이 줄어듭니다.
+# - 예시: /books?fields=id,title,available_copies
+#         /users/me/loans?fields=id,loan_date,book.title  (book은 책 전체, book.<필드>는 책의 일부 필드)
+# - 키셋 페이지네이션 커서로 쓰이므로 id는 항상 포함됩니다.
+# - 응답의 필드 순서는 요청 순서와 관계없이 schemas.Book/Loan의 필드 순서를 따릅니다.
+
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+from . import crud
+
+_FIELDS_DESCRIPTION = "쉼표로 구분한 응답 필드 목록 (생략하면 전체)"
+
+
+def _split(value: str):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def parse_book_fields(value: Optional[str]):
+    """fields 값을 crud.BOOK_KEYS 순서의 키 튜플로 변환합니다. (생략하면 None = 전체)"""
+    if value is None:
+        return None
+    names = _split(value)
+    unknown = names - set(crud.BOOK_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    names.add("id")
+    return tuple(key for key in crud.BOOK_KEYS if key in names)
+
+
+def parse_loan_fields(value: Optional[str]):
+    """fields 값을 (대출 키 튜플, 책 키 튜플)로 변환합니다. 책 필드를 요청하지 않으면 책 키 튜플은 비어 있습니다."""
+    if value is None:
+        return None
+    names = _split(value)
+    book_names = {name[len("book."):] for name in names if name.startswith("book.")}
+    if "book" in names:
+        book_names = set(crud.BOOK_KEYS)
+    loan_names = {name for name in names if name != "book" and not name.startswith("book.")}
+    unknown = ({name for name in loan_names if name not in crud.LOAN_KEYS}
+               | {f"book.{name}" for name in book_names if name not in crud.BOOK_KEYS})
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    loan_names.add("id")
+    return (tuple(key for key in crud.LOAN_KEYS if key in loan_names),
+            tuple(key for key in crud.BOOK_KEYS if key in book_names))
+
+
+# --- FastAPI 의존성 (동기/비동기 라우터 공용) ---
+def book_fields(fields: Optional[str] = Query(None, description=_FIELDS_DESCRIPTION)):
+    try:
+        return parse_book_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def loan_fields(fields: Optional[str] = Query(None, description=_FIELDS_DESCRIPTION)):
+    try:
+        return parse_loan_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
@@ -0,0 +1,135 @@
+# 파일: hashing.py
+# 비밀번호 해싱(bcrypt) 작업을 요청 처리 스레드 밖에서 실행하는 모듈입니다.
+# bcrypt는 한 번에 100ms 이상 CPU를 사용하므로, 로그인이 몰리면 API 서버의 스레드풀이 해싱에 묶여
+# 다른 엔드포인트까지 느려집니다. 이를 막기 위해
+# - 전용 프로세스 풀(기본값)에서 해싱/검증을 실행하고,
+# - 대기 작업 수를 제한하여 가득 차면 즉시 HashingBusyError를 발생시킵니다. (API에서는 503으로 응답)
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import config, metrics
+
+# --- 비밀번호 해싱 설정 ---
+# bcrypt__rounds(cost factor)를 바꾸면 기존 해시는 needs_update()가 True가 되어, 다음 로그인 때 새 cost로 다시 해싱됩니다.
+# passlib/bcrypt는 임포트 비용이 크므로 처음 해싱할 때 불러옵니다. (워커 시작 시간 단축)
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+                _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.BCRYPT_ROUNDS)
+    return _pwd_context
+
+
+class HashingBusyError(Exception):
+    """해싱 작업 대기열이 가득 찼을 때 발생합니다."""
+
+
+# --- 워커에서 실행되는 함수 (프로세스 풀로 전달되므로 모듈 최상위에 정의) ---
+def _hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(password, hashed_password)
+
+
+class HashingExecutor:
+    """
+    해싱 작업을 실행하는 풀과 대기열 크기 제한(backpressure)을 묶은 클래스입니다.
+    - mode="process": 별도 프로세스에서 실행 (GIL과 API 스레드풀 모두에서 분리)
+    - mode="thread":  별도 스레드 풀에서 실행
+    - mode="inline":  호출한 스레드에서 바로 실행 (테스트/디버깅용)
+    """
+
+    def __init__(self, mode: str = "process", workers: int = 2, queue_size: int = 64):
+        self.mode = mode
+        self.workers = workers
+        # 실행 중(workers) + 대기 중(queue_size)인 작업 수의 상한
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        # 풀은 처음 사용할 때 생성합니다. (서버 시작 시간을 늘리지 않고, 해싱이 없는 워커는 프로세스를 만들지 않음)
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.mode == "process":
+                        # fork는 쓰기 큐/보관/대기열 스레드가 잡고 있던 잠금까지 복사하므로, 깨끗한 서버 프로세스에서 워커를 만듦
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver"))
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+        return self._pool
+
+    def submit(self, fn, *args) -> Future:
+        if self.mode == "inline":
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusyError("password hashing queue is full")
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+executor = HashingExecutor(config.HASH_EXECUTOR, config.HASH_WORKERS, config.HASH_QUEUE_SIZE)
+
+
+# --- 동기 API (crud/스크립트에서 사용: 결과가 나올 때까지 현재 스레드가 대기) ---
+# 엔드포인트에서는 비동기 API를 사용합니다. def 엔드포인트에서 기다리면 스레드풀(기본 40개)이 먼저 가득 차서
+# 대기열 제한(503)에 닿기 전에 다른 요청까지 막힙니다.
+# 소요 시간(대기열에서 기다린 시간 포함)은 metrics에 기록되어 /metrics와 Server-Timing 헤더에 나타납니다.
+def hash_password(password: str) -> str:
+    start = time.perf_counter()
+    try:
+        return executor.submit(_hash, password).result()
+    finally:
+        metrics.observe_hash("hash", time.perf_counter() - start)
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    start = time.perf_counter()
+    try:
+        return executor.submit(_verify, password, hashed_password).result()
+    finally:
+        metrics.observe_hash("verify", time.perf_counter() - start)
+
+
+# --- 비동기 API (async def 엔드포인트에서 사용: 이벤트 루프를 막지 않음) ---
+async def hash_password_async(password: str) -> str:
+    start = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(executor.submit(_hash, password))
+    finally:
+        metrics.observe_hash("hash", time.perf_counter() - start)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    start = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(executor.submit(_verify, password, hashed_password))
+    finally:
+        metrics.observe_hash("verify", time.perf_counter() - start)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    # 현재 설정(cost factor 등)과 다른 방식으로 만들어진 해시인지 확인합니다.
+    return get_pwd_context().needs_update(hashed_password)
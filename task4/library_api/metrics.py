@@ -0,0 +1,293 @@
+# 파일: metrics.py
+# 요청 단위 성능 계측(instrumentation) 모듈입니다.
+# - MetricsMiddleware: 라우트/메서드/상태 코드별 응답 시간 히스토그램을 기록하고,
+#   응답에 Server-Timing 헤더(app, db, hash 소요 시간)를 붙이며, 느린 요청은 실행된 SQL과 함께 로그로 남깁니다.
+# - SQLAlchemy 엔진 이벤트로 요청마다 쿼리 수와 DB 시간을 집계합니다. (모든 엔진에 적용)
+# - hashing.py가 bcrypt 해싱/검증 시간을 observe_hash로 기록합니다.
+# - writer.py(쓰기 큐)가 commit 한 번에 묶인 작업 수와 처리 결과를 기록합니다.
+#   쓰기 스레드에서 실행된 SQL과 commit 시간은 작업을 넣은 요청의 DB 시간/쿼리 수에 포함됩니다.
+# - render()는 위 값과 캐시 히트율을 Prometheus 텍스트 형식으로 반환합니다. (GET /metrics)
+
+import contextvars
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import config
+
+logger = logging.getLogger("library_api.slow_requests")
+
+# 히스토그램 버킷 경계 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """레이블 조합마다 버킷별 누적 개수, 합계, 개수를 저장하는 Prometheus 방식 히스토그램입니다."""
+
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # 레이블 튜플 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            for key, series in items:
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels(key, le=_format_value(bound))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(key)} {series[-1]}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """레이블 조합별 누적 값을 저장하는 Prometheus 방식 카운터입니다."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(key)} {_format_value(value)}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(key, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# --- 수집하는 지표 ---
+request_duration = Histogram(
+    "library_http_request_duration_seconds", "HTTP request latency by route, method and status.", LATENCY_BUCKETS)
+request_queries = Histogram(
+    "library_http_request_db_queries", "SQL statements executed per HTTP request.", QUERY_COUNT_BUCKETS)
+request_db_time = Histogram(
+    "library_http_request_db_seconds", "Time spent in SQL statements per HTTP request.", LATENCY_BUCKETS)
+db_queries_total = Counter("library_db_queries_total", "SQL statements executed.")
+db_time_total = Counter("library_db_seconds_total", "Time spent in SQL statements.")
+hash_duration = Histogram(
+    "library_password_hash_seconds", "Password hashing/verification time (including queueing).", LATENCY_BUCKETS)
+write_batch_size = Histogram(
+    "library_write_batch_size", "Write operations committed together by the write queue.", BATCH_SIZE_BUCKETS)
+write_ops_total = Counter("library_write_ops_total", "Write operations processed by the write queue.")
+
+_REGISTRY = [request_duration, request_queries, request_db_time, db_queries_total, db_time_total, hash_duration,
+             write_batch_size, write_ops_total]
+
+# 히트율을 내보낼 캐시 (이름 -> stats()가 hits/misses/size를 반환하는 객체)
+_caches = {}
+
+
+def register_cache(name: str, cache_obj):
+    if cache_obj is not None:
+        _caches[name] = cache_obj
+
+
+def render() -> str:
+    """모든 지표를 Prometheus 텍스트 노출 형식(text/plain; version=0.0.4)으로 반환합니다."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    for kind, help_text in (("hits", "Cache lookups that returned a value."),
+                            ("misses", "Cache lookups that found nothing.")):
+        lines.append(f"# HELP library_cache_{kind}_total {help_text}")
+        lines.append(f"# TYPE library_cache_{kind}_total counter")
+        for name, cache_obj in sorted(_caches.items()):
+            lines.append(f'library_cache_{kind}_total{{cache="{name}"}} {cache_obj.stats()[kind]}')
+    lines.append("# HELP library_cache_entries Entries currently stored in the cache.")
+    lines.append("# TYPE library_cache_entries gauge")
+    for name, cache_obj in sorted(_caches.items()):
+        lines.append(f'library_cache_entries{{cache="{name}"}} {cache_obj.stats()["size"]}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    # 테스트에서 지표를 초기화할 때 사용합니다.
+    for metric in _REGISTRY:
+        metric.clear()
+
+
+# --- 요청 단위 집계 ---
+class RequestTimings:
+    """한 요청 동안 실행된 SQL 문과 DB/해싱 시간을 모읍니다."""
+
+    __slots__ = ("queries", "db_time", "hash_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.hash_time = 0.0
+        self.statements = []
+
+
+# 현재 요청의 RequestTimings (요청 밖에서는 None)
+# def 엔드포인트는 스레드풀에서 실행되지만 contextvars가 복사되므로 같은 객체를 가리킵니다.
+_current = contextvars.ContextVar("library_request_timings", default=None)
+
+
+def current_timings():
+    return _current.get()
+
+
+def bind_timings(timings):
+    """
+    이 스레드에서 실행되는 SQL을 timings(다른 스레드에서 처리 중인 요청)에 집계하도록 하고, reset_timings에 넘길 토큰을 반환합니다.
+    쓰기 큐가 작업을 실행하는 동안 요청 스레드는 결과를 기다리므로 같은 객체를 동시에 고치지 않습니다.
+    """
+    return _current.set(timings)
+
+
+def reset_timings(token):
+    _current.reset(token)
+
+
+def observe_hash(operation: str, seconds: float):
+    hash_duration.observe(seconds, op=operation)
+    timings = _current.get()
+    if timings is not None:
+        timings.hash_time += seconds
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("library_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["library_query_start"].pop()
+    db_queries_total.inc()
+    db_time_total.inc(elapsed)
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db_time += elapsed
+        if len(timings.statements) < config.SLOW_REQUEST_MAX_STATEMENTS:
+            timings.statements.append((elapsed, statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # 실패한 문장은 after_cursor_execute가 호출되지 않으므로 시작 시각만 제거
+    if context.connection is not None:
+        starts = context.connection.info.get("library_query_start")
+        if starts:
+            starts.pop()
+
+
+class MetricsMiddleware:
+    """
+    요청마다 RequestTimings를 만들어 응답 시간/쿼리 수/DB 시간을 기록하는 ASGI 미들웨어입니다.
+    라우트 레이블은 경로 템플릿(/loans/{loan_id}/return)을 사용하여 지표 개수가 늘어나지 않도록 합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+        event_stream = False
+
+        async def send_with_timing(message):
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                event_stream = any(key == b"content-type" and value.startswith(b"text/event-stream")
+                                   for key, value in message.get("headers", []))
+                if config.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - start).encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            labels = {
+                "route": getattr(route, "path", "unmatched"),
+                "method": scope["method"],
+                "status": str(status_code),
+            }
+            request_queries.observe(timings.queries, route=labels["route"], method=labels["method"])
+            request_db_time.observe(timings.db_time, route=labels["route"], method=labels["method"])
+            # SSE 연결은 원래 오래 열려 있으므로 응답 시간 지표와 느린 요청 로그에서 제외
+            if not event_stream:
+                request_duration.observe(elapsed, **labels)
+            if not event_stream and elapsed * 1000 >= config.SLOW_REQUEST_MS:
+                _log_slow_request(scope, labels, elapsed, timings)
+
+
+def _server_timing(timings: RequestTimings, elapsed: float) -> str:
+    # 예: app;dur=12.3, db;dur=4.1;desc="3 queries", hash;dur=0.0
+    return (f"app;dur={elapsed * 1000:.1f}, "
+            f"db;dur={timings.db_time * 1000:.1f};desc=\"{timings.queries} queries\", "
+            f"hash;dur={timings.hash_time * 1000:.1f}")
+
+
+def _log_slow_request(scope, labels, elapsed: float, timings: RequestTimings):
+    lines = [
+        f"slow request: {labels['method']} {scope['path']} -> {labels['status']} "
+        f"{elapsed * 1000:.1f}ms (db {timings.db_time * 1000:.1f}ms / {timings.queries} queries, "
+        f"hash {timings.hash_time * 1000:.1f}ms)"
+    ]
+    for query_time, statement in timings.statements:
+        lines.append(f"  [{query_time * 1000:.1f}ms] {' '.join(statement.split())}")
+    if timings.queries > len(timings.statements):
+        lines.append(f"  ... {timings.queries - len(timings.statements)} more statements")
+    logger.warning("\n".join(lines))
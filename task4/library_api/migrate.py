@@ -0,0 +1,71 @@
+# 파일: migrate.py
+# 데이터베이스 스키마 생성/갱신(마이그레이션) 단계입니다.
+# 예전에는 main.py를 임포트할 때마다 create_all과 인덱스/FTS 생성을 실행해, 워커 프로세스마다 스키마 조회 비용을 치르고
+# 여러 워커가 동시에 DDL을 실행하며 충돌할 수 있었습니다.
+# 이제는 DB 파일의 PRAGMA user_version에 스키마 버전을 기록해 두고,
+# - 버전이 최신이면 PRAGMA 한 번만 읽고 끝내며,
+# - 아니면 쓰기 잠금(BEGIN IMMEDIATE)을 잡은 뒤 한 프로세스만 DDL을 실행합니다.
+#
+# 운영에서는 워커를 띄우기 전에 한 번 실행하고 LIBRARY_AUTO_MIGRATE=false 로 워커 시작 시 확인을 끌 수 있습니다.
+#   python -m library_api.migrate
+
+import logging
+
+from . import facets, models, search, waitlist
+from .database import create_missing_indexes
+
+logger = logging.getLogger("library_api.migrate")
+
+# models.py나 search.py의 테이블/인덱스를 바꾸면 이 값을 1 올립니다.
+SCHEMA_VERSION = 4
+
+
+def _schema_version(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def _apply_schema(conn):
+    # create_all은 없는 테이블만 만들고, 기존 테이블에 나중에 추가된 인덱스는 create_missing_indexes가 만듭니다.
+    models.Base.metadata.create_all(bind=conn)
+    create_missing_indexes(conn)
+    # 카탈로그 버전은 항상 한 행만 존재 (crud.bump_catalog_version이 UPDATE만 하므로 미리 생성)
+    conn.exec_driver_sql("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
+    # 도서 제목/저자 전문 검색용 FTS5 인덱스 (library_api/search.py 참고)
+    search.init_search_index(conn)
+    # 카테고리별 집계 트리거 (library_api/facets.py 참고)
+    facets.init_facets(conn)
+    # 대출/도서 삭제 시 대기 항목을 지우는 트리거 (library_api/waitlist.py 참고)
+    waitlist.init_waitlist(conn)
+
+
+def ensure_schema(engine) -> bool:
+    """스키마가 최신이 아니면 생성/갱신하고 True를, 이미 최신이면 아무것도 하지 않고 False를 반환합니다."""
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            _apply_schema(conn)
+        return True
+
+    with engine.connect() as conn:
+        if _schema_version(conn) == SCHEMA_VERSION:
+            return False
+        # 다른 워커가 동시에 시작해도 한 번에 한 프로세스만 DDL을 실행하도록 쓰기 잠금을 먼저 잡음
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            if _schema_version(conn) == SCHEMA_VERSION:
+                conn.exec_driver_sql("COMMIT")
+                return False
+            _apply_schema(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.exec_driver_sql("COMMIT")
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+    logger.info("database schema updated to version %d", SCHEMA_VERSION)
+    return True
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    updated = ensure_schema(engine)
+    print(f"schema version {SCHEMA_VERSION}: {'updated' if updated else 'already up to date'}")
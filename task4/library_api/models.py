@@ -1,6 +1,6 @@
 # 파일: models.py
 
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, DateTime, text
 from sqlalchemy.orm import relationship
 from .database import Base
 import datetime
@@ -40,4 +40,76 @@ class Loan(Base):
     return_date = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="loans")
-    book = relationship("Book", back_populates="loans")
\ No newline at end of file
+    book = relationship("Book", back_populates="loans")
+
+    __table_args__ = (
+        # 사용자별 대출 목록을 대출/반납 상태(return_date)로 걸러 조회할 때 사용하는 복합 인덱스
+        Index("ix_loans_user_id_return_date", "user_id", "return_date"),
+        # 반납 전 대출만 담는 부분 인덱스: 반납된 기록이 아무리 많아도 크기가 대출 중인 건수에 비례
+        Index("ix_loans_active_user_id", "user_id", "id", sqlite_where=text("return_date IS NULL")),
+    )
+
+
+class LoanArchive(Base):
+    """
+    반납이 끝난 대출 기록 보관 테이블입니다.
+    archive.archive_returned_loans가 loans에서 반납된 행을 배치 단위로 옮겨 오므로,
+    loans 테이블은 대출 중인 행과 최근 반납된 행만 남아 작게 유지됩니다. (id는 원래 loans.id 그대로)
+    """
+    __tablename__ = "loans_archive"
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    loan_date = Column(DateTime)
+    return_date = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_loans_archive_user_id_id", "user_id", "id"),
+    )
+
+class CategoryStats(Base):
+    """
+    카테고리별 도서 집계 테이블입니다. (GET /books/facets)
+    books 테이블의 트리거(library_api/facets.py)가 INSERT/UPDATE/DELETE와 같은 트랜잭션에서 값을 갱신합니다.
+    """
+    __tablename__ = "category_stats"
+
+    category = Column(String, primary_key=True)
+    titles = Column(Integer, nullable=False, default=0)            # 책 종류 수
+    total_copies = Column(Integer, nullable=False, default=0)      # 전체 보유 부수
+    available_copies = Column(Integer, nullable=False, default=0)  # 대출 가능 부수
+
+
+class CatalogVersion(Base):
+    """
+    도서 목록이 바뀔 때마다 1씩 증가하는 카탈로그 버전입니다. (행 하나, id=1)
+    GET /books의 ETag에 사용되어, 클라이언트가 보낸 If-None-Match와 비교만으로 304를 응답할 수 있습니다.
+    crud.py의 쓰기 함수가 변경과 같은 트랜잭션에서 증가시킵니다.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class WaitlistEntry(Base):
+    """
+    대출할 수 없는 책의 대기열입니다. (library_api/waitlist.py)
+    같은 책의 대기자는 id(등록 순서) 순으로 차례가 오며, 차례가 된 대기자에게는 hold_until까지 한 권이 확보(hold)됩니다.
+    확보된 동안에는 다른 사용자가 그 한 권을 빌릴 수 없고, 대기자가 책을 빌리면 트리거가 항목을 지웁니다.
+    """
+    __tablename__ = "waitlist"
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    hold_until = Column(DateTime, nullable=True)  # 차례가 되기 전에는 NULL
+
+    __table_args__ = (
+        # 한 사용자는 같은 책을 한 번만 기다리며, 책별 대기자 조회에도 사용
+        Index("ix_waitlist_book_id_user_id", "book_id", "user_id", unique=True),
+        # 만료된 확보를 찾는 부분 인덱스 (확보된 항목만 담김)
+        Index("ix_waitlist_hold_until", "hold_until", sqlite_where=text("hold_until IS NOT NULL")),
+    )
@@ -0,0 +1,69 @@
+# 파일: responses.py
+# 목록 엔드포인트용 빠른 JSON 응답입니다.
+# crud의 읽기 전용 경로(get_book_rows 등)가 이미 응답 형태의 dict를 만들어 주므로,
+# response_model 검증을 다시 거치지 않고 orjson으로 바로 직렬화합니다.
+# orjson이 설치되어 있지 않으면 표준 json 모듈을 사용합니다.
+# 또한 카탈로그 버전 기반 ETag/If-None-Match(304) 처리를 제공합니다.
+
+import datetime
+import hashlib
+import json
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson은 선택 의존성
+    orjson = None
+
+
+def _default(value):
+    # 표준 json 모듈이 처리하지 못하는 값(대출 일시 등)을 Pydantic과 같은 ISO 8601 문자열로 변환
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """content를 JSON 바이트로 직렬화합니다."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """dict/list를 검증 없이 바로 직렬화하는 JSONResponse입니다."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# --- 조건부 요청 (ETag / If-None-Match) ---
+def make_etag(version: int, *query) -> str:
+    """
+    카탈로그 버전과 쿼리 조건으로 약한(weak) ETag를 만듭니다.
+    같은 버전에서 같은 조건의 응답은 내용이 같으므로, 응답 본문을 만들지 않고도 ETag를 계산할 수 있습니다.
+    압축 미들웨어가 같은 내용을 identity/gzip/br 중 하나로 보내므로, 바이트 단위 일치를 뜻하는 강한 ETag 대신 W/를 붙입니다.
+    """
+    digest = hashlib.sha1(repr(query).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 헤더 값(쉼표로 구분된 목록 또는 *)에 etag가 포함되는지 약한 비교(W/ 무시)로 확인합니다."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return _opaque_tag(etag) in (_opaque_tag(tag) for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """본문 없는 304 응답입니다."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
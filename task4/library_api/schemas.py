@@ -1,9 +1,11 @@
 # 파일: schemas.py
 
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Optional
 import datetime
 
+from . import config
+
 # --- Book Schemas ---
 class BookBase(BaseModel):
     title: str
@@ -22,6 +24,30 @@ class Book(BookBase):
     class Config:
         from_attributes = True
 
+class CategoryFacet(BaseModel):
+    category: str
+    titles: int             # 책 종류 수
+    total_copies: int
+    available_copies: int
+
+    class Config:
+        from_attributes = True
+
+# --- Book Import Schemas ---
+class BookImportError(BaseModel):
+    row: int                    # 파일의 행 번호 (CSV는 헤더가 1행)
+    isbn: Optional[str] = None
+    error: str
+
+class BookImportReport(BaseModel):
+    processed: int = 0          # 읽은 데이터 행 수
+    inserted: int = 0
+    updated: int = 0            # on_conflict=upsert 로 갱신된 행 수
+    skipped: int = 0            # on_conflict=skip 으로 건너뛴 행 수
+    failed: int = 0             # 검증에 실패한 행 수
+    errors: List[BookImportError] = []
+    errors_truncated: bool = False
+
 # --- User Schemas ---
 class UserBase(BaseModel):
     username: str
@@ -56,6 +82,34 @@ class Loan(BaseModel):
     class Config:
         from_attributes = True
 
+class LoanBatchCreate(BaseModel):
+    book_ids: List[int] = Field(..., min_length=1, max_length=config.LOANS_BATCH_MAX_SIZE)
+    # True: 한 권이라도 대출할 수 없으면 전부 취소, False: 가능한 책만 대출
+    all_or_nothing: bool = True
+
+    @field_validator("book_ids")
+    @classmethod
+    def no_duplicates(cls, book_ids):
+        # 한 번의 UPDATE ... WHERE id IN (...)으로 처리하므로 같은 책은 한 번만 지정할 수 있습니다.
+        if len(set(book_ids)) != len(book_ids):
+            raise ValueError("book_ids must not contain duplicates")
+        return book_ids
+
+class LoanBatchFailure(BaseModel):
+    book_id: int
+    error: str  # "not_found" 또는 "unavailable"
+
+class LoanBatchResult(BaseModel):
+    loans: List[Loan]
+    failed: List[LoanBatchFailure] = []
+
+# --- Waitlist Schemas ---
+class WaitlistEntry(BaseModel):
+    book_id: int
+    position: int  # 같은 책의 대기자 중 순서 (1부터)
+    created_at: datetime.datetime
+    hold_until: Optional[datetime.datetime] = None  # 차례가 되어 책이 확보된 경우 이 시각까지 대출 가능
+
 
 # --- Token Schemas ---
 class Token(BaseModel):
@@ -63,4 +117,5 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    username: Optional[str] = None
\ No newline at end of file
+    username: Optional[str] = None
+    exp: Optional[int] = None  # 토큰 만료 시각 (Unix timestamp)
\ No newline at end of file
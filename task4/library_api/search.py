@@ -0,0 +1,85 @@
+# 파일: search.py
+# 도서 제목/저자 전문 검색(Full-Text Search) 기능입니다.
+# SQLite FTS5 가상 테이블(books_fts)을 books 테이블의 외부 콘텐츠 인덱스로 사용하고,
+# 트리거로 books의 INSERT/UPDATE/DELETE를 인덱스에 자동 반영합니다.
+
+import re
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+FTS_TABLE = "books_fts"
+
+# prefix='2 3': 2~3글자 접두어 인덱스를 미리 만들어 두어 "pyth*" 같은 접두어 검색도 인덱스로 처리합니다.
+_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author ON books BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO {FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+]
+
+# 순위 계산(bm25) 시 제목 일치를 저자 일치보다 높게 평가합니다.
+_SEARCH_SQL = text(f"""
+    SELECT books.* FROM {FTS_TABLE}
+    JOIN books ON books.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH :query
+    ORDER BY bm25({FTS_TABLE}, 10.0, 5.0)
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def init_search_index(conn):
+    """
+    FTS5 인덱스와 동기화 트리거를 생성합니다. (이미 있으면 아무 작업도 하지 않음)
+    인덱스를 처음 만드는 경우에는 기존 books 데이터로 인덱스를 채웁니다.
+    conn은 Connection이며, 트랜잭션은 호출하는 쪽(migrate.ensure_schema)에서 관리합니다.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    is_new = not inspect(conn).has_table(FTS_TABLE)
+    for ddl in _DDL:
+        conn.exec_driver_sql(ddl)
+    if is_new:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def build_match_query(q: str) -> str:
+    """
+    사용자 입력을 FTS5 MATCH 구문으로 변환합니다.
+    - 단어마다 큰따옴표로 감싸 FTS 연산자(AND, OR, NEAR, * 등)로 해석되지 않도록 하고,
+    - 모든 단어에 접두어 검색(*)을 적용합니다. 예: 'pyth prog' -> '"pyth"* "prog"*'
+    단어가 없으면 빈 문자열을 반환합니다.
+    """
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_books(db: Session, q: str, limit: int = 20, offset: int = 0):
+    """제목/저자에서 q를 검색해 관련도 순으로 정렬된 Book 목록을 반환합니다."""
+    match = build_match_query(q)
+    if not match:
+        return []
+    stmt = select(models.Book).from_statement(_SEARCH_SQL)
+    return db.execute(stmt, {"query": match, "limit": limit, "offset": offset}).scalars().all()
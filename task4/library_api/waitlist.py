@@ -0,0 +1,247 @@
+# 파일: waitlist.py
+# 도서 대기열(waitlist)과 반납 알림입니다.
+# 대출할 수 없는 책을 기다리는 클라이언트가 GET /books를 반복 호출(polling)하는 대신,
+# 대기열에 등록하고 GET /waitlist/events(SSE) 연결 하나로 차례가 왔다는 알림을 받습니다.
+# - 공정성(FIFO): 반납으로 한 권이 생기면 그 책의 대기자 중 가장 먼저 등록한 사람에게 WAITLIST_HOLD_SECONDS 동안 확보(hold)합니다.
+#   확보된 한 권은 crud.create_loan의 조건부 UPDATE가 다른 사용자에게 빌려주지 않으므로, 알림을 받고 늦게 도착해도 빼앗기지 않습니다.
+# - 확보된 대기자가 책을 빌리면 loans 트리거가 대기 항목을 지우고, 시간 안에 빌리지 않으면 주기 작업이 항목을 지운 뒤 다음 대기자에게 넘깁니다.
+# - 알림은 commit 뒤에(writer.after_commit) 프로세스 안의 허브(library_api/events.py)로 보냅니다.
+#   다른 워커에서 확보된 경우는 주기 작업이 DB에서 새 확보를 찾아 이 워커의 연결로 전달합니다. (최대 WAITLIST_SWEEP_INTERVAL초 지연)
+
+import datetime
+import logging
+import threading
+
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import config, events, models, writer
+
+logger = logging.getLogger("library_api.waitlist")
+
+Entry = models.WaitlistEntry
+
+
+class BookAvailableError(Exception):
+    """지금 빌릴 수 있는 책의 대기열에 등록하려 할 때 발생합니다. (API에서는 400으로 응답)"""
+
+# 대기자가 책을 빌리거나 책이 삭제되면 대기 항목을 지우는 트리거
+# (대출은 crud.create_loan/create_loans 등 여러 경로에서 생기므로 DB에서 처리)
+_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS loans_waitlist_ai AFTER INSERT ON loans BEGIN
+        DELETE FROM waitlist WHERE book_id = new.book_id AND user_id = new.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_waitlist_ad AFTER DELETE ON books BEGIN
+        DELETE FROM waitlist WHERE book_id = old.id;
+    END""",
+]
+
+
+def init_waitlist(conn):
+    """대기열 트리거를 생성합니다. (트랜잭션은 호출하는 쪽(migrate.ensure_schema)에서 관리)"""
+    if conn.dialect.name != "sqlite":
+        return
+    for ddl in _DDL:
+        conn.exec_driver_sql(ddl)
+
+
+def _utcnow():
+    return datetime.datetime.utcnow()
+
+
+# --- crud에서 사용하는 조건 ---
+def held_for_others(user_id: int, now: datetime.datetime = None):
+    """
+    books.id 행에 대해, user_id가 아닌 대기자에게 확보된 부수를 세는 상관 서브쿼리입니다.
+    crud.create_loan은 available_copies가 이 값보다 클 때만 대출합니다.
+    """
+    now = now or _utcnow()
+    return (
+        select(func.count()).select_from(Entry)
+        .where(Entry.book_id == models.Book.id, Entry.hold_until > now, Entry.user_id != user_id)
+        .scalar_subquery()
+    )
+
+
+def has_waiters(book_id: int):
+    """book_id에 아직 차례가 오지 않은 대기자가 있는지 나타내는 EXISTS 서브쿼리입니다. (반납 시 RETURNING에 사용)"""
+    return exists().where(Entry.book_id == book_id, Entry.hold_until.is_(None))
+
+
+# --- 대기열 변경 (알림은 commit 뒤 writer.after_commit으로 notify) ---
+def promote(db: Session, book_id: int, now: datetime.datetime = None):
+    """
+    book_id의 남은 부수만큼 차례가 오지 않은 대기자를 등록 순서대로 확보 상태로 바꾸고,
+    알림에 쓸 확보 목록({"id", "user_id", "book_id", "hold_until"})을 반환합니다.
+    """
+    now = now or _utcnow()
+    # 만료된 확보는 대기를 포기한 것으로 보고 먼저 지움
+    db.execute(
+        delete(Entry).where(Entry.book_id == book_id, Entry.hold_until <= now)
+        .execution_options(synchronize_session=False)
+    )
+    available = select(models.Book.available_copies).where(models.Book.id == book_id).scalar_subquery()
+    held = (
+        select(func.count()).select_from(Entry)
+        .where(Entry.book_id == book_id, Entry.hold_until > now)
+        .scalar_subquery()
+    )
+    next_ids = (
+        select(Entry.id).where(Entry.book_id == book_id, Entry.hold_until.is_(None))
+        .order_by(Entry.id).limit(func.max(available - held, 0))
+    )
+    hold_until = now + datetime.timedelta(seconds=config.WAITLIST_HOLD_SECONDS)
+    granted = db.execute(
+        update(Entry).where(Entry.id.in_(next_ids)).values(hold_until=hold_until)
+        .returning(Entry.id, Entry.user_id, Entry.book_id, Entry.hold_until)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return [dict(row._mapping) for row in granted]
+
+
+def join(db: Session, book_id: int, user_id: int):
+    """
+    book_id의 대기열에 등록하고 get_entry 형태의 항목을 반환합니다. (이미 등록되어 있으면 그대로, 책이 없으면 None)
+    남은 부수가 없거나 모두 다른 대기자에게 확보된 경우에만 등록할 수 있습니다.
+    user_id가 빌릴 수 있는 부수가 있으면 BookAvailableError를 발생시킵니다. (대기 등록으로 책을 미리 잡아 두지 못하도록)
+    """
+    entry = get_entry(db, book_id, user_id)
+    if entry is not None:
+        return entry
+    borrowable = db.execute(
+        select(models.Book.available_copies > held_for_others(user_id)).where(models.Book.id == book_id)
+    ).scalar()
+    if borrowable is None:
+        return None
+    if borrowable:
+        raise BookAvailableError(f"book {book_id} is available")
+    db.execute(
+        insert(Entry).values(book_id=book_id, user_id=user_id, created_at=_utcnow())
+        .prefix_with("OR IGNORE")
+    )
+    db.commit()
+    return get_entry(db, book_id, user_id)
+
+
+def leave(db: Session, book_id: int, user_id: int) -> bool:
+    """대기열에서 빠집니다. 확보된 책이 있었다면 다음 대기자에게 넘깁니다. (등록되어 있지 않았으면 False)"""
+    removed = db.execute(
+        delete(Entry).where(Entry.book_id == book_id, Entry.user_id == user_id)
+        .returning(Entry.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if removed is None:
+        db.rollback()
+        return False
+    granted = promote(db, book_id)
+    db.commit()
+    writer.after_commit(db, notify, granted)
+    return True
+
+
+def expire_holds(db: Session, now: datetime.datetime = None):
+    """만료된 확보를 지우고 해당 책의 다음 대기자에게 넘깁니다. 새로 확보된 목록을 반환합니다."""
+    now = now or _utcnow()
+    book_ids = db.execute(
+        delete(Entry).where(Entry.hold_until <= now)
+        .returning(Entry.book_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    granted = []
+    for book_id in sorted(set(book_ids)):
+        granted.extend(promote(db, book_id, now))
+    db.commit()
+    writer.after_commit(db, notify, granted)
+    return granted
+
+
+# --- 조회 ---
+def _position():
+    earlier = Entry.__table__.alias("earlier")
+    return (
+        select(func.count()).select_from(earlier)
+        .where(earlier.c.book_id == Entry.book_id, earlier.c.id <= Entry.id)
+        .scalar_subquery()
+    )
+
+
+def _entries_select():
+    return select(Entry.book_id, _position().label("position"), Entry.created_at, Entry.hold_until)
+
+
+def get_entry(db: Session, book_id: int, user_id: int):
+    row = db.execute(_entries_select().where(Entry.book_id == book_id, Entry.user_id == user_id)).first()
+    return dict(row._mapping) if row is not None else None
+
+
+def get_user_entries(db: Session, user_id: int):
+    """사용자의 대기 항목을 등록 순서대로 반환합니다. (schemas.WaitlistEntry 형태의 dict)"""
+    stmt = _entries_select().where(Entry.user_id == user_id).order_by(Entry.id)
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def get_user_holds(db: Session, user_id: int, now: datetime.datetime = None):
+    """사용자에게 현재 확보된 항목을 알림 형태로 반환합니다. (SSE 연결 시 놓친 알림을 보내는 데 사용)"""
+    now = now or _utcnow()
+    stmt = (
+        select(Entry.id, Entry.user_id, Entry.book_id, Entry.hold_until)
+        .where(Entry.user_id == user_id, Entry.hold_until > now)
+        .order_by(Entry.id)
+    )
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def get_holds_since(db: Session, hold_until: datetime.datetime):
+    """hold_until이 주어진 시각보다 늦은(그 뒤에 확보된) 항목을 반환합니다. (다른 워커에서 확보된 알림 전달용)"""
+    stmt = (
+        select(Entry.id, Entry.user_id, Entry.book_id, Entry.hold_until)
+        .where(Entry.hold_until > hold_until)
+        .order_by(Entry.hold_until)
+    )
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+# --- 알림 ---
+def notify(granted):
+    for hold in granted:
+        events.hub.publish(hold["user_id"], {"event": "hold", **hold})
+
+
+def start_background_sweeper(session_factory, read_session_factory=None, interval: float = None) -> threading.Thread:
+    """
+    interval초마다 만료된 확보를 정리하고, 이 워커에 연결된 사용자에게 다른 워커에서 확보된 알림을 전달하는 데몬 스레드를 시작합니다.
+    """
+    interval = config.WAITLIST_SWEEP_INTERVAL if interval is None else interval
+    read_session_factory = read_session_factory or session_factory
+    stop = threading.Event()
+
+    def run():
+        last_seen = _utcnow() + datetime.timedelta(seconds=config.WAITLIST_HOLD_SECONDS)
+        while not stop.wait(interval):
+            db = session_factory()
+            try:
+                # 만료 정리는 쓰기이므로 쓰기 큐(실행 중이면)를 거침
+                writer.run(db, expire_holds)
+            except Exception:
+                logger.exception("waitlist sweep failed")
+            finally:
+                db.close()
+            if not events.hub.has_subscribers():
+                last_seen = _utcnow() + datetime.timedelta(seconds=config.WAITLIST_HOLD_SECONDS)
+                continue
+            db = read_session_factory()
+            try:
+                holds = get_holds_since(db, last_seen)
+                # 이 워커가 이미 보낸 알림도 다시 전달될 수 있으므로 클라이언트는 이벤트 id로 중복을 거름
+                notify(holds)
+                if holds:
+                    last_seen = holds[-1]["hold_until"]
+            except Exception:
+                logger.exception("waitlist relay failed")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=run, name="waitlist-sweeper", daemon=True)
+    thread.stop_event = stop  # set() 하면 다음 주기에 종료
+    thread.start()
+    return thread
@@ -0,0 +1,214 @@
+# 파일: writer.py
+# 쓰기 작업을 모아서 처리하는 쓰기 큐(group commit)입니다.
+# SQLite는 한 번에 하나의 쓰기 트랜잭션만 허용하므로, 요청마다 따로 commit 하면
+# 동시 쓰기가 잠금을 기다리며 줄을 서고(commit마다 fsync), 대기가 길어지면 "database is locked" 오류가 납니다.
+# 이 모듈은
+# - 쓰기 전용 스레드 하나가 대기열에 쌓인 작업을 꺼내 한 트랜잭션(BEGIN IMMEDIATE)에서 차례로 실행하고,
+# - 작업마다 SAVEPOINT를 두어 실패한 작업만 되돌린 뒤,
+# - 배치 전체를 commit 한 번으로 저장하고 각 호출자의 Future에 결과나 예외를 전달합니다.
+# crud의 쓰기 함수는 그대로 사용합니다. (세션이 SAVEPOINT에 연결되어 있어 함수 안의 commit/rollback은 SAVEPOINT 단위로 동작)
+# 그래서 함수 안의 commit 뒤에 바로 캐시를 비우거나 알림을 보내면 안 되고, after_commit으로 등록해 배치 commit 뒤에 실행합니다.
+#
+# 서버 시작(lifespan) 시 LIBRARY_WRITE_QUEUE_ENABLED가 true이면 시작되며,
+# 큐가 실행 중이 아니면 run/run_async는 요청의 세션으로 바로 실행합니다.
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy.orm import Session
+
+from . import config, metrics
+
+logger = logging.getLogger("library_api.writer")
+
+# 쓰기 큐의 작업 세션에서 after_commit 콜백 목록을 보관하는 Session.info 키
+_CALLBACKS = "library_api.writer.after_commit"
+
+
+class WriteQueueFullError(Exception):
+    """쓰기 대기열이 가득 찼을 때 발생합니다. (API에서는 503으로 응답)"""
+
+
+class _Operation:
+    __slots__ = ("fn", "args", "kwargs", "future", "timings")
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        # 작업을 넣은 요청의 계측 (쓰기 스레드에서 실행한 SQL도 요청의 Server-Timing에 포함되도록)
+        self.timings = metrics.current_timings()
+
+
+class WriteQueue:
+    """
+    쓰기 작업 대기열과 이를 처리하는 스레드입니다.
+    - submit(fn, *args): fn(session, *args)를 대기열에 넣고 Future를 반환합니다.
+    - max_batch: 한 트랜잭션에서 처리할 최대 작업 수
+    - max_wait: 첫 작업을 꺼낸 뒤 다른 작업을 더 기다리는 시간(초). 0이면 이미 쌓여 있는 작업만 함께 처리합니다.
+      (앞 배치를 commit 하는 동안 들어온 작업이 다음 배치로 모이므로, 부하가 높을수록 배치가 커짐)
+    """
+
+    def __init__(self, engine, max_batch: int = 64, max_wait: float = 0.0, queue_size: int = 1024):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        # 이미 대기열에 들어간 작업은 모두 처리한 뒤 종료합니다.
+        self._stopping = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        if self._stopping:
+            raise RuntimeError("write queue is stopped")
+        op = _Operation(fn, args, kwargs)
+        try:
+            self._queue.put_nowait(op)
+        except queue.Full:
+            raise WriteQueueFullError("write queue is full") from None
+        return op.future
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                op = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op is None:
+                # 종료 신호는 현재 배치를 처리한 다음에 반영
+                self._queue.put(None)
+                break
+            batch.append(op)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._apply(batch)
+            except Exception:
+                logger.exception("write batch of %d operations failed", len(batch))
+
+    def _apply(self, batch):
+        results = []
+        callbacks = []
+        try:
+            with self.engine.connect() as conn:
+                # 배치를 시작할 때 쓰기 잠금을 잡아, 중간에 다른 프로세스와 잠금을 다투지 않도록 함
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                for op in batch:
+                    op_callbacks = []
+                    db = Session(bind=conn, autoflush=False, join_transaction_mode="create_savepoint",
+                                 info={_CALLBACKS: op_callbacks})
+                    token = metrics.bind_timings(op.timings)
+                    try:
+                        results.append((True, op.fn(db, *op.args, **op.kwargs)))
+                        callbacks.extend(op_callbacks)  # 실패한 작업의 콜백은 버림
+                    except Exception as exc:
+                        results.append((False, exc))
+                    finally:
+                        db.close()  # 끝나지 않은 SAVEPOINT는 되돌림
+                        metrics.reset_timings(token)
+                commit_start = time.perf_counter()
+                conn.commit()
+                commit_time = time.perf_counter() - commit_start
+        except Exception as exc:
+            # BEGIN/commit 자체가 실패하면 배치의 모든 작업이 저장되지 않았으므로 모두 실패로 알림
+            for op in batch:
+                op.future.set_exception(exc)
+            metrics.write_ops_total.inc(len(batch), status="error")
+            raise
+
+        # 응답보다 먼저 캐시가 비워지도록, Future를 완료하기 전에 실행
+        for fn, args in callbacks:
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("after_commit callback %r failed", fn)
+
+        metrics.write_batch_size.observe(len(batch))
+        for op, (ok, value) in zip(batch, results):
+            if op.timings is not None:
+                # 배치의 모든 작업이 commit(fsync)을 기다렸으므로 각 요청의 DB 시간에 더함
+                op.timings.db_time += commit_time
+            if ok:
+                op.future.set_result(value)
+            else:
+                op.future.set_exception(value)
+            metrics.write_ops_total.inc(status="ok" if ok else "error")
+
+    def stats(self):
+        return {"queued": self._queue.qsize()}
+
+
+# 실행 중인 쓰기 큐 (start/stop으로 관리, 없으면 None)
+write_queue = None
+
+
+def start(engine) -> WriteQueue:
+    global write_queue
+    write_queue = WriteQueue(
+        engine, max_batch=config.WRITE_QUEUE_MAX_BATCH, max_wait=config.WRITE_QUEUE_MAX_WAIT_MS / 1000,
+        queue_size=config.WRITE_QUEUE_SIZE,
+    ).start()
+    return write_queue
+
+
+def stop():
+    global write_queue
+    if write_queue is not None:
+        write_queue.stop()
+        write_queue = None
+
+
+def after_commit(db: Session, fn, *args):
+    """
+    db의 변경이 실제로 저장된 뒤에 fn(*args)를 실행합니다. (캐시 무효화, 대기열 알림 등, db.commit() 다음에 호출)
+    쓰기 큐의 작업 세션이면 배치 commit이 성공한 뒤에 실행하고, 배치나 작업이 실패하면 실행하지 않습니다.
+    그 밖의 세션은 이미 commit 되었으므로 바로 실행합니다.
+    """
+    callbacks = db.info.get(_CALLBACKS)
+    if callbacks is None:
+        fn(*args)
+    else:
+        callbacks.append((fn, args))
+
+
+# --- 엔드포인트/async_crud에서 사용하는 함수 ---
+# fn은 crud의 쓰기 함수처럼 세션을 첫 번째 인자로 받습니다.
+# 반환값은 다른 세션(쓰기 스레드)에서 만들어지므로, 응답에 필요한 관계(대출의 책 정보 등)는 fn 안에서 미리 읽어야 합니다.
+def run(db: Session, fn, *args, **kwargs):
+    if write_queue is None:
+        return fn(db, *args, **kwargs)
+    return write_queue.submit(fn, *args, **kwargs).result()
+
+
+async def run_async(db, fn, *args, **kwargs):
+    # db는 AsyncSession (큐가 없을 때 run_sync로 실행)
+    if write_queue is None:
+        return await db.run_sync(fn, *args, **kwargs)
+    return await asyncio.wrap_future(write_queue.submit(fn, *args, **kwargs))
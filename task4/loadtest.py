@@ -0,0 +1,282 @@
+# 파일: loadtest.py
+# test_api.py와 같은 시나리오(회원가입 -> 로그인 -> 도서 추가/검색 -> 대출 -> 내 대출 목록)를
+# 여러 가상 사용자가 동시에 실행하는 부하 테스트 스크립트입니다.
+# 엔드포인트별 처리량(req/s)과 지연 시간(p50/p95/p99)을 측정해 출력하고, JSON 파일로 저장할 수 있습니다.
+#
+# 사용 예시 (task4 폴더에서)
+#   서버 없이 같은 프로세스에서 실행:  python loadtest.py --users 50 --duration 30 --output before.json
+#   실행 중인 서버에 요청:             python loadtest.py --url http://localhost:8000 --users 50
+#   요청 비율 변경:                    python loadtest.py --mix list_books=50,search=30,borrow=20
+#   두 결과 비교:                      python loadtest.py --compare before.json after.json
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+
+import httpx
+
+# 가상 사용자가 반복하는 동작과 기본 비율(가중치)
+DEFAULT_MIX = {
+    "list_books": 40,   # GET /books?category=...&available=true
+    "search": 20,       # GET /books/search?q=...
+    "borrow": 15,       # POST /loans
+    "list_loans": 15,   # GET /users/me/loans
+    "add_book": 5,      # POST /books
+    "return": 5,        # POST /loans/{id}/return
+}
+
+CATEGORIES = ["Programming", "Science", "History", "Art", "Fiction"]
+SEARCH_TERMS = ["python", "data", "history", "art", "novel", "guide"]
+
+
+def parse_mix(text: str) -> dict:
+    """'list_books=50,search=30' 형식의 문자열을 {동작: 가중치}로 변환합니다."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown action: {name} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, p: float) -> float:
+    # 정렬된 값에서 p 백분위수를 구합니다. (nearest-rank 방식)
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Stats:
+    """엔드포인트별 응답 시간(초)과 상태 코드를 모으는 클래스입니다."""
+
+    def __init__(self):
+        self.latencies = {}  # 엔드포인트 이름 -> [초, ...]
+        self.statuses = {}   # 엔드포인트 이름 -> {상태 코드: 횟수}
+
+    def record(self, name: str, status: int, elapsed: float):
+        self.latencies.setdefault(name, []).append(elapsed)
+        counts = self.statuses.setdefault(name, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def summary(self, latencies, statuses, elapsed: float) -> dict:
+        values = sorted(latencies)
+        # 5xx와 전송 실패(상태 코드 0)만 오류로 셉니다. (재고 부족 400 등은 정상적인 응답)
+        errors = sum(n for code, n in statuses.items() if code == "0" or code.startswith("5"))
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+        }
+
+    def report(self, elapsed: float) -> dict:
+        all_latencies = [v for values in self.latencies.values() for v in values]
+        all_statuses = {}
+        for counts in self.statuses.values():
+            for code, n in counts.items():
+                all_statuses[code] = all_statuses.get(code, 0) + n
+        return {
+            "total": self.summary(all_latencies, all_statuses, elapsed),
+            "endpoints": {
+                name: self.summary(self.latencies[name], self.statuses[name], elapsed)
+                for name in sorted(self.latencies)
+            },
+        }
+
+
+class VirtualUser:
+    """한 명의 가상 사용자입니다. 가입/로그인한 뒤 비율에 따라 동작을 무작위로 반복합니다."""
+
+    def __init__(self, client: httpx.AsyncClient, stats: Stats, rng: random.Random, run_id: str, index: int, book_ids):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.username = f"load_{run_id}_{index}"
+        self.book_ids = book_ids  # 모든 가상 사용자가 공유하는 도서 id 목록
+        self.active_loans = []
+        self.headers = {}
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        # name은 보고서에 쓰이는 엔드포인트 이름입니다. (경로 매개변수를 {id}로 묶음)
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(name, 0, time.perf_counter() - start)
+            return None
+        self.stats.record(name, response.status_code, time.perf_counter() - start)
+        return response
+
+    async def login(self):
+        await self.request("POST /auth/signup", "POST", "/auth/signup", json={
+            "username": self.username, "email": f"{self.username}@example.com",
+            "password": "loadtest-pw", "full_name": "Load Tester",
+        })
+        response = await self.request("POST /auth/login", "POST", "/auth/login",
+                                      data={"username": self.username, "password": "loadtest-pw"})
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"login failed for {self.username}")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def add_book(self):
+        response = await self.request("POST /books", "POST", "/books", headers=self.headers, json={
+            "title": f"{self.rng.choice(SEARCH_TERMS).title()} Book {uuid.uuid4().hex[:6]}",
+            "author": "Load Tester",
+            "isbn": f"load-{uuid.uuid4().hex}",
+            "category": self.rng.choice(CATEGORIES),
+            "total_copies": self.rng.randint(1, 5),
+        })
+        if response is not None and response.status_code == 201:
+            self.book_ids.append(response.json()["id"])
+
+    async def list_books(self):
+        await self.request("GET /books", "GET", "/books",
+                           params={"category": self.rng.choice(CATEGORIES), "available": "true"})
+
+    async def search(self):
+        await self.request("GET /books/search", "GET", "/books/search", params={"q": self.rng.choice(SEARCH_TERMS)})
+
+    async def borrow(self):
+        if not self.book_ids:
+            return await self.add_book()
+        response = await self.request("POST /loans", "POST", "/loans", headers=self.headers,
+                                      json={"book_id": self.rng.choice(self.book_ids)})
+        if response is not None and response.status_code == 201:
+            self.active_loans.append(response.json()["id"])
+
+    async def list_loans(self):
+        await self.request("GET /users/me/loans", "GET", "/users/me/loans", headers=self.headers)
+
+    async def return_book(self):
+        if not self.active_loans:
+            return await self.borrow()
+        loan_id = self.active_loans.pop(self.rng.randrange(len(self.active_loans)))
+        await self.request("POST /loans/{id}/return", "POST", f"/loans/{loan_id}/return", headers=self.headers)
+
+    async def run(self, mix: dict, iterations: int = None, deadline: float = None):
+        actions = {
+            "list_books": self.list_books, "search": self.search, "borrow": self.borrow,
+            "list_loans": self.list_loans, "add_book": self.add_book, "return": self.return_book,
+        }
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        done = 0
+        while (iterations is None or done < iterations) and (deadline is None or time.perf_counter() < deadline):
+            await actions[self.rng.choices(names, weights)[0]]()
+            done += 1
+
+
+async def run_load(client: httpx.AsyncClient, users: int = 10, iterations: int = None, duration: float = None,
+                   mix: dict = None, seed_books: int = 20, seed: int = None) -> dict:
+    """
+    가상 사용자 users명을 동시에 실행하고 결과 보고서(dict)를 반환합니다.
+    - iterations: 사용자마다 실행할 동작 수, duration: 실행 시간(초). 둘 다 지정하면 먼저 끝나는 쪽 기준.
+    - 가입/로그인과 초기 도서 등록(seed_books권)은 준비 단계로, 측정 시간(elapsed)에서 제외됩니다.
+    """
+    if iterations is None and duration is None:
+        duration = 10.0
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    stats = Stats()
+    book_ids = []
+    vusers = [VirtualUser(client, stats, random.Random(rng.random()), run_id, i, book_ids) for i in range(users)]
+
+    # 준비 단계: 가입/로그인과 초기 도서 등록
+    await asyncio.gather(*(vuser.login() for vuser in vusers))
+    for _ in range(seed_books):
+        await vusers[0].add_book()
+    setup = stats.report(1.0)["endpoints"]
+    stats = Stats()
+    for vuser in vusers:
+        vuser.stats = stats
+
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+    await asyncio.gather(*(vuser.run(mix, iterations, deadline) for vuser in vusers))
+    elapsed = time.perf_counter() - start
+
+    report = stats.report(elapsed)
+    report["config"] = {"users": users, "iterations": iterations, "duration": duration,
+                        "mix": mix, "seed_books": seed_books, "seed": seed}
+    report["elapsed_s"] = round(elapsed, 3)
+    report["setup"] = setup
+    return report
+
+
+def make_client(url: str = None, timeout: float = 30.0) -> httpx.AsyncClient:
+    """url이 있으면 실행 중인 서버로, 없으면 같은 프로세스의 ASGI app(main.app)으로 요청하는 클라이언트"""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    import main
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=timeout)
+
+
+def compare_reports(old: dict, new: dict):
+    """두 보고서의 엔드포인트별 처리량과 p95 변화를 줄 단위 문자열로 반환합니다."""
+    lines = [f"{'endpoint':<28} {'rps old':>9} {'rps new':>9} {'p95 old':>9} {'p95 new':>9} {'p95 diff':>9}"]
+    for name in sorted(set(old["endpoints"]) | set(new["endpoints"])):
+        a = old["endpoints"].get(name, {})
+        b = new["endpoints"].get(name, {})
+        diff = ""
+        if a.get("p95_ms") and "p95_ms" in b:
+            diff = f"{(b['p95_ms'] - a['p95_ms']) / a['p95_ms'] * 100:+.1f}%"
+        lines.append(f"{name:<28} {a.get('throughput_rps', '-'):>9} {b.get('throughput_rps', '-'):>9} "
+                     f"{a.get('p95_ms', '-'):>9} {b.get('p95_ms', '-'):>9} {diff:>9}")
+    return lines
+
+
+def format_report(report: dict):
+    lines = [f"{'endpoint':<28} {'reqs':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, s in rows:
+        lines.append(f"{name:<28} {s['requests']:>7} {s['errors']:>5} {s['throughput_rps']:>9} "
+                     f"{s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9}")
+    return lines
+
+
+async def _main(args):
+    async with make_client(args.url) as client:
+        return await run_load(client, users=args.users, iterations=args.iterations, duration=args.duration,
+                              mix=parse_mix(args.mix) if args.mix else None,
+                              seed_books=args.seed_books, seed=args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="도서관 API 동시 부하 테스트")
+    parser.add_argument("--url", help="대상 서버 주소 (생략하면 서버 없이 main.app에 직접 요청)")
+    parser.add_argument("--users", type=int, default=10, help="동시 가상 사용자 수")
+    parser.add_argument("--duration", type=float, help="측정 시간(초), 기본값 10")
+    parser.add_argument("--iterations", type=int, help="사용자마다 실행할 동작 수")
+    parser.add_argument("--mix", help="동작 비율, 예: list_books=50,search=30,borrow=20")
+    parser.add_argument("--seed-books", type=int, default=20, help="시작 전에 등록할 도서 수")
+    parser.add_argument("--seed", type=int, help="난수 시드 (같은 값이면 같은 순서로 동작)")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="저장된 두 결과 파일을 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f_old, open(args.compare[1], encoding="utf-8") as f_new:
+            print("\n".join(compare_reports(json.load(f_old), json.load(f_new))))
+        sys.exit(0)
+
+    result = asyncio.run(_main(args))
+    print("\n".join(format_report(result)))
+    if args.output:
+        # 키를 정렬해 저장하므로 릴리스 간 결과를 diff로 비교하기 쉽습니다.
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
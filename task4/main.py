@@ -1,144 +1,106 @@
 # 파일: main.py
-
-from fastapi import Depends, FastAPI, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from typing import List
-
-from library_api import crud, models, schemas, auth
-from library_api.database import engine, get_db
-
-# 데이터베이스 테이블 생성
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
-
-# --- 인증 엔드포인트 ---
-@app.post("/auth/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    db_user_by_username = crud.get_user_by_username(db, username=user.username)
-    if db_user_by_username:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    return crud.create_user(db=db, user=user)
-
-@app.post("/auth/login", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_username(db, username=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    access_token = auth.create_access_token(
-        data={"sub": user.username}
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
-
-# --- 도서 관리 엔드포인트 ---
-@app.post("/books", response_model=schemas.Book, status_code=status.HTTP_201_CREATED)
-def create_book(book: schemas.BookCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    # (과제 요구사항에 따라 관리자만 추가하도록 로직을 추가할 수도 있습니다)
-    return crud.create_book(db=db, book=book)
-
-@app.get("/books", response_model=List[schemas.Book])
-def read_books(category: str = None, available: bool = None, db: Session = Depends(get_db)):
-    books = crud.get_books(db, category=category, available=available)
-    return books
-
-@app.delete("/books/{book_id}", response_model=schemas.Book)
-def delete_book(book_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    db_book = crud.delete_book(db, book_id=book_id)
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
-    return db_book
-
-# --- 대출/반납 엔드포인트 ---
-@app.post("/loans", response_model=schemas.Loan, status_code=status.HTTP_201_CREATED)
-def borrow_book(loan_data: schemas.LoanCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    book_id = loan_data.book_id
-    user_id = current_user.id
-    
-    db_book = crud.get_book(db, book_id=book_id)
-    if not db_book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    if db_book.available_copies <= 0:
-        raise HTTPException(status_code=400, detail="Book is not available for loan")
-
-    loan = crud.create_loan(db=db, book_id=book_id, user_id=user_id)
-    return loan
-
-@app.get("/users/me/loans", response_model=List[schemas.Loan])
-def read_user_loans(db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    return crud.get_user_loans(db=db, user_id=current_user.id)# 파일: main.py
 # FastAPI 애플리케이션의 메인 파일입니다.
 # API 엔드포인트(라우터)를 정의하고, 서버 실행의 시작점 역할을 합니다.
 
 # --- 필요한 라이브러리 및 모듈 임포트 ---
-from fastapi import Depends, FastAPI, HTTPException, status
+import asyncio
+import datetime
+import io
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, File, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm # 사용자 로그인 시 'username', 'password'를 form 데이터로 받기 위한 클래스
 from sqlalchemy.orm import Session # 데이터베이스 세션을 타입 힌팅하기 위해 사용
-from typing import List # List 타입을 힌팅하기 위해 사용
+from typing import List, Optional # List, Optional 타입을 힌팅하기 위해 사용
 
 # --- 직접 만든 모듈 임포트 ---
 # library_api 폴더 내의 다른 파이썬 파일들에서 필요한 함수, 클래스, 변수 등을 가져옵니다.
-from library_api import crud, models, schemas, auth
-from library_api.database import engine, get_db
+from library_api import crud, schemas, auth, config, search, bulk_import, metrics, responses, archive, hashing, migrate, facets, writer, fields, compression, export, waitlist, events
+from library_api.database import engine, get_db, get_read_db, SessionLocal, ReadSessionLocal
 
-# --- 데이터베이스 테이블 생성 ---
-# 애플리케이션이 시작될 때, models.py에 정의된 모든 SQLAlchemy 모델(테이블)들을
-# 데이터베이스에 생성합니다. (이미 테이블이 존재하면 아무 작업도 하지 않음)
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger("library_api.startup")
 
-# FastAPI 애플리케이션 인스턴스 생성
-app = FastAPI()
+# 임포트 시점에는 DB에 접근하지 않습니다. (스키마 확인과 백그라운드 작업은 create_app의 lifespan에서 실행)
+
+# 동기(def) 버전 핵심 엔드포인트를 담는 라우터
+# LIBRARY_ASYNC_MODE=true 이면 library_api/async_routes.py의 비동기 버전이 대신 등록됩니다.
+router = APIRouter()
+# 비동기 버전이 따로 없어 두 모드에서 모두 등록하는 엔드포인트
+shared_router = APIRouter()
 
 
 # ===============================================================
 # --- 1. 인증(Authentication) 관련 엔드포인트 ---
 # ===============================================================
 
-@app.post("/auth/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post("/auth/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
+async def signup(user: schemas.UserCreate, db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
     """
     회원가입을 위한 API 엔드포인트입니다.
     - 요청 본문(body)으로 사용자 정보를 받아 데이터베이스에 새로운 사용자를 생성합니다.
     - response_model=schemas.User: 성공 시 반환될 데이터의 형태를 지정 (비밀번호 제외)
     - status_code=201: 성공적으로 리소스가 생성되었음을 의미하는 HTTP 상태 코드
+    - 중복 확인은 읽기 세션(read_db)으로 하여, 비밀번호 해싱 동안 쓰기 연결을 점유하지 않습니다.
+    - async def인 이유: 해싱을 기다리는 동안 스레드풀의 스레드를 점유하지 않도록 (DB 작업만 스레드풀에서 실행)
     """
-    # 이메일 중복 확인
-    db_user_by_email = crud.get_user_by_email(db, email=user.email)
-    if db_user_by_email:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # 사용자 이름 중복 확인
-    db_user_by_username = crud.get_user_by_username(db, username=user.username)
-    if db_user_by_username:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    
-    # 중복이 없으면 crud의 create_user 함수를 호출하여 사용자를 생성
-    return crud.create_user(db=db, user=user)
-
-
-@app.post("/auth/login", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # 이메일/사용자 이름 중복 확인
+    def _check_duplicates():
+        try:
+            if crud.get_user_by_email(read_db, email=user.email):
+                return "Email already registered"
+            if crud.get_user_by_username(read_db, username=user.username):
+                return "Username already registered"
+            return None
+        finally:
+            # 조회가 끝났으므로 해싱/저장 전에 읽기 연결을 풀에 돌려줌
+            read_db.close()
+
+    duplicate = await run_in_threadpool(_check_duplicates)
+    if duplicate:
+        raise HTTPException(status_code=400, detail=duplicate)
+
+    # 중복이 없으면 비밀번호를 해싱 전용 풀에서 해싱한 뒤 crud의 create_user 함수로 사용자를 생성
+    # (해싱이 몰려 대기열이 가득 차면 503, 저장은 쓰기 큐로 넘김)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    return await run_in_threadpool(writer.run, db, crud.create_user, user, hashed_password=hashed_password)
+
+
+@router.post("/auth/login", response_model=schemas.Token)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
     """
     사용자 로그인을 처리하고 JWT(JSON Web Token) 액세스 토큰을 발급하는 엔드포인트입니다.
     - OAuth2PasswordRequestForm: 'username'과 'password'를 form 데이터 형식으로 받습니다.
+    - signup과 같은 이유로 async def이며, bcrypt 검증은 해싱 전용 풀에서 기다립니다.
     """
-    # 사용자 이름으로 데이터베이스에서 사용자 정보를 가져옴
-    user = crud.get_user_by_username(db, username=form_data.username)
-    
+    # 사용자 이름으로 데이터베이스에서 사용자 정보를 가져옴 (비밀번호 검증 동안 쓰기 연결을 점유하지 않도록 읽기 세션 사용)
+    def _load_user():
+        try:
+            return crud.get_user_by_username(read_db, username=form_data.username)
+        finally:
+            read_db.close()
+
+    user = await run_in_threadpool(_load_user)
+
     # 사용자가 없거나 비밀번호가 일치하지 않으면 401 Unauthorized 에러 발생
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    if not user or not await auth.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"}, # 응답 헤더에 인증 방식을 명시
         )
+
+    # 해싱 설정(bcrypt cost factor)이 바뀌었다면, 비밀번호를 알고 있는 지금 새 설정으로 다시 해싱해 저장
+    if auth.needs_rehash(user.hashed_password):
+        new_hash = await auth.get_password_hash_async(form_data.password)
+        await run_in_threadpool(writer.run, db, crud.update_password_hash, user.id, new_hash)
         
     # 인증 성공 시, 사용자 정보(username)를 기반으로 액세스 토큰 생성
     access_token = auth.create_access_token(
@@ -153,7 +115,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 # --- 2. 도서(Book) 관리 관련 엔드포인트 ---
 # ===============================================================
 
-@app.post("/books", response_model=schemas.Book, status_code=status.HTTP_201_CREATED)
+@router.post("/books", response_model=schemas.Book, status_code=status.HTTP_201_CREATED)
 def create_book(book: schemas.BookCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
     """
     새로운 도서를 등록하는 엔드포인트입니다.
@@ -161,28 +123,150 @@ def create_book(book: schemas.BookCreate, db: Session = Depends(get_db), current
                                       요청 헤더의 토큰을 검증하고, 유효하면 해당 사용자 정보를 반환합니다.
                                       토큰이 없거나 유효하지 않으면 401 에러를 자동으로 발생시킵니다.
     """
-    # crud의 create_book 함수를 호출하여 도서를 데이터베이스에 저장
-    return crud.create_book(db=db, book=book)
-
-
-@app.get("/books", response_model=List[schemas.Book])
-def read_books(category: str = None, available: bool = None, db: Session = Depends(get_db)):
+    # crud의 create_book 함수를 호출하여 도서를 데이터베이스에 저장 (쓰기 큐가 실행 중이면 큐를 거침)
+    return writer.run(db, crud.create_book, book)
+
+
+@router.get("/books", response_model=List[schemas.Book])
+def read_books(
+    category: str = None,
+    available: bool = None,
+    after: Optional[int] = None,
+    limit: int = Query(config.BOOKS_PAGE_SIZE, ge=1, le=config.BOOKS_MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    book_fields: Optional[tuple] = Depends(fields.book_fields),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
     """
     도서 목록을 조회하는 엔드포인트입니다. (인증 불필요)
     - 쿼리 파라미터(Query Parameter)를 통해 도서를 필터링할 수 있습니다.
     - 예시: /books?category=Programming&available=true
+    - 키셋 페이지네이션: id 오름차순으로 최대 limit개를 반환합니다.
+      다음 페이지가 있으면 응답 헤더 X-Next-Cursor 값을 after에 넣어 다시 요청합니다.
+      예시: /books?limit=100 -> /books?limit=100&after=100
+    - format=ndjson: after 이후의 모든 도서를 한 줄에 하나씩(JSON Lines) 스트리밍합니다.
+                     DB에서 배치 단위로 읽는 즉시 전송하므로 카탈로그 크기와 관계없이 메모리 사용량이 일정합니다.
+    - 목록은 ORM 객체 대신 Core 행에서 만든 dict를 그대로 orjson으로 직렬화합니다. (행마다 Pydantic 검증을 반복하지 않음)
+    - 응답의 ETag 헤더를 다음 요청의 If-None-Match로 보내면, 그 사이 카탈로그가 바뀌지 않은 경우
+      books 테이블을 읽지 않고 본문 없는 304 Not Modified로 응답합니다.
+    - fields: 필요한 필드만 받습니다. 예시: /books?fields=id,title,available_copies (id는 항상 포함)
+    - Accept-Encoding에 br 또는 gzip이 있으면 큰 응답은 압축되어 전송됩니다.
     """
-    books = crud.get_books(db, category=category, available=available)
-    return books
+    # 카탈로그 버전(행 하나)만 읽어 ETag를 계산하고, 클라이언트가 가진 것과 같으면 바로 304
+    version = crud.get_catalog_version(db)
+    etag = responses.make_etag(version, category or None, bool(available), after, limit, format, book_fields)
+    if responses.etag_matches(if_none_match, etag):
+        return responses.not_modified(etag)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_books_ndjson(category, available, after, book_fields),
+            media_type="application/x-ndjson",
+            headers=headers,
+        )
 
+    # 자주 호출되는 엔드포인트이므로 캐시를 거쳐 조회 (library_api/cache.py 참고)
+    books = crud.get_books_cached(db, category=category, available=available, after=after, limit=limit,
+                                  version=version, fields=book_fields)
+    # 페이지가 가득 찼다면 다음 페이지가 있을 수 있으므로 커서를 헤더로 알려줌
+    if len(books) == limit:
+        headers["X-Next-Cursor"] = str(books[-1]["id"])
+    return responses.FastJSONResponse(books, headers=headers)
 
-@app.delete("/books/{book_id}", response_model=schemas.Book)
+
+def _stream_books_ndjson(category: Optional[str], available: Optional[bool], after: Optional[int], book_fields=None):
+    """
+    NDJSON 스트리밍용 제너레이터입니다.
+    응답이 끝날 때까지 사용할 전용 세션을 직접 열고 닫습니다.
+    DB에서 읽는 배치 단위로 묶어 전송하므로, 압축할 때도 행마다가 아니라 배치마다 flush 됩니다.
+    """
+    db = ReadSessionLocal()
+    try:
+        chunk = []
+        for book in crud.iter_book_rows(db, category=category, available=available, after=after,
+                                        batch_size=config.BOOKS_STREAM_BATCH_SIZE, fields=book_fields):
+            chunk.append(responses.dumps(book))
+            if len(chunk) == config.BOOKS_STREAM_BATCH_SIZE:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+    finally:
+        db.close()
+
+
+@router.get("/books/search", response_model=List[schemas.Book])
+def search_books(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """
+    도서 제목/저자 전문 검색 엔드포인트입니다. (인증 불필요)
+    - SQLite FTS5 인덱스를 사용하므로 카탈로그 전체를 LIKE로 훑지 않습니다.
+    - 각 단어는 접두어로 검색됩니다. 예시: /books/search?q=pyth 는 "Python"과 일치
+    - 결과는 관련도(제목 일치 우선) 순이며, limit/offset으로 페이지를 나눕니다.
+    """
+    return search.search_books(db, q=q, limit=limit, offset=offset)
+
+
+@router.get("/books/batch", response_model=List[schemas.Book])
+def read_books_by_ids(
+    ids: List[int] = Query(..., min_length=1, max_length=config.BOOKS_BATCH_MAX_IDS),
+    db: Session = Depends(get_read_db),
+):
+    """
+    여러 도서를 id 목록으로 한 번에 조회하는 엔드포인트입니다. (인증 불필요)
+    - 예시: /books/batch?ids=3&ids=1&ids=7
+    - IN 쿼리 한 번으로 읽어 요청한 순서대로 반환하며, 존재하지 않는 id는 결과에서 빠집니다.
+    """
+    return responses.FastJSONResponse(crud.get_book_rows_by_ids(db, ids))
+
+
+@shared_router.get("/books/facets", response_model=List[schemas.CategoryFacet])
+def read_book_facets(db: Session = Depends(get_read_db)):
+    """
+    카테고리별 책 종류 수, 전체 부수, 대출 가능 부수를 반환합니다. (인증 불필요)
+    - 미리 집계된 category_stats 테이블만 읽으므로 카탈로그 크기와 관계없이 카테고리 수만큼만 조회합니다.
+    """
+    return facets.get_facets(db)
+
+
+@shared_router.post("/books/import", response_model=schemas.BookImportReport)
+def import_books(
+    file: UploadFile = File(...),
+    on_conflict: str = Query("skip", pattern="^(skip|upsert)$"),
+    batch_size: int = Query(config.IMPORT_BATCH_SIZE, ge=1, le=config.IMPORT_MAX_BATCH_SIZE),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user),
+):
+    """
+    도서를 CSV 또는 NDJSON 파일로 대량 등록하는 엔드포인트입니다. (인증 필요)
+    - multipart/form-data의 file 필드로 업로드합니다. 예시: curl -F "file=@books.csv" ...
+    - CSV는 첫 줄에 title,author,isbn,category,total_copies 헤더가 있어야 합니다.
+    - 파일을 한 행씩 읽어 batch_size개마다 하나의 트랜잭션으로 저장하므로 큰 파일도 메모리를 적게 사용합니다.
+    - on_conflict: 이미 등록된 ISBN을 건너뛸지(skip) 새 값으로 갱신할지(upsert) 지정합니다.
+    - 응답으로 등록/갱신/건너뜀/실패 개수와 실패한 행의 오류 목록을 반환합니다.
+    - 파일은 UTF-8이어야 하며, 디코딩할 수 없는 행은 "invalid UTF-8 data" 오류로 보고합니다.
+    """
+    fmt = format or bulk_import.detect_format(file.filename, file.content_type)
+    # 업로드 파일은 디스크에 임시 저장되어 있으며, 텍스트 줄 단위로 읽어 나갑니다. (utf-8-sig: BOM 제거)
+    # UTF-8이 아닌 바이트는 읽는 도중 예외(500)를 내지 않고 남겨 두었다가, 해당 행만 보고서의 errors에 기록합니다.
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="surrogateescape", newline="")
+    return bulk_import.import_books(db, lines, fmt=fmt, on_conflict=on_conflict, batch_size=batch_size)
+
+
+@router.delete("/books/{book_id}", response_model=schemas.Book)
 def delete_book(book_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
     """
     특정 도서를 삭제하는 엔드포인트입니다. (인증 필요)
     - 경로 매개변수(Path Parameter)인 book_id를 받아 해당 ID의 책을 삭제합니다.
     """
-    db_book = crud.delete_book(db, book_id=book_id)
+    db_book = writer.run(db, crud.delete_book, book_id)
     # 삭제하려는 책이 데이터베이스에 존재하지 않으면 404 Not Found 에러 발생
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
@@ -193,34 +277,288 @@ def delete_book(book_id: int, db: Session = Depends(get_db), current_user: schem
 # --- 3. 대출(Loan) 관리 관련 엔드포인트 ---
 # ===============================================================
 
-@app.post("/loans", response_model=schemas.Loan, status_code=status.HTTP_201_CREATED)
+@router.post("/loans", response_model=schemas.Loan, status_code=status.HTTP_201_CREATED)
 def borrow_book(loan_data: schemas.LoanCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
     """
     도서를 대출하는 엔드포인트입니다. (인증 필요)
+    - 재고 확인과 차감은 crud.create_loan에서 하나의 조건부 UPDATE로 처리되므로,
+      동시에 여러 명이 마지막 한 권을 빌리려 해도 한 명만 성공합니다.
     """
     book_id = loan_data.book_id
     # 토큰을 통해 인증된 사용자의 ID를 가져옴
     user_id = current_user.id
-    
-    # 대출하려는 책이 존재하는지 확인
-    db_book = crud.get_book(db, book_id=book_id)
-    if not db_book:
+
+    # crud의 create_loan 함수를 호출하여 재고를 차감하고 대출 기록을 생성
+    loan, error = writer.run(db, crud.create_loan_with_book, book_id, user_id)
+    # 실패 원인은 쓰기 작업 안에서 확인됨: 책이 없으면 404, 재고가 없으면 400
+    if error == "not_found":
         raise HTTPException(status_code=404, detail="Book not found")
-        
-    # 대출 가능한 재고가 있는지 확인
-    if db_book.available_copies <= 0:
+    if error is not None:
         raise HTTPException(status_code=400, detail="Book is not available for loan")
+    return loan
+
+
+@router.post("/loans/batch", response_model=schemas.LoanBatchResult, status_code=status.HTTP_201_CREATED)
+def borrow_books(batch: schemas.LoanBatchCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    """
+    여러 도서를 한 번에 대출하는 엔드포인트입니다. (인증 필요)
+    - 예시 요청 본문: {"book_ids": [1, 2, 3], "all_or_nothing": true}
+    - 재고 차감과 대출 기록 생성이 하나의 트랜잭션(commit 한 번)으로 처리됩니다.
+    - all_or_nothing=true(기본값): 한 권이라도 대출할 수 없으면 아무것도 대출하지 않습니다.
+      all_or_nothing=false: 가능한 책만 대출하고, 실패한 책은 응답의 failed에 원인과 함께 담습니다.
+    - 대출된 책이 하나도 없으면 400 응답의 detail.failed로 책마다 실패 원인(not_found/unavailable)을 알려줍니다.
+    """
+    loans, failed = writer.run(db, crud.create_loans, batch.book_ids, current_user.id, all_or_nothing=batch.all_or_nothing)
+    if not loans:
+        raise HTTPException(status_code=400, detail={"message": "Books are not available for loan", "failed": failed})
+    return {"loans": loans, "failed": failed}
 
-    # crud의 create_loan 함수를 호출하여 대출 기록을 생성
-    loan = crud.create_loan(db=db, book_id=book_id, user_id=user_id)
+
+@router.post("/loans/{loan_id}/return", response_model=schemas.Loan)
+def return_book(loan_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    """
+    대출한 도서를 반납하는 엔드포인트입니다. (인증 필요)
+    - 본인의 대출만 반납할 수 있으며, return_date를 기록하고 재고를 1 늘립니다.
+    """
+    loan, error = writer.run(db, crud.return_loan_with_book, loan_id, current_user.id)
+    if error == "not_found":
+        raise HTTPException(status_code=404, detail="Loan not found")
+    if error is not None:
+        raise HTTPException(status_code=400, detail="Book has already been returned")
     return loan
 
 
-@app.get("/users/me/loans", response_model=List[schemas.Loan])
-def read_user_loans(db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+@shared_router.get("/loans/export")
+def export_loans(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    loan_from: Optional[datetime.datetime] = None,
+    loan_to: Optional[datetime.datetime] = None,
+    summary: bool = False,
+    current_user: schemas.User = Depends(auth.get_current_user),
+):
+    """
+    모든 대출 기록을 책/사용자 정보와 함께 CSV 또는 NDJSON으로 내보내는 엔드포인트입니다. (보고서용)
+    - LIBRARY_EXPORT_USERS에 등록된 사용자만 호출할 수 있습니다.
+    - loan_from <= 대출일 < loan_to 범위로 거를 수 있습니다. 예시: ?loan_from=2024-01-01&loan_to=2024-02-01
+    - DB에서 배치 단위로 읽는 즉시 전송하므로 내보내는 행 수와 관계없이 메모리 사용량이 일정합니다.
+    - NDJSON은 마지막 줄에 연체 요약({"summary": {...}})이 붙습니다.
+    - CSV는 summary=true일 때만 대출 행 뒤에 빈 줄과 요약 표(헤더 행 + 값 행)가 붙습니다.
+      (기본값은 대출 행만 있는 CSV이므로 스프레드시트/CSV 도구에서 그대로 열 수 있음)
+    """
+    if current_user.username not in config.EXPORT_USERS:
+        raise HTTPException(status_code=403, detail="Not allowed to export loans")
+    if format == "csv":
+        return StreamingResponse(
+            (text.encode("utf-8") for text in _stream_loan_export("csv", loan_from, loan_to, summary)),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="loans.csv"'},
+        )
+    return StreamingResponse(_stream_loan_export("ndjson", loan_from, loan_to), media_type="application/x-ndjson")
+
+
+def _stream_loan_export(fmt: str, loan_from, loan_to, csv_summary: bool = False):
+    """내보내기 스트리밍용 제너레이터입니다. (응답이 끝날 때까지 전용 읽기 세션 사용)"""
+    db = ReadSessionLocal()
+    try:
+        summary = export.ExportSummary()
+        rows = export.iter_loans(db, loan_from, loan_to, summary=summary)
+        if fmt == "csv":
+            yield from export.iter_csv(rows, summary=summary if csv_summary else None)
+        else:
+            yield from export.iter_ndjson(rows, summary=summary)
+    finally:
+        db.close()
+
+
+@router.get("/users/me/loans", response_model=List[schemas.Loan])
+def read_user_loans(
+    loan_status: Optional[str] = Query(None, alias="status", pattern="^(active|returned)$"),
+    after: Optional[int] = None,
+    limit: int = Query(config.LOANS_PAGE_SIZE, ge=1, le=config.LOANS_MAX_PAGE_SIZE),
+    loan_fields: Optional[tuple] = Depends(fields.loan_fields),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user),
+):
     """
     현재 로그인된 사용자의 대출 기록을 조회하는 엔드포인트입니다. (인증 필요)
     - 'me'라는 키워드를 사용하여 자기 자신의 정보를 조회함을 나타냅니다.
+    - status=active 는 반납 전 대출만, status=returned 는 반납된 대출만 조회합니다.
+    - /books와 같은 키셋 페이지네이션을 사용합니다. (limit, after, 응답 헤더 X-Next-Cursor)
+    - 대출 수와 관계없이 책 정보까지 한 번의 쿼리로 읽어옵니다. (/books와 같은 Core 행 + orjson 경로)
+    - fields: 필요한 필드만 받습니다. 예시: ?fields=id,loan_date,book.title (book은 책 전체, 생략하면 책 정보 없음)
     """
-    # crud의 get_user_loans 함수를 호출하여 현재 사용자의 대출 목록을 가져옴
-    return crud.get_user_loans(db=db, user_id=current_user.id)
\ No newline at end of file
+    # crud의 get_user_loan_rows 함수를 호출하여 현재 사용자의 대출 목록을 가져옴
+    loans = crud.get_user_loan_rows(db=db, user_id=current_user.id, status=loan_status, after=after, limit=limit,
+                                    fields=loan_fields)
+    headers = {"X-Next-Cursor": str(loans[-1]["id"])} if len(loans) == limit else None
+    return responses.FastJSONResponse(loans, headers=headers)
+
+
+# ===============================================================
+# --- 4. 대기열(Waitlist) 및 알림 엔드포인트 ---
+# ===============================================================
+
+@shared_router.post("/books/{book_id}/waitlist", response_model=schemas.WaitlistEntry, status_code=status.HTTP_201_CREATED)
+def join_waitlist(book_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    """
+    대출할 수 없는 책의 대기열에 등록하는 엔드포인트입니다. (인증 필요, 이미 등록되어 있으면 현재 항목 반환)
+    - 반납으로 책이 생기면 먼저 등록한 순서대로 WAITLIST_HOLD_SECONDS 동안 한 권이 확보되고 GET /waitlist/events로 알림이 갑니다.
+    - 확보된 동안에는 다른 사용자가 그 책을 빌릴 수 없으므로, 알림을 받은 뒤 POST /loans로 대출하면 됩니다.
+    - 지금 빌릴 수 있는 책이면 400 (대기 등록으로 책을 잡아 두지 않고 바로 POST /loans로 대출)
+    """
+    try:
+        entry = writer.run(db, waitlist.join, book_id, current_user.id)
+    except waitlist.BookAvailableError:
+        raise HTTPException(status_code=400, detail="Book is available; borrow it instead")
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return entry
+
+
+@shared_router.delete("/books/{book_id}/waitlist", status_code=status.HTTP_204_NO_CONTENT)
+def leave_waitlist(book_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    """대기열에서 빠지는 엔드포인트입니다. 확보된 책이 있었다면 다음 대기자에게 넘어갑니다."""
+    if not writer.run(db, waitlist.leave, book_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Not on the waitlist")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@shared_router.get("/users/me/waitlist", response_model=List[schemas.WaitlistEntry])
+def read_user_waitlist(db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    """현재 사용자의 대기 항목(순서, 확보 만료 시각)을 등록 순서대로 반환합니다."""
+    return responses.FastJSONResponse(waitlist.get_user_entries(db, current_user.id))
+
+
+@shared_router.get("/waitlist/events")
+async def waitlist_events(current_user: schemas.User = Depends(auth.get_current_user)):
+    """
+    대기열 알림을 Server-Sent Events(text/event-stream)로 보내는 엔드포인트입니다. (인증 필요)
+    - 차례가 되어 책이 확보되면 `event: hold` 이벤트가 옵니다. data: {"id", "user_id", "book_id", "hold_until"}
+    - 연결할 때 이미 확보되어 있는 항목도 먼저 보내므로, 연결이 끊겼던 동안의 알림을 놓치지 않습니다.
+      같은 확보가 두 번 올 수 있으므로 클라이언트는 이벤트 id로 중복을 거릅니다.
+    - 이벤트가 없으면 WAITLIST_HEARTBEAT_SECONDS마다 주석 줄(": ping")을 보내 연결을 유지합니다.
+    - 연결은 DB 연결이나 스레드를 점유하지 않고 이벤트 루프에서 기다립니다. (library_api/events.py)
+    """
+    return StreamingResponse(
+        _stream_waitlist_events(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: dict) -> bytes:
+    data = {key: value for key, value in event.items() if key != "event"}
+    return b"event: %s\nid: %d\ndata: %s\n\n" % (event["event"].encode(), data["id"], responses.dumps(data))
+
+
+def _read_user_holds(user_id: int):
+    db = ReadSessionLocal()
+    try:
+        return waitlist.get_user_holds(db, user_id)
+    finally:
+        db.close()
+
+
+async def _stream_waitlist_events(user_id: int):
+    # 먼저 구독한 뒤 현재 확보를 읽어, 그 사이에 생긴 알림도 놓치지 않도록 함
+    queue = events.hub.subscribe(user_id)
+    try:
+        yield b"retry: 5000\n\n"
+        for hold in await run_in_threadpool(_read_user_holds, user_id):
+            yield _sse({"event": "hold", **hold})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), config.WAITLIST_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            yield _sse(event)
+    finally:
+        events.hub.unsubscribe(user_id, queue)
+
+
+# ===============================================================
+# --- 5. 운영(모니터링) 엔드포인트 ---
+# ===============================================================
+
+def read_metrics():
+    """
+    Prometheus가 수집하는 성능 지표 엔드포인트입니다. (LIBRARY_METRICS_ENABLED일 때만 등록)
+    - 라우트별 응답 시간, 요청당 쿼리 수/DB 시간, bcrypt 소요 시간, 캐시 히트/미스 수를 텍스트 형식으로 반환합니다.
+    """
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# ===============================================================
+# --- 애플리케이션 생성 ---
+# ===============================================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    서버 프로세스(워커)가 요청을 받기 전/종료할 때 한 번씩 실행되는 작업입니다.
+    - 스키마 확인: DB의 스키마 버전이 최신이면 PRAGMA 한 번만 읽습니다. (library_api/migrate.py 참고)
+      LIBRARY_AUTO_MIGRATE=false 이면 건너뛰므로, 배포 시 `python -m library_api.migrate`를 먼저 한 번 실행합니다.
+    - 쓰기 큐 시작/종료: 종료 시에는 대기 중인 쓰기를 모두 처리한 뒤 멈춥니다. (library_api/writer.py 참고)
+    - 반납된 대출 기록 보관 작업 시작/종료: 쓰기 큐가 있으면 배치마다 큐를 거칩니다. (library_api/archive.py 참고)
+    - 대기열 주기 작업 시작/종료: 만료된 확보 정리, 다른 워커에서 생긴 알림 전달 (library_api/waitlist.py 참고)
+    """
+    started = time.perf_counter()
+    if config.AUTO_MIGRATE:
+        migrate.ensure_schema(engine)
+    if config.WRITE_QUEUE_ENABLED:
+        writer.start(engine)
+    archiver = None
+    if config.LOAN_ARCHIVE_INTERVAL > 0:
+        archiver = archive.start_background_archiver(SessionLocal)
+    sweeper = None
+    if config.WAITLIST_SWEEP_INTERVAL > 0:
+        sweeper = waitlist.start_background_sweeper(SessionLocal, ReadSessionLocal)
+    logger.info("startup finished in %.1fms", (time.perf_counter() - started) * 1000)
+    yield
+    if archiver is not None:
+        archiver.stop_event.set()
+    if sweeper is not None:
+        sweeper.stop_event.set()
+    writer.stop()
+    hashing.executor.shutdown()
+
+
+async def write_queue_full_handler(request, exc):
+    # 쓰기 대기열이 가득 차면 해싱 대기열과 같이 잠시 후 다시 시도하도록 503으로 응답
+    return await http_exception_handler(request, auth.hashing_busy_exception())
+
+
+def create_app() -> FastAPI:
+    """
+    FastAPI 애플리케이션을 만들어 반환하는 팩토리 함수입니다.
+    `uvicorn main:app` 또는 `uvicorn main:create_app --factory` 로 실행합니다.
+    """
+    application = FastAPI(lifespan=lifespan)
+    application.add_exception_handler(writer.WriteQueueFullError, write_queue_full_handler)
+
+    # 응답 압축 (br/gzip, library_api/compression.py 참고)
+    # 나중에 등록한 미들웨어가 바깥쪽에서 실행되므로, 아래 계측 미들웨어의 응답 시간에 압축 시간도 포함됩니다.
+    if config.COMPRESSION_ENABLED:
+        application.add_middleware(
+            compression.CompressionMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE,
+            gzip_level=config.COMPRESSION_GZIP_LEVEL, brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    # 요청별 응답 시간/쿼리 수/DB 시간 계측 (library_api/metrics.py 참고)
+    if config.METRICS_ENABLED:
+        application.add_middleware(metrics.MetricsMiddleware)
+        application.add_api_route("/metrics", read_metrics, methods=["GET"], include_in_schema=False)
+
+    # 설정에 따라 동기 또는 비동기 구현 중 하나만 등록합니다.
+    if config.ASYNC_MODE:
+        from library_api import async_routes
+        application.include_router(async_routes.router)
+    else:
+        application.include_router(router)
+    application.include_router(shared_router)
+    return application
+
+
+# FastAPI 애플리케이션 인스턴스 생성
+app = create_app()
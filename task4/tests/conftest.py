@@ -0,0 +1,125 @@
+# 파일: tests/conftest.py
+# pytest 공용 설정입니다.
+# 실제 library.db 대신 임시 폴더의 SQLite 파일을 사용하도록, main을 임포트하기 전에 환경 변수를 설정합니다.
+
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+
+import httpx
+import pytest
+
+_tmp_dir = tempfile.mkdtemp(prefix="library_test_")
+os.environ.setdefault("LIBRARY_DATABASE_URL", f"sqlite:///{_tmp_dir}/test.db")
+os.environ.setdefault("LIBRARY_CATALOG_CACHE_PATH", f"{_tmp_dir}/catalog_cache.db")
+# 테스트에서는 해싱 속도가 중요하지 않으므로 가장 낮은 cost로 호출한 스레드에서 바로 실행
+os.environ.setdefault("LIBRARY_BCRYPT_ROUNDS", "4")
+os.environ.setdefault("LIBRARY_HASH_EXECUTOR", "inline")
+# 대출 기록 보관은 테스트에서 직접 호출 (백그라운드 스레드 사용 안 함)
+os.environ.setdefault("LIBRARY_LOAN_ARCHIVE_INTERVAL", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from library_api import database, migrate  # noqa: E402
+
+# 운영 배포와 같이 스키마 생성은 서버(lifespan) 시작 전에 한 번만 실행
+# (TestClient/ASGITransport를 with 없이 사용하면 lifespan이 실행되지 않음)
+migrate.ensure_schema(database.engine)
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def unique(prefix: str = "") -> str:
+    return prefix + uuid.uuid4().hex[:12]
+
+
+@pytest.fixture
+def make_user(client):
+    """새 사용자를 가입시키고 인증 헤더를 반환하는 함수를 제공합니다."""
+    def _make_user():
+        username = unique("user_")
+        client.post("/auth/signup", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+        token = client.post("/auth/login", data={"username": username, "password": "pw"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return _make_user
+
+
+@pytest.fixture
+def auth_headers(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def make_book(client, auth_headers):
+    """새 도서를 등록하고 응답 JSON을 반환하는 함수를 제공합니다."""
+    def _make_book(total_copies: int = 1, category: str = "Testing", **fields):
+        data = {"title": "Test Book", "author": "Tester", "isbn": unique("isbn-"),
+                "category": category, "total_copies": total_copies}
+        data.update(fields)
+        response = client.post("/books", json=data, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return _make_book
+
+
+@pytest.fixture
+def send_concurrently():
+    """
+    여러 요청을 하나의 이벤트 루프에서 동시에 보내고 응답 목록을 반환하는 함수를 제공합니다.
+    (TestClient를 여러 스레드에서 호출하면 스레드마다 이벤트 루프가 따로 생겨 비동기 모드의 커넥션 풀과 맞지 않음)
+    사용법: send_concurrently([("POST", "/loans", {"json": {...}, "headers": {...}}), ...])
+    """
+    def _send(calls):
+        async def _run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as ac:
+                return await asyncio.gather(*(ac.request(method, url, **kwargs) for method, url, kwargs in calls))
+        return asyncio.run(_run())
+    return _send
+
+
+@pytest.fixture
+def count_queries():
+    """
+    with 블록 안에서 실행된 SQL 문 개수를 세는 컨텍스트 매니저를 제공합니다.
+    사용법: with count_queries() as counter: ... ; counter.count
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+    from library_api import database
+
+    if database.async_engine is not None:
+        engines = [database.async_engine.sync_engine]
+    else:
+        # production 프로필에서는 조회가 읽기 전용 엔진으로 실행되므로 두 엔진 모두 셈
+        engines = list({database.engine, database.read_engine})
+
+    class Counter:
+        count = 0
+        statements = []
+
+    @contextmanager
+    def _count():
+        counter = Counter()
+        counter.statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            counter.count += 1
+            counter.statements.append(statement)
+
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return _count
@@ -0,0 +1,47 @@
+# 파일: tests/test_archive.py
+# 반납된 대출 기록 보관(loans -> loans_archive) 테스트
+
+from library_api import archive, database, models
+
+
+def _archive_all():
+    with database.SessionLocal() as db:
+        return archive.archive_returned_loans(db, batch_size=2)
+
+
+def test_archived_loans_stay_in_history(client, auth_headers, make_book):
+    loan_ids = []
+    for _ in range(4):
+        book = make_book(total_copies=1)
+        loan_ids.append(client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()["id"])
+    for loan_id in loan_ids[:3]:
+        assert client.post(f"/loans/{loan_id}/return", headers=auth_headers).status_code == 200
+
+    assert _archive_all() >= 3
+    with database.SessionLocal() as db:
+        assert db.query(models.Loan).filter(models.Loan.id.in_(loan_ids)).count() == 1
+        assert db.query(models.LoanArchive).filter(models.LoanArchive.id.in_(loan_ids)).count() == 3
+
+    active = client.get("/users/me/loans", params={"status": "active"}, headers=auth_headers).json()
+    returned = client.get("/users/me/loans", params={"status": "returned"}, headers=auth_headers).json()
+    everything = client.get("/users/me/loans", params={"limit": 3}, headers=auth_headers)
+    assert [loan["id"] for loan in active] == loan_ids[3:]
+    assert [loan["id"] for loan in returned] == loan_ids[:3]
+    assert [loan["id"] for loan in everything.json()] == loan_ids[:3]
+    assert everything.headers["X-Next-Cursor"] == str(loan_ids[2])
+
+    # 이미 보관된 대출을 다시 반납하면 404가 아니라 400
+    assert client.post(f"/loans/{loan_ids[0]}/return", headers=auth_headers).status_code == 400
+
+
+def test_newest_loan_is_never_archived(client, auth_headers, make_book):
+    # 최대 id 행을 지우면 SQLite가 그 id를 재사용할 수 있으므로 남겨 두어야 함
+    book = make_book(total_copies=1)
+    loan = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()
+    client.post(f"/loans/{loan['id']}/return", headers=auth_headers)
+    _archive_all()
+
+    with database.SessionLocal() as db:
+        assert db.get(models.Loan, loan["id"]) is not None
+    next_loan = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()
+    assert next_loan["id"] > loan["id"]
@@ -0,0 +1,56 @@
+# 파일: tests/test_async_mode.py
+# 비동기 모드(LIBRARY_ASYNC_MODE) 엔드포인트 테스트
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import main
+from library_api import async_routes
+
+
+def _routes(router):
+    return {
+        (route.path, tuple(sorted(route.methods))): (route.status_code, route.response_model)
+        for route in router.routes
+    }
+
+
+def test_async_routes_match_sync_routes():
+    # 모드와 관계없이 같은 경로/메서드/상태 코드/응답 형태를 제공
+    assert _routes(async_routes.router) == _routes(main.router)
+
+
+# 새 인터프리터에서 LIBRARY_ASYNC_MODE=true로 앱을 만들어 핵심 흐름을 실행합니다.
+_ASYNC_SCRIPT = """
+import main
+from fastapi.testclient import TestClient
+from library_api import database, migrate
+
+assert database.async_engine is not None
+migrate.ensure_schema(database.engine)
+client = TestClient(main.app)
+assert client.post("/auth/signup", json={"username": "a", "email": "a@example.com", "password": "pw"}).status_code == 201
+token = client.post("/auth/login", data={"username": "a", "password": "pw"}).json()["access_token"]
+headers = {"Authorization": "Bearer " + token}
+book = client.post("/books", json={"title": "T", "author": "A", "isbn": "async-1", "category": "C", "total_copies": 1},
+                   headers=headers).json()
+loan = client.post("/loans", json={"book_id": book["id"]}, headers=headers)
+assert loan.status_code == 201 and loan.json()["book"]["id"] == book["id"]
+assert client.post("/loans", json={"book_id": book["id"]}, headers=headers).status_code == 400
+assert client.get("/books", params={"category": "C"}).json()[0]["available_copies"] == 0
+assert client.post("/loans/%d/return" % loan.json()["id"], headers=headers).status_code == 200
+assert [l["id"] for l in client.get("/users/me/loans", headers=headers).json()] == [loan.json()["id"]]
+print("ok")
+"""
+
+
+def test_async_mode_serves_core_endpoints():
+    tmp_dir = tempfile.mkdtemp(prefix="library_async_")
+    env = dict(os.environ, LIBRARY_ASYNC_MODE="true", LIBRARY_DATABASE_URL=f"sqlite:///{tmp_dir}/async.db",
+               LIBRARY_CATALOG_CACHE_PATH=f"{tmp_dir}/catalog_cache.db")
+    env.pop("LIBRARY_ASYNC_DATABASE_URL", None)
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", _ASYNC_SCRIPT], capture_output=True, text=True,
+                            env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "ok", result.stderr
@@ -0,0 +1,61 @@
+# 파일: tests/test_batch.py
+# 여러 권 대출(POST /loans/batch)과 id 목록 조회(GET /books/batch) 테스트
+
+
+def _available(client, book_ids):
+    books = client.get("/books/batch", params={"ids": book_ids}).json()
+    return [book["available_copies"] for book in books]
+
+
+def test_batch_loan_is_one_transaction(client, auth_headers, make_book, count_queries):
+    book_ids = [make_book(total_copies=2)["id"] for _ in range(3)]
+    client.get("/users/me/loans", headers=auth_headers)  # 인증 캐시를 채우기 위한 첫 요청
+
+    with count_queries() as counter:
+        response = client.post("/loans/batch", json={"book_ids": book_ids}, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert [loan["book_id"] for loan in body["loans"]] == book_ids
+    assert all(loan["book"]["available_copies"] == 1 for loan in body["loans"])
+    assert body["failed"] == []
+    # 재고 차감, 대출 INSERT, 카탈로그 버전, 응답용 조회 -> 책 수와 무관
+    # (쓰기 큐가 실행 중이면 추가되는 BEGIN/SAVEPOINT/RELEASE는 제외)
+    statements = [s for s in counter.statements if not s.startswith(("BEGIN", "SAVEPOINT", "RELEASE"))]
+    assert len(statements) <= 5
+    assert _available(client, book_ids) == [1, 1, 1]
+
+
+def test_all_or_nothing_rolls_back(client, auth_headers, make_book):
+    free = make_book(total_copies=1)["id"]
+    taken = make_book(total_copies=1)["id"]
+    client.post("/loans", json={"book_id": taken}, headers=auth_headers)
+
+    response = client.post("/loans/batch", json={"book_ids": [free, taken, 999999]}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"]["failed"] == [
+        {"book_id": taken, "error": "unavailable"}, {"book_id": 999999, "error": "not_found"}]
+    assert _available(client, [free, taken]) == [1, 0]
+
+
+def test_partial_success(client, auth_headers, make_book):
+    free = make_book(total_copies=1)["id"]
+    taken = make_book(total_copies=1)["id"]
+    client.post("/loans", json={"book_id": taken}, headers=auth_headers)
+
+    response = client.post("/loans/batch", json={"book_ids": [taken, free], "all_or_nothing": False},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    assert [loan["book_id"] for loan in response.json()["loans"]] == [free]
+    assert response.json()["failed"] == [{"book_id": taken, "error": "unavailable"}]
+    assert _available(client, [free, taken]) == [0, 0]
+
+    duplicate = client.post("/loans/batch", json={"book_ids": [free, free]}, headers=auth_headers)
+    assert duplicate.status_code == 422
+
+
+def test_books_by_ids_keeps_request_order(client, make_book, count_queries):
+    first, second = make_book()["id"], make_book()["id"]
+    with count_queries() as counter:
+        books = client.get("/books/batch", params={"ids": [second, 999999, first]}).json()
+    assert [book["id"] for book in books] == [second, first]
+    assert counter.count == 1
@@ -0,0 +1,39 @@
+# 파일: tests/test_books_etag.py
+# GET /books의 ETag / If-None-Match(304) 테스트
+
+
+def test_unchanged_catalog_returns_304_without_reading_books(client, make_book, count_queries):
+    category = make_book(category="ETag")["category"]
+    first = client.get("/books", params={"category": category})
+    etag = first.headers["ETag"]
+    # 압축 여부와 관계없이 같은 ETag를 쓰므로 약한 ETag
+    assert etag.startswith('W/"')
+
+    with count_queries() as counter:
+        cached = client.get("/books", params={"category": category}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert counter.count == 1
+    assert "books" not in counter.statements[0]
+
+    # 조건이 다르면 ETag도 다름
+    other = client.get("/books", params={"category": category, "available": "true"}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_writes_change_the_etag(client, auth_headers, make_book):
+    book = make_book(total_copies=1, category="ETag")
+    etag = client.get("/books", params={"category": "ETag"}).headers["ETag"]
+
+    loan = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()
+    after_loan = client.get("/books", params={"category": "ETag"}, headers={"If-None-Match": etag})
+    assert after_loan.status_code == 200
+    assert after_loan.headers["ETag"] != etag
+    assert [b["available_copies"] for b in after_loan.json() if b["id"] == book["id"]] == [0]
+
+    client.post(f"/loans/{loan['id']}/return", headers=auth_headers)
+    after_return = client.get("/books", params={"category": "ETag"}, headers={"If-None-Match": after_loan.headers["ETag"]})
+    assert after_return.status_code == 200
+    assert after_return.headers["ETag"] not in (etag, after_loan.headers["ETag"])
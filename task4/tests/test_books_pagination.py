@@ -0,0 +1,58 @@
+# 파일: tests/test_books_pagination.py
+# 도서 목록 키셋 페이지네이션(after/limit)과 NDJSON 스트리밍(format=ndjson) 테스트
+
+import json
+
+from library_api import config
+
+from conftest import unique
+
+
+def _make_books(make_book, count):
+    category = unique("Page")
+    return category, [make_book(category=category)["id"] for _ in range(count)]
+
+
+def test_keyset_pages_follow_next_cursor(client, make_book, make_user):
+    category, ids = _make_books(make_book, 5)
+
+    seen, pages, params = [], [], {"category": category, "limit": 2}
+    while True:
+        response = client.get("/books", params=params)
+        assert response.status_code == 200
+        page = [book["id"] for book in response.json()]
+        pages.append(page)
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        assert cursor == str(page[-1])
+        params["after"] = cursor
+    assert pages == [ids[0:2], ids[2:4], ids[4:]]
+    assert seen == ids
+
+    # 필터와 함께 사용해도 커서는 id 기준
+    client.post("/loans", json={"book_id": ids[1]}, headers=make_user())
+    response = client.get("/books", params={"category": category, "available": True, "after": ids[0], "limit": 2})
+    assert [book["id"] for book in response.json()] == [ids[2], ids[3]]
+    assert response.headers["X-Next-Cursor"] == str(ids[3])
+
+    assert client.get("/books", params={"limit": 0}).status_code == 422
+
+
+def test_ndjson_streams_every_book_after_cursor(client, make_book, monkeypatch):
+    category, ids = _make_books(make_book, 5)
+    # 배치 경계를 여러 번 지나도록 작은 배치로 읽음
+    monkeypatch.setattr(config, "BOOKS_STREAM_BATCH_SIZE", 2)
+
+    response = client.get("/books", params={"category": category, "format": "ndjson", "after": ids[0], "limit": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "X-Next-Cursor" not in response.headers
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    # limit과 관계없이 after 이후 전부
+    assert [book["id"] for book in lines] == ids[1:]
+    assert lines[0] == client.get("/books", params={"category": category, "after": ids[0], "limit": 1}).json()[0]
+
+    response = client.get("/books", params={"category": category, "format": "ndjson", "fields": "title"})
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"id": i, "title": "Test Book"} for i in ids]
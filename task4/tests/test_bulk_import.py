@@ -0,0 +1,73 @@
+# 파일: tests/test_bulk_import.py
+# 도서 대량 가져오기(POST /books/import) 테스트
+
+import json
+
+from library_api import bulk_import
+
+from conftest import unique
+
+HEADER = "title,author,isbn,category,total_copies\n"
+
+
+def _import(client, headers, data, filename="books.csv", **params):
+    response = client.post("/books/import", params=params, headers=headers,
+                           files={"file": (filename, data, "application/octet-stream")})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _book(client, category, isbn):
+    matches = [b for b in client.get("/books", params={"category": category}).json() if b["isbn"] == isbn]
+    return matches[0] if matches else None
+
+
+def test_import_inserts_then_skips_or_upserts(client, auth_headers):
+    prefix = unique("import-")
+    rows = "".join(f"Book {i},Author,{prefix}-{i},{prefix},2\n" for i in range(3))
+    report = _import(client, auth_headers, HEADER + rows, batch_size=2)
+    assert (report["processed"], report["inserted"], report["skipped"], report["failed"]) == (3, 3, 0, 0)
+
+    # 같은 파일 안의 중복 ISBN: skip은 처음 행, upsert는 마지막 행을 사용
+    changed = f"New,Author,{prefix}-0,{prefix},5\nNewer,Author,{prefix}-0,{prefix},4\nBook 9,Author,{prefix}-9,{prefix},1\n"
+    report = _import(client, auth_headers, HEADER + changed)
+    assert (report["inserted"], report["updated"], report["skipped"]) == (1, 0, 2)
+    assert _book(client, prefix, f"{prefix}-0")["title"] == "Book 0"
+
+    report = _import(client, auth_headers, HEADER + changed, on_conflict="upsert")
+    assert (report["inserted"], report["updated"], report["skipped"]) == (0, 3, 0)
+    book = _book(client, prefix, f"{prefix}-0")
+    assert (book["title"], book["total_copies"], book["available_copies"]) == ("Newer", 4, 4)
+
+
+def test_import_reports_invalid_rows(client, auth_headers):
+    isbn = unique("import-")
+    data = HEADER + f"Good,Author,{isbn},Import,1\nBad,Author,{isbn}-bad,Import,many\n"
+    report = _import(client, auth_headers, data)
+    assert (report["processed"], report["inserted"], report["failed"]) == (2, 1, 1)
+    assert report["errors"][0]["row"] == 3
+    assert report["errors"][0]["isbn"] == f"{isbn}-bad"
+    assert "total_copies" in report["errors"][0]["error"]
+
+    lines = [json.dumps({"title": "J", "author": "A", "isbn": f"{isbn}-json", "category": "Import", "total_copies": 1}),
+             "{not json", "[1, 2]"]
+    report = _import(client, auth_headers, "\n".join(lines), filename="books.ndjson")
+    assert (report["inserted"], report["failed"]) == (1, 2)
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+
+
+def test_import_reports_non_utf8_rows(client, auth_headers):
+    isbn = unique("import-")
+    data = (HEADER + f"Good,Author,{isbn},Import,1\n").encode() + f"Caf\xe9,Author,{isbn}-latin1,Import,1\n".encode("latin-1")
+    report = _import(client, auth_headers, b"\xef\xbb\xbf" + data)  # BOM은 제거됨
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    assert report["errors"] == [{"row": 3, "isbn": None, "error": bulk_import.INVALID_ENCODING}]
+
+
+def test_import_truncates_error_list(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_REPORTED_ERRORS", 2)
+    data = HEADER + "".join(f"Bad,Author,{unique('import-')},Import,x\n" for _ in range(5))
+    report = _import(client, auth_headers, data)
+    assert report["failed"] == 5
+    assert len(report["errors"]) == 2
+    assert report["errors_truncated"] is True
@@ -0,0 +1,103 @@
+# 파일: tests/test_cache.py
+# 도서 목록 캐시(MemoryCache, SQLiteCache) 테스트
+
+import time
+
+import pytest
+
+from library_api import cache
+
+from conftest import unique
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def _make_cache(**kwargs):
+        if request.param == "sqlite":
+            return cache.SQLiteCache(str(tmp_path / "cache.db"), **kwargs)
+        return cache.MemoryCache(**kwargs)
+    return _make_cache
+
+
+def test_get_or_load_hits_after_first_load(make_cache):
+    c = make_cache()
+    loads = []
+    key = cache.make_key("Fiction", True, None, 10, 1, None)
+
+    def loader():
+        loads.append(1)
+        return [{"id": 1}]
+
+    assert cache.get_or_load(c, key, loader) == [{"id": 1}]
+    assert cache.get_or_load(c, key, loader) == [{"id": 1}]
+    assert len(loads) == 1
+    assert (c.stats()["hits"], c.stats()["misses"]) == (1, 1)
+    # 필터 값의 표현이 달라도 같은 키
+    assert c.get(cache.make_key("Fiction", 1, None, 10, 1, None)) == [{"id": 1}]
+
+
+def test_invalidate_category_keeps_other_categories(make_cache):
+    c = make_cache()
+    keys = {name: cache.make_key(name, None, None, 10, 1, None) for name in ("A", "B", None)}
+    for name, key in keys.items():
+        c.set(key, [name])
+    c.invalidate_category("A")
+    # 카테고리 필터가 없는 목록에도 A의 책이 들어 있으므로 함께 제거
+    assert c.get(keys["A"]) is None and c.get(keys[None]) is None
+    assert c.get(keys["B"]) == ["B"]
+    c.clear()
+    assert c.get(keys["B"]) is None
+
+
+def test_result_loaded_during_invalidation_is_not_stored(make_cache):
+    c = make_cache()
+    key = cache.make_key("A", None, None, 10, 1, None)
+
+    def loader():
+        c.invalidate_category("A")  # 조회 도중 다른 요청이 쓰기를 마침
+        return ["stale"]
+
+    assert cache.get_or_load(c, key, loader) == ["stale"]
+    assert c.get(key) is None
+
+
+def test_entries_expire_and_least_recently_used_is_evicted(make_cache):
+    c = make_cache(ttl=0.05)
+    c.set(("ttl",), 1)
+    time.sleep(0.1)
+    assert c.get(("ttl",)) is None
+
+    c = make_cache(maxsize=2)
+    c.set(("a",), 1)
+    c.set(("b",), 2)
+    assert c.get(("a",)) == 1  # a를 최근에 사용했으므로 b가 먼저 제거됨
+    c.set(("c",), 3)
+    assert (c.get(("a",)), c.get(("b",)), c.get(("c",))) == (1, None, 3)
+
+
+def test_books_endpoint_uses_cache_and_write_invalidates(client, make_book, make_cache, auth_headers, monkeypatch):
+    c = make_cache()
+    monkeypatch.setattr(cache, "catalog_cache", c)
+    category = unique("Cached")
+    book = make_book(category=category)
+
+    first = client.get("/books", params={"category": category}).json()
+    assert client.get("/books", params={"category": category}).json() == first
+    assert c.stats()["hits"] == 1 and c.stats()["size"] == 1
+
+    client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers)
+    assert c.stats()["size"] == 0
+    assert client.get("/books", params={"category": category}).json()[0]["available_copies"] == 0
+
+
+def test_sqlite_cache_hits_do_not_write(tmp_path):
+    c = cache.SQLiteCache(str(tmp_path / "cache.db"), maxsize=2)
+    c.set(("a",), 1)
+    c.set(("b",), 2)
+    changes = c._conn.total_changes
+    for _ in range(10):
+        assert c.get(("a",)) == 1
+    assert c._conn.total_changes == changes
+    # 모아 둔 사용 시각은 다음 set에서 반영되어 LRU 제거에 쓰임
+    c.set(("c",), 3)
+    assert (c.get(("a",)), c.get(("b",))) == (1, None)
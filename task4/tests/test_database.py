@@ -0,0 +1,53 @@
+# 파일: tests/test_database.py
+# production 엔진 프로필(WAL + 쓰기 연결 1개 + 읽기 전용 풀) 테스트
+
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from library_api import database
+
+
+@pytest.fixture
+def production_engines():
+    path = os.path.join(tempfile.mkdtemp(prefix="library_db_"), "profile.db")
+    writer, reader = database.create_engines(f"sqlite:///{path}", "production")
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+def test_production_profile_applies_pragmas(production_engines):
+    writer, reader = production_engines
+    with writer.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    assert writer.pool.size() == 1
+
+
+def test_reader_sees_commits_and_rejects_writes(production_engines):
+    writer, reader = production_engines
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    with reader.connect() as read_conn:
+        # 읽기 트랜잭션이 열려 있어도 (WAL이므로) 쓰기가 막히지 않음
+        read_conn.execute(text("BEGIN"))
+        assert read_conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 1
+        with writer.begin() as conn:
+            conn.execute(text("INSERT INTO t VALUES (2)"))
+        read_conn.execute(text("COMMIT"))
+        assert read_conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 2
+
+        with pytest.raises(OperationalError):
+            read_conn.execute(text("INSERT INTO t VALUES (3)"))
+
+
+def test_default_profile_uses_single_engine():
+    writer, reader = database.create_engines("sqlite://", "production")
+    assert writer is reader
@@ -0,0 +1,79 @@
+# 파일: tests/test_export.py
+# 대출 기록 내보내기(GET /loans/export) 테스트
+
+import csv
+import datetime
+import io
+import json
+
+from sqlalchemy import update
+
+from library_api import archive, config, database, models
+
+from conftest import unique
+
+
+def _export_user(client, monkeypatch):
+    username = unique("exporter_")
+    client.post("/auth/signup", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+    token = client.post("/auth/login", data={"username": username, "password": "pw"}).json()["access_token"]
+    monkeypatch.setattr(config, "EXPORT_USERS", {username})
+    return username, {"Authorization": f"Bearer {token}"}
+
+
+def _set_loan_dates(loan_dates):
+    # 테스트 대출을 다른 테스트와 겹치지 않는 과거 날짜로 옮김
+    with database.SessionLocal() as db:
+        for loan_id, loan_date in loan_dates.items():
+            db.execute(update(models.Loan).where(models.Loan.id == loan_id).values(loan_date=loan_date))
+        db.commit()
+
+
+def test_export_requires_allowed_user(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(config, "EXPORT_USERS", set())
+    assert client.get("/loans/export", headers=auth_headers).status_code == 403
+    assert client.get("/loans/export").status_code == 401
+
+
+def test_export_includes_archive_and_summary(client, make_book, monkeypatch):
+    username, headers = _export_user(client, monkeypatch)
+    loans = [client.post("/loans", json={"book_id": make_book(total_copies=1)["id"]}, headers=headers).json()
+             for _ in range(4)]
+    start = datetime.datetime(2001, 1, 1)
+    _set_loan_dates({
+        loans[0]["id"]: start,                                  # 반납 (연체 반납)
+        loans[1]["id"]: start + datetime.timedelta(days=1),     # 반납 후 보관 (연체 반납)
+        loans[2]["id"]: start + datetime.timedelta(days=2),     # 대출 중 (연체)
+        loans[3]["id"]: start + datetime.timedelta(days=40),    # 범위 밖
+    })
+    for loan in loans[:2]:
+        assert client.post(f"/loans/{loan['id']}/return", headers=headers).status_code == 200
+    with database.SessionLocal() as db:
+        archive.archive_returned_loans(db)
+
+    params = {"loan_from": "2001-01-01", "loan_to": "2001-02-01"}
+    response = client.get("/loans/export", params=params, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = {int(row["loan_id"]): row for row in csv.DictReader(io.StringIO(response.text))}
+    assert set(rows) == {loan["id"] for loan in loans[:3]}
+    assert rows[loans[2]["id"]]["status"] == "overdue"
+    assert rows[loans[2]["id"]]["return_date"] == ""
+    assert rows[loans[1]["id"]]["status"] == "returned_late"
+    assert rows[loans[1]["id"]]["username"] == username
+    assert rows[loans[1]["id"]]["title"] == "Test Book"
+
+    response = client.get("/loans/export", params={**params, "format": "ndjson"}, headers=headers)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["loan_id"] for line in lines[:-1]] == [int(loan_id) for loan_id in rows]
+    summary = lines[-1]["summary"]
+    assert summary["loans"] == 3
+    assert (summary["active"], summary["returned"]) == (1, 2)
+    assert (summary["overdue"], summary["returned_late"]) == (1, 2)
+    assert summary["max_overdue_days"] == max(line["overdue_days"] for line in lines[:-1]) > 0
+
+    # CSV는 요청한 경우에만 대출 행 뒤에 요약 표를 붙임
+    response = client.get("/loans/export", params={**params, "summary": "true"}, headers=headers)
+    loan_rows, summary_table = response.text.rsplit("\n\n", 1)
+    assert [int(row["loan_id"]) for row in csv.DictReader(io.StringIO(loan_rows))] == list(rows)
+    assert {key: int(value) for key, value in next(csv.DictReader(io.StringIO(summary_table))).items()} == summary
@@ -0,0 +1,54 @@
+# 파일: tests/test_facets.py
+# 카테고리별 집계(GET /books/facets) 테스트
+
+from library_api import database, facets
+
+from conftest import unique
+
+
+def _facet(client, category):
+    matches = [f for f in client.get("/books/facets").json() if f["category"] == category]
+    return matches[0] if matches else None
+
+
+def _recomputed(category):
+    # 트리거로 갱신된 값이 books 테이블을 처음부터 다시 집계한 값과 같은지 비교
+    with database.engine.connect() as conn:
+        row = conn.exec_driver_sql(
+            "SELECT COUNT(*), SUM(total_copies), SUM(available_copies) FROM books WHERE category = ?", (category,)
+        ).one()
+    return {"category": category, "titles": row[0], "total_copies": row[1], "available_copies": row[2]}
+
+
+def test_facets_follow_every_write_path(client, auth_headers, make_book):
+    category = unique("facet-")
+    first = make_book(total_copies=3, category=category)
+    second = make_book(total_copies=2, category=category)
+    assert _facet(client, category) == {"category": category, "titles": 2, "total_copies": 5, "available_copies": 5}
+
+    loan = client.post("/loans", json={"book_id": first["id"]}, headers=auth_headers).json()
+    client.post("/loans", json={"book_id": second["id"]}, headers=auth_headers)
+    assert _facet(client, category)["available_copies"] == 3
+    client.post(f"/loans/{loan['id']}/return", headers=auth_headers)
+    assert _facet(client, category) == _recomputed(category)
+
+    csv_text = f"title,author,isbn,category,total_copies\nImported,Someone,{unique('isbn-')},{category},4\n"
+    client.post("/books/import", files={"file": ("books.csv", csv_text, "text/csv")}, headers=auth_headers)
+    assert _facet(client, category) == _recomputed(category) == {
+        "category": category, "titles": 3, "total_copies": 9, "available_copies": 8}
+
+    client.delete(f"/books/{first['id']}", headers=auth_headers)
+    assert _facet(client, category) == _recomputed(category)
+
+
+def test_empty_category_disappears_and_rebuild_matches(client, auth_headers, make_book):
+    category = unique("facet-")
+    book = make_book(total_copies=1, category=category)
+    before = client.get("/books/facets").json()
+    client.delete(f"/books/{book['id']}", headers=auth_headers)
+    assert _facet(client, category) is None
+
+    with database.engine.begin() as conn:
+        facets.rebuild(conn)
+    after = client.get("/books/facets").json()
+    assert after == [f for f in before if f["category"] != category]
@@ -0,0 +1,76 @@
+# 파일: tests/test_fields_compression.py
+# 응답 필드 선택(?fields=)과 압축(br/gzip) 테스트
+
+import json
+
+from library_api import compression
+
+
+def test_book_fields_are_projected_in_sql(client, make_book, count_queries):
+    book = make_book(category="Fields")
+    with count_queries() as counter:
+        response = client.get("/books", params={"category": "Fields", "fields": "title,available_copies"})
+    assert response.status_code == 200
+    row = [b for b in response.json() if b["id"] == book["id"]][0]
+    # 응답 필드 순서는 schemas.Book 순서, 커서용 id는 항상 포함
+    assert list(row) == ["title", "id", "available_copies"]
+    select = [s for s in counter.statements if "FROM books" in s][0]
+    assert "books.author" not in select and "books.title" in select
+
+    full_etag = client.get("/books", params={"category": "Fields"}).headers["ETag"]
+    assert response.headers["ETag"] != full_etag
+
+    ndjson = client.get("/books", params={"category": "Fields", "fields": "isbn", "format": "ndjson"})
+    assert all(set(json.loads(line)) == {"isbn", "id"} for line in ndjson.text.splitlines())
+
+    assert client.get("/books", params={"fields": "title,password"}).status_code == 400
+
+
+def test_loan_fields_with_and_without_book(client, auth_headers, make_book):
+    book = make_book()
+    client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers)
+
+    without_book = client.get("/users/me/loans", params={"fields": "loan_date"}, headers=auth_headers).json()
+    assert list(without_book[0]) == ["id", "loan_date"]
+
+    with_title = client.get("/users/me/loans", params={"fields": "book_id,book.title"}, headers=auth_headers).json()
+    assert with_title[0] == {"id": with_title[0]["id"], "book_id": book["id"], "book": {"title": book["title"]}}
+
+    full = client.get("/users/me/loans", headers=auth_headers).json()
+    everything = client.get("/users/me/loans", params={"fields": "book_id,user_id,loan_date,return_date,book"},
+                            headers=auth_headers).json()
+    assert everything == full
+
+    assert client.get("/users/me/loans", params={"fields": "book.nope"}, headers=auth_headers).status_code == 400
+
+
+def test_large_responses_are_compressed(client, make_book):
+    for _ in range(30):
+        make_book(category="Compressed")
+    params = {"category": "Compressed"}
+    plain = client.get("/books", params=params, headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/books", params=params, headers={"Accept-Encoding": "gzip"})
+    brotli = client.get("/books", params=params, headers={"Accept-Encoding": "gzip, br"})
+
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    # brotli 패키지가 없으면 gzip으로 대체
+    assert brotli.headers["content-encoding"] == ("br" if compression.brotli is not None else "gzip")
+    assert gzipped.json() == brotli.json() == plain.json()
+    assert int(gzipped.headers["content-length"]) < len(plain.content) / 2
+    # 인코딩별 응답을 캐시가 구분하도록 Vary를 보내고, ETag는 인코딩과 무관하게 같음
+    assert all(r.headers["vary"] == "Accept-Encoding" for r in (plain, gzipped, brotli))
+    assert plain.headers["etag"] == gzipped.headers["etag"] == brotli.headers["etag"]
+    revalidated = client.get("/books", params=params,
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": brotli.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["vary"] == "Accept-Encoding" and "content-encoding" not in revalidated.headers
+
+    # 스트리밍 응답은 조각마다 flush 하며 압축
+    streamed = client.get("/books", params={**params, "format": "ndjson"}, headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["content-encoding"] == "gzip" and "content-length" not in streamed.headers
+    assert [json.loads(line) for line in streamed.text.splitlines()] == plain.json()
+
+    # 작은 응답은 압축하지 않음
+    small = client.get("/books", params={**params, "limit": 1, "fields": "id"}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
@@ -0,0 +1,33 @@
+# 파일: tests/test_hashing.py
+# 비밀번호 해싱 대기열 제한(503) 테스트
+
+import time
+
+from library_api import hashing
+
+from conftest import unique
+
+
+def test_login_returns_503_when_hashing_queue_is_full(client, send_concurrently, monkeypatch):
+    username = unique("user_")
+    client.post("/auth/signup", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+
+    verify = hashing._verify
+
+    def slow_verify(password, hashed_password):
+        time.sleep(0.2)
+        return verify(password, hashed_password)
+
+    # 실행 1개 + 대기 1개만 허용하는 풀 (요청 처리 스레드 수와 관계없이 나머지는 바로 503)
+    monkeypatch.setattr(hashing, "_verify", slow_verify)
+    monkeypatch.setattr(hashing, "executor", hashing.HashingExecutor("thread", workers=1, queue_size=1))
+    try:
+        responses = send_concurrently([
+            ("POST", "/auth/login", {"data": {"username": username, "password": "pw"}}) for _ in range(8)
+        ])
+    finally:
+        hashing.executor.shutdown()
+
+    codes = [response.status_code for response in responses]
+    assert set(codes) == {200, 503} and codes.count(200) >= 2
+    assert all(response.headers["Retry-After"] == "1" for response in responses if response.status_code == 503)
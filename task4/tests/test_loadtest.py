@@ -0,0 +1,28 @@
+# 파일: tests/test_loadtest.py
+# 부하 테스트 스크립트(loadtest.py)가 같은 프로세스의 app을 대상으로 동작하는지 확인하는 테스트
+
+import asyncio
+
+import loadtest
+
+
+def test_run_load_reports_every_endpoint():
+    async def _run():
+        async with loadtest.make_client() as client:
+            return await loadtest.run_load(client, users=4, iterations=15, seed_books=5, seed=1)
+
+    report = asyncio.run(_run())
+
+    assert report["total"]["requests"] == 4 * 15
+    assert report["total"]["errors"] == 0
+    assert "GET /books" in report["endpoints"]
+    for stats in report["endpoints"].values():
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert report["setup"]["POST /auth/login"]["statuses"] == {"200": 4}
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile([], 95) == 0.0
@@ -0,0 +1,65 @@
+# 파일: tests/test_loans.py
+# 대출/반납의 재고 정합성 테스트입니다.
+
+from library_api import database, models
+
+
+def _available_copies(book_id):
+    db = database.SessionLocal()
+    try:
+        return db.query(models.Book).filter(models.Book.id == book_id).first().available_copies
+    finally:
+        db.close()
+
+
+def test_borrow_unknown_book_returns_404(client, auth_headers):
+    response = client.post("/loans", json={"book_id": 999999}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_concurrent_borrows_never_oversell(make_user, make_book, send_concurrently):
+    # 재고 3권에 40명이 동시에 대출을 요청하면 정확히 3명만 성공해야 합니다.
+    copies, borrowers = 3, 40
+    book = make_book(total_copies=copies)
+    calls = [("POST", "/loans", {"json": {"book_id": book["id"]}, "headers": make_user()}) for _ in range(borrowers)]
+
+    codes = [r.status_code for r in send_concurrently(calls)]
+
+    assert codes.count(201) == copies
+    assert codes.count(400) == borrowers - copies
+    assert _available_copies(book["id"]) == 0
+    db = database.SessionLocal()
+    try:
+        assert db.query(models.Loan).filter(models.Loan.book_id == book["id"]).count() == copies
+    finally:
+        db.close()
+
+
+def test_return_restocks_once(client, auth_headers, make_user, make_book):
+    book = make_book(total_copies=1)
+    loan = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()
+    assert _available_copies(book["id"]) == 0
+
+    # 다른 사용자는 남의 대출을 반납할 수 없음
+    assert client.post(f"/loans/{loan['id']}/return", headers=make_user()).status_code == 404
+
+    response = client.post(f"/loans/{loan['id']}/return", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["return_date"] is not None
+    assert _available_copies(book["id"]) == 1
+
+    # 같은 대출을 다시 반납해도 재고가 늘어나지 않음
+    assert client.post(f"/loans/{loan['id']}/return", headers=auth_headers).status_code == 400
+    assert _available_copies(book["id"]) == 1
+
+
+def test_concurrent_returns_restock_once(client, auth_headers, make_book, send_concurrently):
+    book = make_book(total_copies=1)
+    loan = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()
+
+    calls = [("POST", f"/loans/{loan['id']}/return", {"headers": auth_headers}) for _ in range(8)]
+    codes = [r.status_code for r in send_concurrently(calls)]
+
+    assert codes.count(200) == 1
+    assert codes.count(400) == 7
+    assert _available_copies(book["id"]) == 1
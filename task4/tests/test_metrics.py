@@ -0,0 +1,36 @@
+# 파일: tests/test_metrics.py
+# 성능 계측(미들웨어, Server-Timing 헤더, /metrics 엔드포인트) 테스트
+
+import logging
+
+from library_api import config
+
+
+def test_server_timing_header_reports_db_queries(client, make_book):
+    book = make_book()
+    response = client.get("/books", params={"category": book["category"], "limit": 1000})
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert "db;dur=" in timing and "queries" in timing
+
+
+def test_metrics_endpoint_exposes_route_histograms(client, make_user, make_book):
+    make_book()  # 가입/로그인(해싱)과 POST /books 요청이 기록됨
+    client.get("/books/search", params={"q": "test"})
+
+    body = client.get("/metrics").text
+
+    assert 'library_http_request_duration_seconds_count{method="GET",route="/books/search",status="200"}' in body
+    assert 'route="/books",status="201"' in body
+    assert 'library_password_hash_seconds_count{op="verify"}' in body
+    assert "library_db_queries_total" in body
+    assert 'library_cache_hits_total{cache="principal"}' in body
+
+
+def test_slow_requests_are_logged_with_sql(client, caplog, monkeypatch):
+    monkeypatch.setattr(config, "SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="library_api.slow_requests"):
+        client.get("/books/search", params={"q": "slow"})
+    message = "\n".join(r.getMessage() for r in caplog.records)
+    assert "slow request: GET /books/search -> 200" in message
+    assert "books_fts MATCH" in message
@@ -0,0 +1,66 @@
+# 파일: tests/test_principal_cache.py
+# 인증된 사용자 캐시(PrincipalCache) 테스트
+
+import time
+
+from library_api import auth, cache, crud, database, schemas
+
+
+def _user(user_id):
+    return schemas.User(id=user_id, username=f"u{user_id}", email=f"u{user_id}@example.com")
+
+
+def test_entries_expire_at_token_exp_or_max_ttl():
+    c = cache.PrincipalCache(max_ttl=60)
+    c.set("short", _user(1), time.time() + 0.05)
+    c.set("long", _user(1), time.time() + 3600)
+    assert c.get("short").id == 1
+    time.sleep(0.1)
+    # 토큰이 만료되면 캐시에서도 만료
+    assert c.get("short") is None
+    assert c.get("long").id == 1
+
+    # 토큰이 더 오래 유효해도 max_ttl까지만 보관
+    c = cache.PrincipalCache(max_ttl=0.05)
+    c.set("long", _user(1), time.time() + 3600)
+    time.sleep(0.1)
+    assert c.get("long") is None
+
+
+def test_invalidate_user_and_eviction():
+    c = cache.PrincipalCache(maxsize=3)
+    exp = time.time() + 3600
+    c.set("a1", _user(1), exp)
+    c.set("a2", _user(1), exp)
+    c.set("b1", _user(2), exp)
+    c.invalidate_user(1)
+    assert (c.get("a1"), c.get("a2"), c.get("b1").id) == (None, None, 2)
+
+    c.set("c1", _user(3), exp)
+    c.set("d1", _user(4), exp)
+    c.get("b1")  # 최근 사용
+    c.set("e1", _user(5), exp)
+    assert c.get("c1") is None
+    assert c.get("b1").id == 2 and c.stats()["size"] == 3
+
+
+def test_cached_principal_skips_user_query_until_user_changes(client, auth_headers, count_queries):
+    token = auth_headers["Authorization"].split()[1]
+    assert auth.principal_cache.get(token) is None
+
+    with count_queries() as first:
+        assert client.get("/users/me/loans", headers=auth_headers).status_code == 200
+    with count_queries() as second:
+        assert client.get("/users/me/loans", headers=auth_headers).status_code == 200
+    # 두 번째 요청은 사용자 조회 없이 캐시된 스냅샷을 사용
+    assert second.count == first.count - 1
+    user = auth.principal_cache.get(token)
+    assert user is not None
+
+    # users 행이 바뀌면 (어느 경로에서든) 그 사용자의 토큰이 캐시에서 제거됨
+    with database.SessionLocal() as db:
+        crud.update_password_hash(db, user.id, auth.get_password_hash("new"))
+    assert auth.principal_cache.get(token) is None
+    with count_queries() as third:
+        assert client.get("/users/me/loans", headers=auth_headers).status_code == 200
+    assert third.count == first.count
@@ -0,0 +1,56 @@
+# 파일: tests/test_search.py
+# 도서 전문 검색(GET /books/search, FTS5) 테스트
+
+from sqlalchemy import update
+
+from library_api import database, models, search
+
+from conftest import unique
+
+
+def _search(client, q, **params):
+    response = client.get("/books/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [book["id"] for book in response.json()]
+
+
+def test_match_query_quotes_terms_and_adds_prefix():
+    assert search.build_match_query("pyth prog") == '"pyth"* "prog"*'
+    # FTS 연산자/특수 문자는 검색어로만 취급
+    assert search.build_match_query('title:x OR "y* NEAR(z)') == '"title"* "x"* "OR"* "y"* "NEAR"* "z"*'
+    assert search.build_match_query('"*-()') == ""
+
+
+def test_search_matches_prefixes_and_ranks_title_first(client, make_book):
+    token = unique("zq")
+    by_author = make_book(title="Unrelated", author=f"{token} Writer")["id"]
+    by_title = make_book(title=f"{token} Handbook", author="Someone")["id"]
+
+    assert _search(client, token[:6]) == [by_title, by_author]
+    assert _search(client, f"{token} handb") == [by_title]
+    assert _search(client, token, limit=1, offset=1) == [by_author]
+    # 구문 오류가 되는 입력도 400/500 없이 처리
+    assert _search(client, '"') == []
+    # OR는 연산자가 아닌 검색어이므로 모든 단어가 일치해야 함
+    assert _search(client, f"{token} OR nomatch") == []
+
+
+def test_index_follows_insert_update_and_delete(client, make_book, auth_headers):
+    old, new = unique("zqold"), unique("zqnew")
+    book = make_book(title=f"{old} Title")
+    assert _search(client, old) == [book["id"]]
+
+    with database.SessionLocal() as db:
+        db.execute(update(models.Book).where(models.Book.id == book["id"]).values(title=f"{new} Title"))
+        db.commit()
+    assert _search(client, old) == []
+    assert _search(client, new) == [book["id"]]
+
+    # 제목/저자 외의 컬럼만 바뀌면 인덱스는 그대로
+    with database.SessionLocal() as db:
+        db.execute(update(models.Book).where(models.Book.id == book["id"]).values(category="Moved"))
+        db.commit()
+    assert _search(client, new) == [book["id"]]
+
+    assert client.delete(f"/books/{book['id']}", headers=auth_headers).status_code == 200
+    assert _search(client, new) == []
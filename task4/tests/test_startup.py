@@ -0,0 +1,39 @@
+# 파일: tests/test_startup.py
+# 앱 팩토리/lifespan과 스키마 마이그레이션 단계 테스트
+
+import os
+import sys
+import tempfile
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+
+import main
+from library_api import migrate
+
+
+def test_ensure_schema_runs_once():
+    path = os.path.join(tempfile.mkdtemp(prefix="library_migrate_"), "fresh.db")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        assert migrate.ensure_schema(engine) is True
+        assert migrate.ensure_schema(engine) is False
+        tables = set(inspect(engine).get_table_names())
+        assert {"books", "users", "loans", "loans_archive", "books_fts"} <= tables
+    finally:
+        engine.dispose()
+
+
+def test_app_factory_lifespan(monkeypatch):
+    monkeypatch.setattr(main.config, "LOAN_ARCHIVE_INTERVAL", 0)
+    with TestClient(main.create_app()) as client:
+        assert client.get("/books", params={"limit": 1}).status_code == 200
+
+
+def test_heavy_auth_dependencies_are_lazy():
+    # 서버 시작 시 passlib/jose를 불러오지 않음 (다른 테스트에서 이미 불러왔다면 새 인터프리터에서 확인)
+    import subprocess
+    code = "import main, sys; print('passlib' in sys.modules, 'jose' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=dict(os.environ),
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.split() == ["False", "False"], result.stderr
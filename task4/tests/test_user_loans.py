@@ -0,0 +1,65 @@
+# 파일: tests/test_user_loans.py
+# 내 대출 목록(GET /users/me/loans) 조회 테스트입니다.
+
+
+def _borrow_books(client, headers, make_book, count):
+    loan_ids = []
+    for _ in range(count):
+        book = make_book(total_copies=1)
+        loan_ids.append(client.post("/loans", json={"book_id": book["id"]}, headers=headers).json()["id"])
+    return loan_ids
+
+
+def _statements_for_loan_list(client, headers, count_queries):
+    client.get("/users/me/loans", headers=headers)  # 인증 캐시를 채우기 위한 첫 요청
+    with count_queries() as counter:
+        response = client.get("/users/me/loans", headers=headers)
+    assert response.status_code == 200
+    return len(response.json()), counter.count
+
+
+def test_loan_list_query_count_is_constant(client, make_user, make_book, count_queries):
+    few, many = make_user(), make_user()
+    _borrow_books(client, few, make_book, 1)
+    _borrow_books(client, many, make_book, 25)
+
+    few_loans, few_queries = _statements_for_loan_list(client, few, count_queries)
+    many_loans, many_queries = _statements_for_loan_list(client, many, count_queries)
+
+    assert (few_loans, many_loans) == (1, 25)
+    assert many_queries == few_queries
+
+
+def test_loan_list_filters_and_paginates(client, auth_headers, make_book):
+    loan_ids = _borrow_books(client, auth_headers, make_book, 5)
+    client.post(f"/loans/{loan_ids[1]}/return", headers=auth_headers)
+    client.post(f"/loans/{loan_ids[3]}/return", headers=auth_headers)
+
+    active = client.get("/users/me/loans?status=active", headers=auth_headers).json()
+    returned = client.get("/users/me/loans?status=returned", headers=auth_headers).json()
+    assert [loan["id"] for loan in active] == [loan_ids[0], loan_ids[2], loan_ids[4]]
+    assert [loan["id"] for loan in returned] == [loan_ids[1], loan_ids[3]]
+    assert all(loan["book"]["id"] == loan["book_id"] for loan in active)
+
+    first = client.get("/users/me/loans?limit=2", headers=auth_headers)
+    assert [loan["id"] for loan in first.json()] == loan_ids[:2]
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/users/me/loans?limit=2&after={cursor}", headers=auth_headers)
+    assert [loan["id"] for loan in second.json()] == loan_ids[2:4]
+
+
+def test_fast_loan_rows_match_schema_serialization(client, auth_headers, make_book):
+    from library_api import crud, database, schemas
+
+    book = make_book(total_copies=2)
+    client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers)
+    response = client.get("/users/me/loans", headers=auth_headers)
+    assert response.status_code == 200
+    fast = response.json()
+
+    # ORM + Pydantic 경로로 만든 응답과 같은 JSON이어야 함
+    with database.SessionLocal() as db:
+        user_id = fast[0]["user_id"]
+        expected = [schemas.Loan.model_validate(loan).model_dump(mode="json")
+                    for loan in crud.get_user_loans(db, user_id)]
+    assert fast == expected
@@ -0,0 +1,194 @@
+# 파일: tests/test_waitlist.py
+# 도서 대기열(FIFO 확보)과 SSE 알림(GET /waitlist/events) 테스트
+
+import asyncio
+import datetime
+import threading
+
+import main
+from library_api import database, events, waitlist
+
+
+def _borrow(client, book_id, headers):
+    return client.post("/loans", json={"book_id": book_id}, headers=headers)
+
+
+def _entry(client, book_id, headers):
+    matches = [e for e in client.get("/users/me/waitlist", headers=headers).json() if e["book_id"] == book_id]
+    return matches[0] if matches else None
+
+
+def test_returned_copy_is_held_for_waiters_in_order(client, make_user, make_book):
+    owner, first, second = make_user(), make_user(), make_user()
+    book = make_book(total_copies=1)
+    loan = _borrow(client, book["id"], owner).json()
+
+    assert client.post(f"/books/{book['id']}/waitlist", headers=first).json()["position"] == 1
+    assert client.post(f"/books/{book['id']}/waitlist", headers=second).json()["position"] == 2
+    # 다시 등록해도 순서는 그대로
+    assert client.post(f"/books/{book['id']}/waitlist", headers=first).json()["position"] == 1
+    assert client.post("/books/999999999/waitlist", headers=first).status_code == 404
+
+    client.post(f"/loans/{loan['id']}/return", headers=owner)
+    assert _entry(client, book["id"], first)["hold_until"] is not None
+    assert _entry(client, book["id"], second)["hold_until"] is None
+    # 확보된 한 권은 다른 사용자가 빌릴 수 없음 (먼저 반납한 사람 포함)
+    assert _borrow(client, book["id"], second).status_code == 400
+    assert _borrow(client, book["id"], owner).status_code == 400
+
+    second_loan = _borrow(client, book["id"], first)
+    assert second_loan.status_code == 201
+    # 빌리면 대기 항목이 지워지고 다음 대기자가 앞으로 옴
+    assert _entry(client, book["id"], first) is None
+    assert _entry(client, book["id"], second)["position"] == 1
+
+    client.post(f"/loans/{second_loan.json()['id']}/return", headers=first)
+    assert _entry(client, book["id"], second)["hold_until"] is not None
+    assert client.delete(f"/books/{book['id']}/waitlist", headers=second).status_code == 204
+    assert client.delete(f"/books/{book['id']}/waitlist", headers=second).status_code == 404
+    # 확보를 포기하면 다시 누구나 빌릴 수 있음
+    assert _borrow(client, book["id"], owner).status_code == 201
+
+
+def test_join_is_refused_while_a_copy_can_be_borrowed(client, make_user, make_book):
+    owner, first, second = make_user(), make_user(), make_user()
+    book = make_book(total_copies=1)
+    # 빌릴 수 있는 책은 대기 등록으로 잡아 둘 수 없음
+    response = client.post(f"/books/{book['id']}/waitlist", headers=first)
+    assert response.status_code == 400
+    assert _entry(client, book["id"], first) is None
+
+    loan = _borrow(client, book["id"], owner).json()
+    assert client.post(f"/books/{book['id']}/waitlist", headers=first).status_code == 201
+    client.post(f"/loans/{loan['id']}/return", headers=owner)
+    # 남은 한 권이 다른 대기자에게 확보되어 있으면 등록 가능, 확보된 사람은 기존 항목을 그대로 받음
+    assert client.post(f"/books/{book['id']}/waitlist", headers=second).json()["position"] == 2
+    assert client.post(f"/books/{book['id']}/waitlist", headers=first).json()["hold_until"] is not None
+
+
+def test_imported_copies_are_held_for_waiters(client, auth_headers, make_user, make_book):
+    owner, first, second, third = make_user(), make_user(), make_user(), make_user()
+    book = make_book(total_copies=1)
+    _borrow(client, book["id"], owner)
+    for headers in (first, second, third):
+        client.post(f"/books/{book['id']}/waitlist", headers=headers)
+
+    # 가져오기로 부수가 늘면 늘어난 만큼 대기자에게 확보됨
+    csv_data = f"title,author,isbn,category,total_copies\nMore,Tester,{book['isbn']},Testing,3\n"
+    response = client.post("/books/import", params={"on_conflict": "upsert"}, headers=auth_headers,
+                           files={"file": ("books.csv", csv_data, "text/csv")})
+    assert response.json()["updated"] == 1
+    assert _entry(client, book["id"], first)["hold_until"] is not None
+    assert _entry(client, book["id"], second)["hold_until"] is not None
+    assert _entry(client, book["id"], third)["hold_until"] is None
+    assert _borrow(client, book["id"], make_user()).status_code == 400
+    assert _borrow(client, book["id"], second).status_code == 201
+
+
+def test_expired_hold_passes_to_next_waiter(client, make_user, make_book):
+    owner, first, second = make_user(), make_user(), make_user()
+    book = make_book(total_copies=1)
+    loan = _borrow(client, book["id"], owner).json()
+    client.post(f"/books/{book['id']}/waitlist", headers=first)
+    client.post(f"/books/{book['id']}/waitlist", headers=second)
+    client.post(f"/loans/{loan['id']}/return", headers=owner)
+    hold_until = datetime.datetime.fromisoformat(_entry(client, book["id"], first)["hold_until"])
+
+    with database.SessionLocal() as db:
+        granted = waitlist.expire_holds(db, now=hold_until + datetime.timedelta(seconds=1))
+    assert [hold["book_id"] for hold in granted if hold["book_id"] == book["id"]] == [book["id"]]
+    assert _entry(client, book["id"], first) is None
+    assert _entry(client, book["id"], second)["position"] == 1
+    assert _entry(client, book["id"], second)["hold_until"] is not None
+
+
+def test_hub_fans_out_across_threads():
+    async def _run():
+        hub = events.EventHub(queue_size=2)
+        queues = [hub.subscribe(user_id % 100) for user_id in range(5000)]
+        # 다른 스레드(동기 엔드포인트, 쓰기 큐)에서 발행
+        thread = threading.Thread(target=hub.publish, args=(7, {"event": "hold", "id": 1}))
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        received = [q for q in queues if not q.empty()]
+        assert len(received) == 50 and all(q.get_nowait()["id"] == 1 for q in received)
+
+        # 읽지 않는 연결은 최근 queue_size개만 보관
+        for i in range(5):
+            hub.publish(3, {"event": "hold", "id": i})
+        assert queues[3].qsize() == 2 and queues[3].get_nowait()["id"] == 3
+
+        for user_id, queue in enumerate(queues):
+            hub.unsubscribe(user_id % 100, queue)
+        assert hub.stats() == {"users": 0, "connections": 0}
+        hub.publish(7, {"event": "hold", "id": 2})  # 구독자가 없으면 무시
+
+    asyncio.run(_run())
+
+
+async def _open_stream(path, headers):
+    """ASGI 앱을 직접 호출해 스트리밍 응답의 body 조각을 받는 큐와, 연결을 끊는 함수를 반환합니다."""
+    chunks = asyncio.Queue()
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+        elif message.get("body"):
+            await chunks.put(message["body"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    task = asyncio.create_task(main.app(scope, receive, send))
+
+    async def close():
+        disconnected.set()
+        await asyncio.wait_for(task, 5)
+
+    return chunks, close
+
+
+async def _read_until(chunks, marker: bytes):
+    data = b""
+    while marker not in data:
+        data += await asyncio.wait_for(chunks.get(), 5)
+    return data
+
+
+def test_sse_notifies_waiter_when_copy_is_returned(client, make_user, make_book):
+    owner, waiter = make_user(), make_user()
+    book = make_book(total_copies=1)
+    loan = _borrow(client, book["id"], owner).json()
+    client.post(f"/books/{book['id']}/waitlist", headers=waiter)
+
+    async def _run():
+        chunks, close = await _open_stream("/waitlist/events", waiter)
+        await _read_until(chunks, b"retry:")
+        # 반납은 다른 스레드(TestClient)에서 처리되고, 알림은 이 이벤트 루프의 연결로 전달됨
+        await asyncio.to_thread(client.post, f"/loans/{loan['id']}/return", headers=owner)
+        data = await _read_until(chunks, b"\n\n")
+        await close()
+        return data
+
+    data = asyncio.run(_run())
+    assert data.startswith(b"event: hold\nid: ")
+    assert b'"book_id":%d' % book["id"] in data
+    assert not events.hub.has_subscribers()
+
+    async def _reconnect():
+        # 다시 연결하면 이미 확보된 항목을 먼저 받음
+        chunks, close = await _open_stream("/waitlist/events", waiter)
+        data = await _read_until(chunks, b"event: hold")
+        await close()
+        return data
+
+    assert b'"book_id":%d' % book["id"] in asyncio.run(_reconnect())
@@ -0,0 +1,210 @@
+# 파일: tests/test_writer.py
+# 쓰기 큐(group commit) 테스트
+
+import re
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from library_api import archive, auth, crud, database, models, writer
+
+
+@pytest.fixture
+def write_queue():
+    # 서버 lifespan과 같이 쓰기 큐를 시작하고, 테스트가 끝나면 종료
+    queue = writer.start(database.engine)
+    try:
+        yield queue
+    finally:
+        writer.stop()
+
+
+def test_failed_operation_does_not_affect_batch(write_queue):
+    isbn = "writer-" + threading.current_thread().name
+
+    def add_book(db, title):
+        db.add(models.Book(title=title, author="A", isbn=f"{isbn}-{title}", category="Writer",
+                           total_copies=1, available_copies=1))
+        db.commit()
+        return title
+
+    def fail(db):
+        db.add(models.Book(title="bad", author="A", isbn=f"{isbn}-bad", category="Writer",
+                           total_copies=1, available_copies=1))
+        db.flush()
+        raise ValueError("boom")
+
+    # 쓰기 스레드를 잠시 막아 세 작업이 한 배치로 모이도록 함
+    gate = threading.Event()
+    blocker = write_queue.submit(lambda db: gate.wait(5))
+    futures = [write_queue.submit(add_book, "one"), write_queue.submit(fail), write_queue.submit(add_book, "two")]
+    gate.set()
+    blocker.result(5)
+
+    assert futures[0].result(5) == "one"
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == "two"
+    with database.SessionLocal() as db:
+        titles = {b.title for b in db.query(models.Book).filter(models.Book.isbn.like(f"{isbn}-%"))}
+    assert titles == {"one", "two"}
+
+
+def test_endpoints_use_the_queue(write_queue, client, make_user, make_book, send_concurrently):
+    copies, borrowers = 3, 12
+    book = make_book(total_copies=copies)
+    calls = [("POST", "/loans", {"json": {"book_id": book["id"]}, "headers": make_user()}) for _ in range(borrowers)]
+    responses = send_concurrently(calls)
+    assert sorted(r.status_code for r in responses).count(201) == copies
+    created = [r.json() for r in responses if r.status_code == 201]
+    assert all(loan["book"]["id"] == book["id"] for loan in created)
+    with database.SessionLocal() as db:
+        assert crud.get_book(db, book["id"]).available_copies == 0
+
+
+def test_full_queue_returns_503(client, auth_headers, monkeypatch):
+    queue = writer.WriteQueue(database.engine, queue_size=1)  # 시작하지 않아 대기열이 비워지지 않음
+    queue.submit(lambda db: None)
+    monkeypatch.setattr(writer, "write_queue", queue)
+    response = client.post("/books", json={"title": "t", "author": "a", "isbn": "full-queue", "category": "c",
+                                           "total_copies": 1}, headers=auth_headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_after_commit_runs_only_when_batch_is_committed(write_queue, monkeypatch):
+    calls = []
+
+    def op(db, name, fail=False):
+        writer.after_commit(db, calls.append, name)
+        if fail:
+            raise ValueError(name)
+        return name
+
+    gate = threading.Event()
+    blocker = write_queue.submit(lambda db: gate.wait(5))
+    ok = write_queue.submit(op, "ok")
+    failed = write_queue.submit(op, "failed", fail=True)
+    gate.set()
+    blocker.result(5)
+    assert ok.result(5) == "ok"
+    # Future가 완료될 때는 이미 콜백이 실행되어 있음
+    assert calls == ["ok"]
+    with pytest.raises(ValueError):
+        failed.result(5)
+
+    # 배치 commit이 실패하면 성공한 작업의 콜백도 실행하지 않음
+    def fail_commit(self):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr("sqlalchemy.engine.Connection.commit", fail_commit)
+    with pytest.raises(RuntimeError):
+        write_queue.submit(op, "lost").result(5)
+    assert calls == ["ok"]
+
+    # 큐 밖의 세션은 이미 commit 되었으므로 바로 실행
+    with database.SessionLocal() as db:
+        writer.after_commit(db, calls.append, "direct")
+    assert calls == ["ok", "direct"]
+
+
+def test_import_and_rehash_use_the_queue(write_queue, client, auth_headers, monkeypatch):
+    submitted = []
+    submit = write_queue.submit
+
+    def record_submit(fn, *args, **kwargs):
+        submitted.append(fn.__name__)
+        return submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(write_queue, "submit", record_submit)
+
+    isbn = "writer-import-" + threading.current_thread().name
+    csv_data = "title,author,isbn,category,total_copies\n" + "".join(
+        f"T{i},A,{isbn}-{i},Writer,1\n" for i in range(3))
+    response = client.post("/books/import", params={"batch_size": 2}, headers=auth_headers,
+                           files={"file": ("books.csv", csv_data, "text/csv")})
+    assert response.json()["inserted"] == 3
+    assert submitted == ["_write_batch", "_write_batch"]
+
+    username = "rehash_" + isbn
+    client.post("/auth/signup", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+    monkeypatch.setattr(auth, "needs_rehash", lambda hashed_password: True)
+    del submitted[:]
+    assert client.post("/auth/login", data={"username": username, "password": "pw"}).status_code == 200
+    assert submitted == ["update_password_hash"]
+
+
+def test_failed_loan_requests_do_not_use_the_write_pool(write_queue, client, auth_headers, make_book, make_user):
+    book = make_book(total_copies=1)
+    loan = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()
+    other = make_user()
+    client.get("/users/me/loans", headers=other)  # 인증 캐시를 채움
+
+    threads = []
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        threads.append(threading.current_thread().name)
+
+    event.listen(database.engine, "checkout", on_checkout)
+    try:
+        # 실패 원인(재고 없음/없는 책/남의 대출/이미 반납)은 쓰기 스레드의 작업 안에서 확인
+        assert client.post("/loans", json={"book_id": book["id"]}, headers=other).status_code == 400
+        assert client.post("/loans", json={"book_id": 999999999}, headers=other).status_code == 404
+        assert client.post(f"/loans/{loan['id']}/return", headers=other).status_code == 404
+        assert client.post(f"/loans/{loan['id']}/return", headers=auth_headers).status_code == 200
+        assert client.post(f"/loans/{loan['id']}/return", headers=auth_headers).status_code == 400
+    finally:
+        event.remove(database.engine, "checkout", on_checkout)
+    assert threads and set(threads) == {"db-writer"}
+
+
+def test_background_archiver_uses_the_queue(write_queue, client, auth_headers, make_book, monkeypatch):
+    submitted = []
+    submit = write_queue.submit
+
+    def record_submit(fn, *args, **kwargs):
+        submitted.append((fn.__name__, threading.current_thread().name))
+        return submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(archive.config, "LOAN_ARCHIVE_DELAY", 0)
+    loan_ids = []
+    for _ in range(2):
+        book = make_book(total_copies=1)
+        loan_ids.append(client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers).json()["id"])
+        client.post(f"/loans/{loan_ids[-1]}/return", headers=auth_headers)
+    monkeypatch.setattr(write_queue, "submit", record_submit)
+
+    archiver = archive.start_background_archiver(database.SessionLocal, interval=0.01)
+    try:
+        deadline = time.monotonic() + 2
+        while ("archive_batch", "loan-archiver") not in submitted and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        archiver.stop_event.set()
+        archiver.join(1)
+    # 보관 배치도 다른 쓰기와 같이 쓰기 큐에서 commit 됨
+    assert ("archive_batch", "loan-archiver") in submitted
+    with database.SessionLocal() as db:
+        assert db.get(models.LoanArchive, loan_ids[0]) is not None
+
+
+def test_server_timing_includes_queued_writes(write_queue, client, auth_headers, make_book):
+    book = make_book()
+    threads = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        threads.append(threading.current_thread().name)
+
+    event.listen(Engine, "after_cursor_execute", on_execute)
+    try:
+        response = client.post("/loans", json={"book_id": book["id"]}, headers=auth_headers)
+    finally:
+        event.remove(Engine, "after_cursor_execute", on_execute)
+    assert response.status_code == 201
+    queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+    # 쓰기 스레드에서 실행된 문장도 요청의 쿼리 수에 포함됨 (배치 전체의 BEGIN IMMEDIATE만 제외)
+    assert threads.count("db-writer") > 1
+    assert queries == len(threads) - 1